@@ -0,0 +1,447 @@
+# analytics.py (Registration Summaries and Turnover Distributions)
+#
+# registration_summary keeps counts and turnover (A) totals per organisation
+# type, GSTIN answer and enterprise class. Every write path appends its rows'
+# deltas to registration_summary_delta in the transaction that inserts them
+# (a plain INSERT, so concurrent writers never wait on a shared summary row),
+# and a background task in each worker folds the deltas into the summary
+# every ANALYTICS_FOLD_INTERVAL seconds. GET /analytics/summary reads both
+# tables, a few hundred rows at most, whatever the size of
+# udyam_registrations. An upsert-mode submission that replaces a stored
+# registration appends the old row's values as a negative delta (turnover
+# min/max cannot be taken back, so they keep the old extremes until the next
+# refresh). Bulk loads rebuild the summary instead:
+#
+#   python -m backend.analytics refresh
+#   python -m backend.analytics fold
+#   python -m backend.analytics report --by organizationType,sizeClass   # percentiles, computed with NumPy
+#
+# Ad-hoc reports need more than sums (percentiles per group), so they scan
+# the three columns involved once and compute every group's statistics in a
+# few vectorized NumPy passes. On databases other than PostgreSQL and
+# SQLite no summary is kept, and reports aggregate udyam_registrations.
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert, select, text, union_all
+
+from .database import RegistrationSummary, RegistrationSummaryDelta, UdyamRegistration, registration_insert
+from .schemas import format_yes_no
+
+logger = logging.getLogger(__name__)
+
+# Maintain registration_summary on every insert; with "false" it is only refreshed in bulk
+ANALYTICS_SUMMARIES = os.getenv("ANALYTICS_SUMMARIES", "true").lower() in ("1", "true", "yes")
+# Seconds between folds of registration_summary_delta into registration_summary
+ANALYTICS_FOLD_INTERVAL = float(os.getenv("ANALYTICS_FOLD_INTERVAL", "10"))
+# Databases with the INSERT ... ON CONFLICT and DELETE ... RETURNING the summary tables rely on
+SUMMARY_DIALECTS = ("postgresql", "sqlite")
+
+# Enterprise classes by annual turnover in rupees (MSME notification of 2020:
+# up to ₹5 crore micro, ₹50 crore small, ₹250 crore medium). The form asks
+# for turnover only, so the investment criterion is not applied.
+SIZE_CLASSES = ("micro", "small", "medium", "large")
+SIZE_CLASS_LIMITS = (50_000_000, 500_000_000, 2_500_000_000)
+UNKNOWN = "unknown"
+# Report dimensions (API names) -> registration_summary columns
+DIMENSIONS = {
+    "organizationType": "organization_type",
+    "hasGstin": "gstin",
+    "sizeClass": "size_class",
+}
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+registrations = UdyamRegistration.__table__
+summary = RegistrationSummary.__table__
+summary_delta = RegistrationSummaryDelta.__table__
+KEY_COLUMNS = ("organization_type", "gstin", "size_class")
+MEASURE_COLUMNS = ("registrations", "turnover_count", "turnover_sum", "turnover_min", "turnover_max")
+
+
+def size_class(turnover: Optional[float]) -> str:
+    if turnover is None:
+        return UNKNOWN
+    for name, limit in zip(SIZE_CLASSES, SIZE_CLASS_LIMITS):
+        if turnover <= limit:
+            return name
+    return SIZE_CLASSES[-1]
+
+
+def summaries_supported(dialect_name: str) -> bool:
+    return dialect_name in SUMMARY_DIALECTS
+
+
+# --- Incremental Maintenance ---
+def merge_deltas(deltas) -> list:
+    """
+    Summary deltas (mappings of KEY_COLUMNS and MEASURE_COLUMNS) combined per
+    key, sorted by key, so every writer touches summary rows in the same
+    order and concurrent folds cannot deadlock.
+    """
+    merged = {}
+    for delta in deltas:
+        key = tuple(delta[column] for column in KEY_COLUMNS)
+        total = merged.get(key)
+        if total is None:
+            merged[key] = dict(zip(KEY_COLUMNS, key), **{column: delta[column] for column in MEASURE_COLUMNS})
+            continue
+        total["registrations"] += delta["registrations"]
+        total["turnover_count"] += delta["turnover_count"]
+        total["turnover_sum"] += delta["turnover_sum"]
+        for column, pick in (("turnover_min", min), ("turnover_max", max)):
+            values = [value for value in (total[column], delta[column]) if value is not None]
+            total[column] = pick(values) if values else None
+    return [merged[key] for key in sorted(merged)]
+
+
+def summary_deltas(rows: list, removed: list = ()) -> list:
+    """
+    Summary rows to add for newly stored registrations (rows as
+    registration_row returns them), less the `removed` ones they replaced.
+    """
+    def delta(row, sign):
+        return {
+            "organization_type": row["organization_type"] or 0,
+            "gstin": format_yes_no(row["hasGstin"]) or UNKNOWN,
+            "size_class": size_class(row["totalTurnoverA"]),
+            "registrations": sign,
+            "turnover_count": sign * int(row["totalTurnoverA"] is not None),
+            "turnover_sum": sign * (row["totalTurnoverA"] or 0.0),
+            "turnover_min": row["totalTurnoverA"] if sign > 0 else None,
+            "turnover_max": row["totalTurnoverA"] if sign > 0 else None,
+        }
+
+    return merge_deltas([delta(row, 1) for row in rows] + [delta(row, -1) for row in removed])
+
+
+def summary_upsert(dialect_name: str, deltas: list):
+    """INSERT ... ON CONFLICT adding `deltas` to registration_summary (SUMMARY_DIALECTS only)."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        least, greatest = func.least, func.greatest
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        least, greatest = func.min, func.max
+
+    statement = dialect_insert(summary).values(deltas)
+    excluded = statement.excluded
+    # SQLite's two-argument min/max return NULL if either side is NULL, hence the coalesce on both sides
+    return statement.on_conflict_do_update(
+        index_elements=[summary.c.organization_type, summary.c.gstin, summary.c.size_class],
+        set_={
+            "registrations": summary.c.registrations + excluded.registrations,
+            "turnover_count": summary.c.turnover_count + excluded.turnover_count,
+            "turnover_sum": summary.c.turnover_sum + excluded.turnover_sum,
+            "turnover_min": least(func.coalesce(summary.c.turnover_min, excluded.turnover_min),
+                                  func.coalesce(excluded.turnover_min, summary.c.turnover_min)),
+            "turnover_max": greatest(func.coalesce(summary.c.turnover_max, excluded.turnover_max),
+                                     func.coalesce(excluded.turnover_max, summary.c.turnover_max)),
+        },
+    )
+
+
+def stored_rows(rows: list, ids_by_adharno: dict) -> list:
+    """The rows a registration_insert actually stored, given the (adharno -> id) it returned."""
+    pending = set(ids_by_adharno)
+    stored = []
+    for row in rows:
+        if row["adharno"] in pending:
+            pending.discard(row["adharno"])
+            stored.append(row)
+    return stored
+
+
+async def record_registrations(db, rows: list, removed: list = ()) -> None:
+    """
+    Appends the summary deltas of newly stored registrations and of the
+    `removed` ones they replaced, in the caller's (uncommitted) transaction.
+    """
+    if ANALYTICS_SUMMARIES and (rows or removed) and summaries_supported(db.bind.dialect.name):
+        await db.execute(insert(summary_delta), summary_deltas(rows, removed))
+
+
+async def replaced_registrations(db, adharnos: list) -> list:
+    """
+    The stored registrations an upsert of `adharnos` is about to replace,
+    locked until the caller's transaction ends. On PostgreSQL an advisory lock
+    per Aadhaar number also holds back concurrent upserts of numbers not
+    stored yet, which would otherwise turn this upsert's insert into an update
+    of a row read nowhere.
+    """
+    dialect_name = db.bind.dialect.name
+    if not (ANALYTICS_SUMMARIES and adharnos and summaries_supported(dialect_name)):
+        return []
+    if dialect_name == "postgresql":
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(adharno)) "
+                 "FROM unnest(CAST(:adharnos AS text[])) AS locked(adharno) ORDER BY adharno"),
+            {"adharnos": sorted(set(adharnos))},
+        )
+    statement = select(
+        registrations.c.adharno, registrations.c.organization_type,
+        registrations.c.hasGstin, registrations.c.totalTurnoverA,
+    ).where(registrations.c.adharno.in_(adharnos)).with_for_update()
+    return [dict(row._mapping) for row in (await db.execute(statement)).all()]
+
+
+async def store_registrations(db, rows: list, mode: str = "reject") -> dict:
+    """
+    Writes `rows` with registration_insert in the caller's (uncommitted)
+    transaction and records the summary deltas of whatever it stored or
+    replaced; returns {adharno: id} of the stored rows.
+    """
+    replaced = await replaced_registrations(db, [row["adharno"] for row in rows]) if mode == "upsert" else []
+    statement = registration_insert(db.bind.dialect.name, rows, mode)
+    ids_by_adharno = {adharno: id_ for id_, adharno in (await db.execute(statement)).all()}
+    await record_registrations(db, stored_rows(rows, ids_by_adharno),
+                               [row for row in replaced if row["adharno"] in ids_by_adharno])
+    return ids_by_adharno
+
+
+def fold_summaries(connection) -> int:
+    """
+    Moves the pending deltas into registration_summary, in the connection's
+    transaction; returns how many were folded. The deltas are
+    claimed with DELETE ... RETURNING, so concurrent folds in other workers
+    never count a delta twice.
+    """
+    if not summaries_supported(connection.dialect.name):
+        return 0
+    claimed = connection.execute(
+        delete(summary_delta).returning(*(summary_delta.c[column] for column in KEY_COLUMNS + MEASURE_COLUMNS))
+    ).mappings().all()
+    if claimed:
+        connection.execute(summary_upsert(connection.dialect.name, merge_deltas(claimed)))
+    return len(claimed)
+
+
+async def fold_periodically(session_factory, interval: float = ANALYTICS_FOLD_INTERVAL) -> None:
+    """Background task: folds the deltas every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                await db.run_sync(lambda session: fold_summaries(session.connection()))
+                await db.commit()
+        except Exception:
+            # Deltas stay where they are and are folded next time
+            logger.exception("Folding registration summary deltas failed")
+
+
+# --- Bulk Refresh ---
+def size_class_expression(turnover):
+    return case(
+        (turnover.is_(None), UNKNOWN),
+        *((turnover <= limit, name) for name, limit in zip(SIZE_CLASSES, SIZE_CLASS_LIMITS)),
+        else_=SIZE_CLASSES[-1],
+    )
+
+
+def registration_aggregates():
+    """SELECT of the summary (KEY_COLUMNS and MEASURE_COLUMNS) computed from udyam_registrations."""
+    turnover = registrations.c.totalTurnoverA
+    organization_type = func.coalesce(registrations.c.organization_type, 0)
+    gstin = case((registrations.c.hasGstin.is_(None), UNKNOWN), (registrations.c.hasGstin, "yes"), else_="no")
+    size = size_class_expression(turnover)
+    return select(
+        organization_type.label("organization_type"), gstin.label("gstin"), size.label("size_class"),
+        func.count().label("registrations"), func.count(turnover).label("turnover_count"),
+        func.coalesce(func.sum(turnover), 0).label("turnover_sum"),
+        func.min(turnover).label("turnover_min"), func.max(turnover).label("turnover_max"),
+    ).group_by(organization_type, gstin, size)
+
+
+def refresh_summaries(connection) -> None:
+    """
+    Rebuilds registration_summary from udyam_registrations with one
+    INSERT ... SELECT ... GROUP BY, in the connection's transaction, and
+    drops the pending deltas it makes redundant.
+    """
+    if connection.dialect.name == "postgresql":
+        # Writers' delta inserts and folds wait until the rebuilt summary is
+        # committed, and rows committed before the lock are all seen by the
+        # SELECT below. Folds lock the tables in the same order.
+        connection.execute(text(f"LOCK TABLE {summary_delta.name}, {summary.name} IN EXCLUSIVE MODE"))
+    connection.execute(delete(summary_delta))
+    connection.execute(delete(summary))
+    connection.execute(insert(summary).from_select(list(KEY_COLUMNS + MEASURE_COLUMNS), registration_aggregates()))
+
+
+# --- Reports ---
+def _group_label(dimension: str, value):
+    return str(value) if dimension == "organizationType" else value
+
+
+def summary_source(dialect_name: str):
+    """
+    The summary rows a report adds up: registration_summary plus the deltas
+    not folded yet, or, where no summary is kept, udyam_registrations itself.
+    """
+    if not summaries_supported(dialect_name):
+        return registration_aggregates().subquery()
+    columns = KEY_COLUMNS + MEASURE_COLUMNS
+    return union_all(
+        select(*(summary.c[column] for column in columns)),
+        select(*(summary_delta.c[column] for column in columns)),
+    ).subquery()
+
+
+async def summary_report(db, group_by: list) -> list:
+    """Summary totals grouped by the given DIMENSIONS (all registrations when empty)."""
+    source = summary_source(db.bind.dialect.name)
+    columns = [source.c[DIMENSIONS[dimension]] for dimension in group_by]
+    registrations_total = func.sum(source.c.registrations)
+    turnover_count = func.sum(source.c.turnover_count)
+    turnover_sum = func.sum(source.c.turnover_sum)
+    statement = select(
+        *columns, registrations_total, turnover_count, turnover_sum,
+        func.min(source.c.turnover_min), func.max(source.c.turnover_max),
+    ).group_by(*columns).order_by(*columns).having(registrations_total > 0)
+    report = []
+    for row in (await db.execute(statement)).all():
+        group = {dimension: _group_label(dimension, value) for dimension, value in zip(group_by, row)}
+        count, with_turnover, total, lowest, highest = row[len(group_by):]
+        report.append({
+            **group,
+            "registrations": count,
+            "withTurnover": with_turnover,
+            "turnover": {
+                "sum": total,
+                "mean": total / with_turnover if with_turnover else None,
+                "min": lowest,
+                "max": highest,
+            },
+        })
+    return report
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Distribution reports require numpy (pip install numpy).") from e
+    return numpy
+
+
+def load_columns(connection, batch_size: int = 50000) -> tuple:
+    """(organization_type, gstin, turnover) arrays of every registration, gstin as 1/0/-1 for yes/no/unanswered."""
+    np = _numpy()
+    organization_types, gstins, turnovers = [], [], []
+    statement = select(registrations.c.organization_type, registrations.c.hasGstin, registrations.c.totalTurnoverA)
+    result = connection.execution_options(yield_per=batch_size).execute(statement)
+    for partition in result.partitions():
+        organization_type, gstin, turnover = zip(*partition)
+        organization_types.append(np.array([value or 0 for value in organization_type], dtype=np.int16))
+        gstins.append(np.array([-1 if value is None else int(value) for value in gstin], dtype=np.int8))
+        # None becomes NaN
+        turnovers.append(np.array(turnover, dtype=np.float64))
+    if not turnovers:
+        return np.zeros(0, np.int16), np.zeros(0, np.int8), np.zeros(0, np.float64)
+    return np.concatenate(organization_types), np.concatenate(gstins), np.concatenate(turnovers)
+
+
+def distribution(organization_types, gstins, turnovers, group_by: list, percentiles=PERCENTILES) -> list:
+    """
+    Count, mean and turnover percentiles (linear interpolation, as
+    numpy.percentile) per group, with one sort over all rows instead of a
+    pass per group. Registrations without a turnover count towards
+    `registrations` only.
+    """
+    np = _numpy()
+    size_classes = np.searchsorted(np.array(SIZE_CLASS_LIMITS, dtype=np.float64), turnovers, side="left")
+    size_classes[np.isnan(turnovers)] = len(SIZE_CLASSES)
+    labels = {
+        "organizationType": (organization_types, lambda code: str(code)),
+        "hasGstin": (gstins, lambda code: {1: "yes", 0: "no"}.get(code, UNKNOWN)),
+        "sizeClass": (size_classes, lambda code: (SIZE_CLASSES + (UNKNOWN,))[code]),
+    }
+    if not len(turnovers):
+        return []
+    if group_by:
+        # Each row's group as one integer (its codes in mixed radix), so grouping is a 1-D unique
+        codes = [labels[dimension][0].astype(np.int64) for dimension in group_by]
+        offsets = [int(code.min()) for code in codes]
+        shape = [int(code.max()) - offset + 1 for code, offset in zip(codes, offsets)]
+        combined = np.ravel_multi_index([code - offset for code, offset in zip(codes, offsets)], shape)
+        unique, group_ids = np.unique(combined, return_inverse=True)
+        keys = np.stack(np.unravel_index(unique, shape), axis=1) + offsets
+    else:
+        keys, group_ids = np.zeros((1, 0), np.int64), np.zeros(len(turnovers), np.int64)
+    groups = len(keys)
+
+    has_turnover = ~np.isnan(turnovers)
+    counts = np.bincount(group_ids, minlength=groups)
+    valid = np.bincount(group_ids, weights=has_turnover, minlength=groups).astype(np.int64)
+    sums = np.bincount(group_ids[has_turnover], weights=turnovers[has_turnover], minlength=groups)
+
+    # Turnovers sorted by group, then value; each group's values are a contiguous run
+    order = np.lexsort((turnovers[has_turnover], group_ids[has_turnover]))
+    ordered = turnovers[has_turnover][order]
+    starts = np.concatenate(([0], np.cumsum(valid)[:-1]))
+    fractions = np.asarray(percentiles, dtype=np.float64) / 100
+    positions = (valid[:, None] - 1).clip(min=0) * fractions[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, (valid[:, None] - 1).clip(min=0))
+    weight = positions - lower
+    if len(ordered):
+        lower_values = ordered[np.minimum(starts[:, None] + lower, len(ordered) - 1)]
+        upper_values = ordered[np.minimum(starts[:, None] + upper, len(ordered) - 1)]
+        values = lower_values + (upper_values - lower_values) * weight
+    else:
+        values = np.zeros((groups, len(fractions)))
+
+    report = []
+    for group in range(groups):
+        entry = {
+            dimension: labels[dimension][1](int(code)) for dimension, code in zip(group_by, keys[group])
+        }
+        entry["registrations"] = int(counts[group])
+        entry["withTurnover"] = int(valid[group])
+        entry["turnover"] = {"mean": float(sums[group] / valid[group])} if valid[group] else {"mean": None}
+        entry["turnover"].update(
+            (f"p{percentile:g}", float(value) if valid[group] else None)
+            for percentile, value in zip(percentiles, values[group])
+        )
+        report.append(entry)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild registration summaries or print a turnover distribution report.")
+    parser.add_argument("command", choices=("refresh", "fold", "report"))
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL")
+    parser.add_argument("--by", default="", help=f"report: comma separated dimensions ({', '.join(DIMENSIONS)})")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+    group_by = [dimension for dimension in args.by.split(",") if dimension]
+    unknown = [dimension for dimension in group_by if dimension not in DIMENSIONS]
+    if unknown:
+        parser.error(f"unknown dimension(s): {', '.join(unknown)}")
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(args.database_url)
+    try:
+        with engine.begin() as connection:
+            if args.command == "refresh":
+                refresh_summaries(connection)
+                groups = connection.execute(select(func.count()).select_from(summary)).scalar()
+                print(f"registration_summary rebuilt: {groups} groups", file=sys.stderr)
+            elif args.command == "fold":
+                print(f"{fold_summaries(connection)} deltas folded into registration_summary", file=sys.stderr)
+            else:
+                for entry in distribution(*load_columns(connection), group_by):
+                    print(json.dumps(entry))
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+# auth.py (Admin API Authentication)
+#
+# The search, export and analytics endpoints return what applicants entered
+# (Aadhaar numbers, PANs, dates of birth), so they require a bearer token
+# from ADMIN_API_TOKENS:
+#
+#   curl -H "Authorization: Bearer $ADMIN_TOKEN" localhost:8000/registrations
+#
+# Without any token configured those endpoints are closed.
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+# Accepted admin tokens, comma separated (several, so they can be rotated)
+ADMIN_API_TOKENS = [token.strip() for token in os.getenv("ADMIN_API_TOKENS", "").split(",") if token.strip()]
+
+bearer = HTTPBearer(auto_error=False, description="One of ADMIN_API_TOKENS")
+
+
+def is_admin_token(token: str, tokens: Optional[list] = None) -> bool:
+    """Compares in constant time against every accepted token."""
+    accepted = ADMIN_API_TOKENS if tokens is None else tokens
+    matched = False
+    for candidate in accepted:
+        matched |= hmac.compare_digest(token.encode(), candidate.encode())
+    return matched
+
+
+async def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> None:
+    """FastAPI dependency: 401 unless the request carries an admin bearer token."""
+    if credentials is None or not is_admin_token(credentials.credentials):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin token required.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
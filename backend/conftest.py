@@ -0,0 +1,22 @@
+# conftest.py (Pytest configuration for Backend)
+import os
+
+import pytest
+
+# Tests run against a local SQLite stand-in unless a database is provided
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_udyam.db")
+
+
+class FakeClock:
+    """Stands in for the `clock=` of the caches, stores and queues; moves only when a test sets `now`."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
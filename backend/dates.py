@@ -0,0 +1,69 @@
+# dates.py (DD/MM/YYYY Dates of Birth / Incorporation)
+#
+# One parser for every date the form sends, shared by PanValidationRequest,
+# the PAN step of UdyamFormRequest and the storage mapping. Parsed values are
+# kept in a bounded LRU cache, since bulk imports repeat the same few
+# thousand dates over and over, and "today" is computed once per day instead
+# of on every check. Errors say what is wrong with the date, not just that it
+# is invalid.
+import calendar
+import datetime
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Optional
+
+# Distinct DD/MM/YYYY strings whose parse result is kept
+DATE_CACHE_SIZE = int(os.getenv("DATE_CACHE_SIZE", "4096"))
+
+DATE_PATTERN = re.compile(r'^\d{2}\/\d{2}\/\d{4}$')
+FORMAT_ERROR = 'Date format is DD/MM/YYYY.'
+FUTURE_ERROR = 'Date cannot be in the future.'
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(value: str) -> tuple:
+    """(date, None) for a valid DD/MM/YYYY string, (None, reason) otherwise."""
+    if not DATE_PATTERN.fullmatch(value):
+        return None, FORMAT_ERROR
+    day, month, year = int(value[:2]), int(value[3:5]), int(value[6:])
+    if year < 1:
+        return None, 'Year must be 0001 or later.'
+    if not 1 <= month <= 12:
+        return None, 'Month must be between 01 and 12.'
+    last_day = calendar.monthrange(year, month)[1]
+    if not 1 <= day <= last_day:
+        return None, f'Day must be between 01 and {last_day:02d} for {month:02d}/{year:04d}.'
+    return datetime.date(year, month, day), None
+
+
+class Today:
+    """
+    The local date, recomputed only once the clock passes the next local
+    midnight. Checking is one float comparison instead of a date.today() call.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._date = None
+        self._expires_at = 0.0
+
+    def __call__(self) -> datetime.date:
+        now = self.clock()
+        if now >= self._expires_at:
+            self._date = datetime.date.fromtimestamp(now)
+            midnight = datetime.datetime.combine(self._date + datetime.timedelta(days=1), datetime.time())
+            self._expires_at = midnight.timestamp()
+        return self._date
+
+
+today = Today()
+
+
+def date_error(value: str) -> Optional[str]:
+    """Why `value` is not an acceptable date of birth / incorporation, or None when it is."""
+    parsed, error = parse_date(value)
+    if error is None and parsed > today():
+        return FUTURE_ERROR
+    return error
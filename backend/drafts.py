@@ -0,0 +1,91 @@
+# drafts.py (Server-Side Draft Storage for the Multi-Step Form)
+#
+# The frontend saves each completed step of the form into a draft (PATCH
+# /drafts/{id}/{step}), so every step is validated once, as it is completed,
+# and the final submit only commits what is already stored.
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from .cache import TTLCache
+
+# redis://host:6379/0 to share drafts between workers; in-memory otherwise
+DRAFT_STORE_URL = os.getenv("DRAFT_STORE_URL")
+DRAFT_TTL = float(os.getenv("DRAFT_TTL", "3600"))
+DRAFT_MAX_ENTRIES = int(os.getenv("DRAFT_MAX_ENTRIES", "100000"))
+
+
+def new_draft_id() -> str:
+    return uuid.uuid4().hex
+
+
+class DraftStore(ABC):
+    """Interface for draft storage. Drafts expire DRAFT_TTL seconds after their last update."""
+
+    @abstractmethod
+    async def get(self, draft_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def set(self, draft_id: str, draft: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, draft_id: str) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class InMemoryDraftStore(DraftStore):
+    """Per-process store with LRU eviction and TTL expiry."""
+
+    def __init__(self, maxsize: int = DRAFT_MAX_ENTRIES, ttl: float = DRAFT_TTL, clock=time.monotonic):
+        self.cache = TTLCache(maxsize, ttl, clock)
+
+    async def get(self, draft_id):
+        draft = self.cache.get(draft_id)
+        # Copies keep callers from mutating the stored draft in place
+        return json.loads(json.dumps(draft)) if draft is not None else None
+
+    async def set(self, draft_id, draft):
+        self.cache.set(draft_id, json.loads(json.dumps(draft)))
+
+    async def delete(self, draft_id):
+        self.cache.pop(draft_id)
+
+
+class RedisDraftStore(DraftStore):
+    """Redis-compatible store (Redis, Valkey, KeyDB...) for drafts shared across workers."""
+
+    def __init__(self, url: str, ttl: float = DRAFT_TTL, prefix: str = "udyam:draft:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("DRAFT_STORE_URL requires the redis package (pip install redis).") from e
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, draft_id):
+        value = await self.client.get(self.prefix + draft_id)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, draft_id, draft):
+        await self.client.set(self.prefix + draft_id, json.dumps(draft), ex=self.ttl)
+
+    async def delete(self, draft_id):
+        await self.client.delete(self.prefix + draft_id)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def create_draft_store() -> DraftStore:
+    if DRAFT_STORE_URL:
+        return RedisDraftStore(DRAFT_STORE_URL)
+    return InMemoryDraftStore()
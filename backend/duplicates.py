@@ -0,0 +1,105 @@
+# duplicates.py (Duplicate Aadhaar/PAN Detection)
+#
+# adharno and pan are unique in udyam_registrations. Instead of discovering a
+# resubmission only when the INSERT fails, /submit consults an in-process Bloom
+# filter of every stored key: a negative answer is definitive, so known-new keys
+# go straight to the INSERT, and only possible duplicates pay for a lookup.
+import hashlib
+import math
+import os
+from typing import Iterable, Optional
+
+from sqlalchemy import or_, select
+
+from .database import UdyamRegistration
+
+# Expected number of registrations and acceptable false-positive rate
+DUPLICATE_FILTER_CAPACITY = int(os.getenv("DUPLICATE_FILTER_CAPACITY", "1000000"))
+DUPLICATE_FILTER_ERROR_RATE = float(os.getenv("DUPLICATE_FILTER_ERROR_RATE", "0.01"))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, using double hashing of one
+    blake2b digest to derive the bit positions.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class DuplicateFilter:
+    """
+    Tracks the Aadhaar numbers and PANs already registered. Until warm() has
+    loaded the table, every key is treated as possibly present.
+    """
+
+    def __init__(self, capacity: int = DUPLICATE_FILTER_CAPACITY, error_rate: float = DUPLICATE_FILTER_ERROR_RATE):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+
+    def add(self, adharno: str, pan: Optional[str] = None) -> None:
+        self.bloom.add("a:" + adharno)
+        if pan:
+            self.bloom.add("p:" + pan)
+
+    def add_rows(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.add(row["adharno"], row.get("pan"))
+
+    def might_exist(self, adharno: str, pan: Optional[str] = None) -> bool:
+        if not self.ready:
+            return True
+        return ("a:" + adharno) in self.bloom or (bool(pan) and ("p:" + pan) in self.bloom)
+
+    async def warm(self, session_factory, batch_size: int = 10000) -> int:
+        """Loads every stored key; returns the number of registrations seen."""
+        loaded = 0
+        async with session_factory() as db:
+            result = await db.stream(
+                select(UdyamRegistration.adharno, UdyamRegistration.pan).execution_options(yield_per=batch_size)
+            )
+            async for adharno, pan in result:
+                self.add(adharno, pan)
+                loaded += 1
+        self.ready = True
+        return loaded
+
+
+async def find_duplicate(db, duplicate_filter: DuplicateFilter, adharno: str, pan: Optional[str]) -> Optional[str]:
+    """
+    Returns an error message if the Aadhaar number or PAN is already
+    registered. The database is only queried when the filter cannot rule the
+    keys out.
+    """
+    if not duplicate_filter.might_exist(adharno, pan):
+        return None
+    conditions = [UdyamRegistration.adharno == adharno]
+    if pan:
+        conditions.append(UdyamRegistration.pan == pan)
+    existing = (await db.execute(
+        select(UdyamRegistration.adharno, UdyamRegistration.pan).where(or_(*conditions)).limit(1)
+    )).first()
+    if existing is None:
+        return None
+    if existing.adharno == adharno:
+        return "A registration with this Aadhaar number already exists."
+    return "A registration with this PAN already exists."
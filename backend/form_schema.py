@@ -0,0 +1,203 @@
+# form_schema.py (Validation Rules Compiled from the Scraped Form)
+#
+# webScrapping.py records the pattern, maxlength and minlength of every input
+# and the options of every dropdown on the live Udyam form. This module
+# compiles that JSON once into per-field rules (precompiled regexes, length
+# bounds, option sets) keyed by the API field names. The step models apply the
+# rules on top of their own constraints, GET /form-schema exports them for the
+# frontend, and the compiled rules are swapped when the file changes, so rule
+# changes are picked up without a redeploy. A file that cannot be loaded
+# (malformed, or caught halfway through a rewrite) is logged and the last
+# good rules stay in force.
+#
+#   python -m backend.form_schema udyam_form_step1_2.json --output form_rules.json
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FORM_SCHEMA_FILE = os.getenv(
+    "FORM_SCHEMA_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "udyam_form_step1_2.json")
+)
+# Seconds between checks of the file's modification time (0 disables reloading)
+FORM_SCHEMA_RELOAD_INTERVAL = float(os.getenv("FORM_SCHEMA_RELOAD_INTERVAL", "30"))
+
+# Scraped control id (the part after the last "$" of the ASP.NET name, lower-cased) -> API field
+FIELD_MAP = {
+    "txtadharno": "adharno",
+    "txtownername": "ownername",
+    "txtpan": "pan",
+    "txtpanname": "panName",
+    "txtdob": "dob",
+}
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    field: str
+    max_length: Optional[int] = None
+    min_length: Optional[int] = None
+    pattern: Optional[re.Pattern] = None
+    options: Optional[frozenset] = None
+
+    def check(self, value: str) -> Optional[str]:
+        """Returns an error message if `value` breaks the rule."""
+        if self.max_length is not None and len(value) > self.max_length:
+            return f"{self.field} must be at most {self.max_length} characters."
+        if self.min_length is not None and len(value) < self.min_length:
+            return f"{self.field} must be at least {self.min_length} characters."
+        if self.pattern is not None and not self.pattern.fullmatch(value):
+            return f"{self.field} does not match the required format."
+        if self.options is not None and value not in self.options:
+            return f"{self.field} must be one of the listed options."
+        return None
+
+    def export(self) -> dict:
+        return {
+            "maxLength": self.max_length,
+            "minLength": self.min_length,
+            "pattern": self.pattern.pattern if self.pattern is not None else None,
+            "options": sorted(self.options) if self.options is not None else None,
+        }
+
+
+class CompiledFormSchema:
+    def __init__(self, rules: dict, version: str):
+        self.rules = rules
+        self.version = version
+
+    def check(self, field: str, value: str) -> Optional[str]:
+        rule = self.rules.get(field)
+        return rule.check(value) if rule is not None else None
+
+    def export(self) -> dict:
+        return {"version": self.version, "fields": {field: rule.export() for field, rule in self.rules.items()}}
+
+
+EMPTY_SCHEMA = CompiledFormSchema({}, "none")
+
+
+def _length(value) -> Optional[int]:
+    try:
+        length = int(value)
+    except (TypeError, ValueError):
+        return None
+    return length if length >= 0 else None
+
+
+def scraped_steps(raw) -> list:
+    """
+    The step dicts ({"inputs", "labels", "dropdowns", "buttons"}) of any
+    scraper output: a single step, {step: data}, {page: {step: data}}, or an
+    incremental snapshot.
+    """
+    if "steps" in raw and "version" in raw:
+        return [entry["data"] for steps in raw["steps"].values() for entry in steps.values()]
+    if "inputs" in raw or "dropdowns" in raw:
+        return [raw]
+    return [step for value in raw.values() if isinstance(value, dict) for step in scraped_steps(value)]
+
+
+def compile_schema(raw, version: str = "") -> CompiledFormSchema:
+    """Compiles scraped form JSON into rules for the fields in FIELD_MAP; later steps win."""
+    rules = {}
+    for step in scraped_steps(raw):
+        for element in step.get("inputs", []) + step.get("dropdowns", []):
+            control = (element.get("name") or element.get("id") or "").split("$")[-1].lower()
+            field = FIELD_MAP.get(control)
+            if field is None:
+                continue
+            pattern = None
+            if element.get("pattern"):
+                try:
+                    pattern = re.compile(element["pattern"])
+                except re.error:
+                    logger.warning("Ignoring pattern of %s that is not a valid regex: %s", field, element["pattern"])
+            options = element.get("options")
+            rules[field] = FieldRule(
+                field,
+                max_length=_length(element.get("maxlength")),
+                min_length=_length(element.get("minlength")),
+                pattern=pattern,
+                options=frozenset(options) if options else None,
+            )
+    return CompiledFormSchema(rules, version)
+
+
+def load_form_schema(path: str = FORM_SCHEMA_FILE) -> CompiledFormSchema:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return EMPTY_SCHEMA
+    return compile_schema(json.loads(raw), hashlib.blake2b(raw, digest_size=8).hexdigest())
+
+
+class FormSchemaStore:
+    """
+    Holds the compiled schema of one file. current() is called per validated
+    field, so it only stats the file once per `reload_interval` seconds and
+    recompiles when the modification time has changed.
+    """
+
+    def __init__(self, path: str = FORM_SCHEMA_FILE, reload_interval: float = FORM_SCHEMA_RELOAD_INTERVAL,
+                 clock=time.monotonic):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self._schema = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _mtime_of_file(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> CompiledFormSchema:
+        schema = self._schema
+        if schema is not None and (not self.reload_interval or self.clock() - self._checked_at < self.reload_interval):
+            return schema
+        self._checked_at = self.clock()
+        mtime = self._mtime_of_file()
+        if schema is None or mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                self._schema = load_form_schema(self.path)
+            except Exception:
+                # Tried again once the file changes
+                logger.exception("Could not load the form schema from %s; keeping the previous rules", self.path)
+                if self._schema is None:
+                    self._schema = EMPTY_SCHEMA
+        return self._schema
+
+
+form_schema = FormSchemaStore()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile scraped form JSON into field validation rules.")
+    parser.add_argument("path", nargs="?", default=FORM_SCHEMA_FILE, help="Scraper output or snapshot JSON")
+    parser.add_argument("--output", help="Write the compiled rules here instead of stdout")
+    args = parser.parse_args(argv)
+
+    exported = json.dumps(load_form_schema(args.path).export(), ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(exported + "\n")
+    else:
+        print(exported)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+# idempotency.py (Idempotency-Key Support for POST Retries)
+#
+# Clients retrying a POST (typically /submit on a flaky mobile connection)
+# send the same Idempotency-Key header with every attempt. The first
+# completed response for a key is stored and replayed to later attempts
+# without running validation or touching the database. The first attempt
+# claims its key in the store with an in-flight marker (SET NX on Redis), so
+# attempts arriving at any worker while it is still running wait for its
+# response instead of repeating the work, and get 409 if it takes longer
+# than IDEMPOTENCY_WAIT seconds. Keys are scoped to the client that sent them (its
+# credentials, or else its address and user agent), so one client cannot
+# replay another's response, and request bodies are capped, since they are
+# buffered to be fingerprinted.
+import base64
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Optional
+
+from .cache import SingleFlight, TTLCache
+
+# redis://host:6379/0 to share stored responses between workers; in-memory otherwise
+IDEMPOTENCY_STORE_URL = os.getenv("IDEMPOTENCY_STORE_URL")
+# Seconds a stored response is replayed for, and the most responses kept per process
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Seconds a claim on a key outlives a worker that died while running its request
+IDEMPOTENCY_LOCK_TTL = float(os.getenv("IDEMPOTENCY_LOCK_TTL", "60"))
+# Seconds a retry waits for an attempt still running elsewhere before it gets 409, and how often it looks
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "10"))
+IDEMPOTENCY_POLL_INTERVAL = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", "0.05"))
+# Largest request body (bytes) accepted with an Idempotency-Key; larger ones get 413
+IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+# Status of the marker a claimed key holds until its response is stored
+IN_FLIGHT = 0
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: tuple
+    body: bytes
+    route: Optional[str] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status == IN_FLIGHT
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers],
+            "body": base64.b64encode(self.body).decode("ascii"),
+            "route": self.route,
+        })
+
+    @classmethod
+    def from_json(cls, value) -> "StoredResponse":
+        data = json.loads(value)
+        return cls(
+            data["fingerprint"],
+            data["status"],
+            tuple((name.encode("latin-1"), value.encode("latin-1")) for name, value in data["headers"]),
+            base64.b64decode(data["body"]),
+            data.get("route"),
+        )
+
+
+def in_flight_marker(fingerprint: str) -> StoredResponse:
+    """What a claimed key holds until its response is stored; the body is the claim's token."""
+    return StoredResponse(fingerprint, IN_FLIGHT, (), uuid.uuid4().hex.encode())
+
+
+class IdempotencyStore(ABC):
+    """
+    Interface for stored responses, keyed by request path, client and
+    Idempotency-Key. get() returns the in-flight marker of a claimed key
+    until its response is set.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, response: StoredResponse) -> None:
+        ...
+
+    @abstractmethod
+    async def claim(self, key: str, marker: StoredResponse, lease: float) -> bool:
+        """Atomically stores `marker` for `lease` seconds unless the key holds anything; True if it did."""
+        ...
+
+    @abstractmethod
+    async def release(self, key: str, marker: StoredResponse) -> None:
+        """Removes `marker` if the key still holds it, so the next attempt runs again."""
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store with LRU eviction and TTL expiry."""
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_ENTRIES, ttl: float = IDEMPOTENCY_TTL, clock=time.monotonic):
+        self.cache = TTLCache(maxsize, ttl, clock)
+
+    async def get(self, key):
+        return self.cache.get(key)
+
+    async def set(self, key, response):
+        self.cache.set(key, response)
+
+    async def claim(self, key, marker, lease):
+        if key in self.cache:
+            return False
+        self.cache.set(key, marker, ttl=lease)
+        return True
+
+    async def release(self, key, marker):
+        if self.cache.get(key) == marker:
+            self.cache.pop(key)
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Redis-compatible store, so a retry landing on another worker is replayed too."""
+
+    # Deletes the key only while it holds the caller's marker
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str, ttl: float = IDEMPOTENCY_TTL, prefix: str = "udyam:idempotency:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("IDEMPOTENCY_STORE_URL requires the redis package (pip install redis).") from e
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key):
+        value = await self.client.get(self.prefix + key)
+        return StoredResponse.from_json(value) if value is not None else None
+
+    async def set(self, key, response):
+        await self.client.set(self.prefix + key, response.to_json(), ex=self.ttl)
+
+    async def claim(self, key, marker, lease):
+        return bool(await self.client.set(self.prefix + key, marker.to_json(), nx=True, px=int(lease * 1000)))
+
+    async def release(self, key, marker):
+        await self.client.eval(self.RELEASE_SCRIPT, 1, self.prefix + key, marker.to_json())
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    if IDEMPOTENCY_STORE_URL:
+        return RedisIdempotencyStore(IDEMPOTENCY_STORE_URL)
+    return InMemoryIdempotencyStore()
+
+
+def client_identity(scope, headers: dict) -> str:
+    """
+    Who sent the request: its Authorization header when it has one, otherwise
+    its address and user agent. Hashed, so stored keys reveal neither.
+    """
+    credentials = headers.get(b"authorization")
+    if credentials is not None:
+        parts = (b"authorization", credentials)
+    else:
+        host = (scope.get("client") or ("",))[0] or ""
+        parts = (b"address", host.encode("latin-1"), headers.get(b"user-agent", b""))
+    return hashlib.blake2b(b"\0".join(parts), digest_size=16).hexdigest()
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def _error(status: int, detail: str, fingerprint: str = "") -> StoredResponse:
+    return StoredResponse(fingerprint, status, ((b"content-type", b"application/json"),), json.dumps({"detail": detail}).encode())
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware applying Idempotency-Key to POST requests. Responses
+    below 500 are stored; server errors are not, so a retry runs again.
+    Reusing a key with a different body is answered with 422, and a key whose
+    first attempt is still running after `wait` seconds with 409.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, max_body: int = IDEMPOTENCY_MAX_BODY_BYTES,
+                 lease: float = IDEMPOTENCY_LOCK_TTL, wait: float = IDEMPOTENCY_WAIT,
+                 poll_interval: float = IDEMPOTENCY_POLL_INTERVAL):
+        self.app = app
+        self.store = store
+        self.max_body = max_body
+        self.lease = lease
+        self.wait = wait
+        self.poll_interval = poll_interval
+        # Coalesces attempts within this process; the store's claim covers the other workers
+        self.in_flight = SingleFlight()
+
+    async def __call__(self, scope, receive, send):
+        idempotency_key = headers = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            headers = dict(scope["headers"])
+            idempotency_key = headers.get(HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            await self._send(send, _error(400, f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters."))
+            return
+
+        try:
+            body = await self._read_body(receive, headers, self.max_body)
+        except BodyTooLarge:
+            await self._send(send, _error(413, f"Request bodies with an Idempotency-Key are limited to {self.max_body} bytes."))
+            return
+        fingerprint = hashlib.blake2b(body, digest_size=16).hexdigest()
+        key = f"{scope['path']}:{client_identity(scope, headers)}:{idempotency_key.decode('latin-1')}"
+        stored = await self.store.get(key)
+        replayed = stored is not None and not stored.in_flight
+        if not replayed:
+            outcome = {}
+            stored, source = await self.in_flight.do(
+                key, lambda: self._claim_and_run(scope, receive, body, fingerprint, key, outcome)
+            )
+            # Every caller but the one whose call ran gets a replay, as does any caller of a response stored elsewhere
+            replayed = source == "stored" or (source == "ran" and not outcome)
+        if stored.fingerprint != fingerprint:
+            await self._send(send, _error(422, "Idempotency-Key was already used with a different request body."))
+            return
+        if replayed and stored.route is not None and "route" not in scope:
+            # Lets the metrics middleware label the replay with the original route
+            scope["route"] = SimpleNamespace(path=stored.route)
+        await self._send(send, stored, replayed)
+
+    @staticmethod
+    async def _read_body(receive, headers: dict, limit: int) -> bytes:
+        """The whole request body; BodyTooLarge as soon as it is known to exceed `limit` bytes."""
+        declared = headers.get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            raise BodyTooLarge
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                raise BodyTooLarge
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _claim_and_run(self, scope, receive, body, fingerprint, key, outcome) -> tuple:
+        """
+        (response, source): the response of the request, run once this worker
+        holds the key's claim ("ran"), the response another worker stored
+        meanwhile ("stored"), or a 409 once `wait` seconds have passed ("busy").
+        """
+        outcome["called"] = True
+        deadline = time.monotonic() + self.wait
+        while True:
+            marker = in_flight_marker(fingerprint)
+            if await self.store.claim(key, marker, self.lease):
+                return await self._run(scope, receive, body, key, marker), "ran"
+            stored = await self.store.get(key)
+            if stored is not None and (not stored.in_flight or stored.fingerprint != fingerprint):
+                return stored, "stored"
+            if time.monotonic() >= deadline:
+                return _error(409, "A request with this Idempotency-Key is still in progress.", fingerprint), "busy"
+            # Still running elsewhere, or released after a server error and free to claim again
+            await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, scope, receive, body, key, marker) -> StoredResponse:
+        body_sent = False
+        start, chunks = {}, []
+
+        async def receive_body():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await self.store.release(key, marker)
+            raise
+        route = getattr(scope.get("route"), "path", None)
+        response = StoredResponse(marker.fingerprint, start["status"], tuple(start.get("headers", ())), b"".join(chunks), route)
+        if response.status < 500:
+            await self.store.set(key, response)
+        else:
+            await self.store.release(key, marker)
+        return response
+
+    @staticmethod
+    async def _send(send, response: StoredResponse, replayed: bool = False) -> None:
+        headers = list(response.headers)
+        if replayed:
+            headers.append((REPLAYED_HEADER, b"true"))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,307 @@
+# importer.py (Streaming Bulk Import of Registrations)
+#
+# Backfills udyam_registrations from legacy CSV or NDJSON exports:
+#
+#   python -m backend.importer registrations.csv --workers 4 --rejects rejected.ndjson
+#   python -m backend.importer registrations.ndjson --database-url postgresql://...
+#
+# Rows flow through a generator pipeline (read -> chunk -> validate in a
+# process pool -> load), with a bounded number of chunks in flight, so memory
+# use stays constant regardless of the file size. Valid rows are loaded with
+# COPY on PostgreSQL and chunked executemany elsewhere (SQLite); rejected rows
+# are streamed to an NDJSON side file with their errors and their original
+# input line, so they can be fixed and loaded again:
+#
+#   jq -r .input registrations.ndjson.rejected.ndjson > fixed.ndjson
+#
+# The tables are checked and created as at API startup (database.create_tables),
+# and the registration summaries (analytics.py) are rebuilt once the load is done.
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from pydantic import ValidationError
+
+from .schemas import UdyamFormRequest, registration_row
+
+# Columns loaded into udyam_registrations, in COPY order
+COLUMNS = (
+    "adharno", "ownername", "organization_type", "pan", "pan_name", "dob", "aadhaarDeclaration",
+    "hasPan", "dobType", "panDeclaration", "hasGstin", "totalTurnoverA", "totalTurnoverB",
+)
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    loaded: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"read {self.read} rows, loaded {self.loaded}, rejected {self.rejected} "
+            f"in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+# --- Pipeline Stages ---
+def _captured(lines: Iterable[str], captured: list) -> Iterator[str]:
+    for line in lines:
+        captured.append(line)
+        yield line
+
+
+def read_records(path: str, fmt: str) -> Iterator[tuple]:
+    """
+    Yields (line_number, record, text) triples, text being the record's
+    original line(s). A record is a dict, or an error message string for
+    lines that cannot be parsed at all.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            captured = []
+            reader = csv.DictReader(_captured(f, captured))
+            if reader.fieldnames is None:
+                return
+            captured.clear()  # The header
+            for record in reader:
+                text = "".join(captured).strip("\r\n")
+                captured.clear()
+                # Empty CSV cells mean "not provided"
+                yield reader.line_num, {key: (value if value != "" else None) for key, value in record.items()}, text
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                text = line.rstrip("\r\n")
+                try:
+                    yield line_number, json.loads(line), text
+                except json.JSONDecodeError as e:
+                    yield line_number, f"Invalid JSON: {e}", text
+
+
+def reject(line_number: int, record, text: str, errors: list) -> dict:
+    """A rejects file entry: the input as it was read, and why it was not loaded."""
+    return {"line": line_number, "input": text, "record": record if isinstance(record, dict) else None, "errors": errors}
+
+
+def chunked(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(chunk: list) -> tuple:
+    """
+    Validates a chunk of read_records() triples. Runs in worker processes, so
+    it only depends on the request models. Returns (rows, rejects), each row
+    as (line_number, table row, (record, text)).
+    """
+    rows, rejects = [], []
+    for line_number, record, text in chunk:
+        if isinstance(record, str):
+            rejects.append(reject(line_number, record, text, [{"msg": record}]))
+            continue
+        try:
+            rows.append((line_number, registration_row(UdyamFormRequest.model_validate(record)), (record, text)))
+        except ValidationError as e:
+            rejects.append(reject(
+                line_number, record, text, e.errors(include_url=False, include_context=False, include_input=False),
+            ))
+    return rows, rejects
+
+
+def validated_chunks(chunks: Iterator[list], workers: int) -> Iterator[tuple]:
+    """
+    Validates chunks in a process pool, in order, keeping at most two chunks per
+    worker in flight so the reader never runs ahead of the loader.
+    """
+    if workers <= 1:
+        yield from map(validate_chunk, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(validate_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# --- Loaders ---
+def _copy_value(value) -> str:
+    """Encodes a value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class ExecutemanyLoader:
+    """Loads each chunk with one executemany INSERT in its own transaction."""
+
+    def __init__(self, engine):
+        from sqlalchemy import insert
+        from .database import UdyamRegistration
+
+        self.engine = engine
+        self.statement = insert(UdyamRegistration.__table__)
+
+    def load(self, rows: list) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(self.statement, rows)
+
+
+class CopyLoader(ExecutemanyLoader):
+    """Loads each chunk with PostgreSQL COPY ... FROM STDIN (psycopg2)."""
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        columns = ", ".join(f'"{column}"' for column in COLUMNS)
+        self.copy_sql = f"COPY udyam_registrations ({columns}) FROM STDIN"
+
+    def load(self, rows: list) -> None:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row[column]) for column in COLUMNS))
+            buffer.write("\n")
+        buffer.seek(0)
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(self.copy_sql, buffer)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+
+def make_loader(engine):
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return CopyLoader(engine)
+    return ExecutemanyLoader(engine)
+
+
+def load_chunk(loader, engine, rows: list) -> list:
+    """
+    Loads a validated chunk. If the bulk load fails (e.g. a duplicate Aadhaar
+    or PAN), the chunk is retried row by row so only the offending rows are
+    rejected. Returns the rejects.
+    """
+    if not rows:
+        return []
+    try:
+        loader.load([row for _, row, _ in rows])
+        return []
+    except Exception:
+        pass
+
+    rejects = []
+    for line_number, row, (record, text) in rows:
+        try:
+            with engine.begin() as connection:
+                connection.execute(loader.statement, [row])
+        except Exception as e:
+            rejects.append(reject(line_number, record, text, [{"msg": f"Database error: {e.__class__.__name__}: {e}"}]))
+    return rejects
+
+
+def run_import(
+    path: str,
+    database_url: str,
+    fmt: Optional[str] = None,
+    workers: int = os.cpu_count() or 1,
+    chunk_size: int = 1000,
+    rejects_path: Optional[str] = None,
+) -> ImportReport:
+    from sqlalchemy import create_engine
+    from .analytics import refresh_summaries
+    from .database import create_tables, pool_options
+
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    rejects_path = rejects_path or f"{path}.rejected.ndjson"
+    engine = create_engine(database_url, **pool_options(database_url))
+    report = ImportReport()
+    started = time.perf_counter()
+    try:
+        # Refuses a table still in the pre-compact layout (see migrate_compact.py)
+        with engine.begin() as connection:
+            create_tables(connection)
+        loader = make_loader(engine)
+        with open(rejects_path, "w", encoding="utf-8") as rejects_file:
+            chunks = chunked(read_records(path, fmt), chunk_size)
+            for rows, rejects in validated_chunks(chunks, workers):
+                report.read += len(rows) + len(rejects)
+                load_rejects = load_chunk(loader, engine, rows)
+                report.loaded += len(rows) - len(load_rejects)
+                rejects += load_rejects
+                report.rejected += len(rejects)
+                for reject in rejects:
+                    rejects_file.write(json.dumps(reject, default=str) + "\n")
+        # The loaders bypass the per-insert summary deltas, so the summary is rebuilt once at the end
+        with engine.begin() as connection:
+            refresh_summaries(connection)
+    finally:
+        engine.dispose()
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stream a CSV or NDJSON export into udyam_registrations.")
+    parser.add_argument("path", help="CSV (with a header row) or NDJSON file of UdyamFormRequest records")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="Defaults to the file extension")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Validation processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per validation/load chunk")
+    parser.add_argument("--rejects", help="Rejected rows side file (default: <path>.rejected.ndjson)")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+
+    try:
+        report = run_import(
+            args.path,
+            args.database_url,
+            fmt=args.format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            rejects_path=args.rejects,
+        )
+    except RuntimeError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    print(report.summary(), file=sys.stderr)
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
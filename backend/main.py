@@ -1,15 +1,123 @@
 # main.py (FastAPI Backend)
-from fastapi import FastAPI, HTTPException, status
-from pydantic import BaseModel, Field, field_validator, FieldValidationInfo
-import re
-from typing import Optional, Annotated
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+import asyncio
 import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Boolean
-from sqlalchemy.orm import declarative_base, sessionmaker
+import json
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.dialects.postgresql import FLOAT
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from .analytics import fold_periodically, store_registrations, summary_report
+from . import database
+from .auth import require_admin
+from .database import (
+    Base,
+    close_db,
+    get_async_db,
+    init_db,
+    UdyamRegistration,
+)
+from .duplicates import DuplicateFilter, find_duplicate
+from .fast_json import FastJSONResponse, json_body, json_body_openapi
+from .form_schema import form_schema
+from .idempotency import IdempotencyMiddleware, create_idempotency_store
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    Gauge,
+    MetricsMiddleware,
+    record_validation_errors,
+    registry,
+    stage_duration_seconds,
+)
+from .pan_verification import PanVerificationError, create_pan_verifier
+from .pincodes import PINCODE_CACHE_MAX_AGE, get_pincode_index
+from .replicas import DATABASE_REPLICA_URLS, ReadYourWritesMiddleware, get_read_db, reads_own_writes, replica_router
+from .registrations import (
+    REGISTRATIONS_DEFAULT_LIMIT,
+    REGISTRATIONS_MAX_LIMIT,
+    decode_cursor,
+    export_ndjson,
+    fetch_page,
+    registration_query,
+)
+from .schemas import (
+    FORM_STEPS,
+    AadhaarDetails,
+    BusinessDetails,
+    PanDetails,
+    PanValidationRequest,
+    UdyamFormRequest,
+    registration_row,
+)
+from .drafts import create_draft_store, new_draft_id
+from .write_behind import WRITE_BEHIND, SubmissionQueue
+from .verhoeff import Verhoeff, verhoeff
+
+def __getattr__(name: str):
+    # main.engine, main.AsyncSessionLocal, ...: database.py creates them on first access
+    if name in database.ENGINE_NAMES:
+        return getattr(database, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = FastAPI()
+# Known Aadhaar numbers / PANs, warmed from the table in the background at startup
+duplicate_filter = DuplicateFilter()
+# PAN verification backend (mock unless PAN_VERIFIER_URL is set), cached and rate limited
+pan_verifier = create_pan_verifier()
+# Partially completed multi-step forms
+draft_store = create_draft_store()
+# Responses replayed to POST retries carrying the same Idempotency-Key
+idempotency_store = create_idempotency_store()
+# Local queue of accepted registrations, written to the database in the background (WRITE_BEHIND only)
+submission_queue = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global submission_queue
+    await init_db()
+    await replica_router.reset(close=False)
+    warm_task = asyncio.create_task(duplicate_filter.warm(database.AsyncSessionLocal))
+    fold_task = asyncio.create_task(fold_periodically(database.AsyncSessionLocal))
+    # Other workers read this one's counters from METRICS_MULTIPROCESS_DIR (multi-worker servers only)
+    metrics_task = asyncio.create_task(registry.sync_periodically()) if registry.directory else None
+    get_pincode_index()
+    form_schema.current()
+    flush_task = None
+    if WRITE_BEHIND:
+        submission_queue = SubmissionQueue(conflict_mode=SUBMIT_CONFLICT_MODE)
+        flush_task = asyncio.create_task(submission_queue.run(database.AsyncSessionLocal, duplicate_filter.add_rows))
+    yield
+    warm_task.cancel()
+    fold_task.cancel()
+    if metrics_task is not None:
+        # Its last snapshot keeps this worker's counts in the other workers' totals
+        metrics_task.cancel()
+        await asyncio.gather(metrics_task, return_exceptions=True)
+    if flush_task is not None:
+        submission_queue.stop()
+        await flush_task
+        await submission_queue.drain(database.AsyncSessionLocal, duplicate_filter.add_rows)
+        submission_queue.close()
+        submission_queue = None
+    await pan_verifier.aclose()
+    await draft_store.aclose()
+    await idempotency_store.aclose()
+    await replica_router.reset()
+    await close_db()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Innermost, so stored responses carry no per-origin CORS headers and replays are still counted in /metrics
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+
+# Clients that just wrote read from the primary until the replicas have caught up
+if DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 # CORS Middleware to allow communication with your frontend
 origins = [
@@ -25,243 +133,379 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Database Configuration ---
-DATABASE_URL = "postgre_uri"  # Replace with your actual PostgreSQL URI
-
-engine = create_engine(DATABASE_URL)
-Base = declarative_base()
-
-class UdyamRegistration(Base):
-    __tablename__ = "udyam_registrations"
-    id = Column(Integer, primary_key=True, index=True)
-    adharno = Column(String, unique=True, index=True)
-    ownername = Column(String)
-    organization_type = Column(String)
-    pan = Column(String, unique=True, nullable=True)
-    pan_name = Column(String, nullable=True)
-    dob = Column(String, nullable=True)
-    aadhaarDeclaration = Column(Boolean)
-    hasPan = Column(String)
-    dobType = Column(String, nullable=True)
-    panDeclaration = Column(Boolean, nullable=True)
-    hasGstin = Column(String, nullable=True)
-    totalTurnoverA = Column(FLOAT, nullable=True)
-    totalTurnoverB = Column(FLOAT, nullable=True)
-
-Base.metadata.create_all(bind=engine)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# --- Verhoeff Algorithm for Aadhaar Checksum ---
-class Verhoeff:
-    __mul = [
-        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
-        [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
-        [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
-        [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
-        [4, 0, 1, 2, 3, 9, 5, 6, 7, 8],
-        [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
-        [6, 5, 9, 8, 7, 1, 0, 4, 3, 2],
-        [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
-        [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
-        [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]
-    ]
-    __per = [
-        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
-        [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
-        [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
-        [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
-        [9, 4, 5, 3, 1, 2, 6, 8, 7, 0],
-        [4, 2, 8, 7, 6, 5, 9, 3, 0, 1],
-        [2, 7, 9, 3, 8, 0, 1, 5, 4, 6],
-        [7, 0, 4, 6, 9, 1, 3, 2, 5, 8]
-    ]
-    __inv = [0, 4, 3, 2, 1, 5, 6, 7, 8, 9]
-
-    def validate(self, num_str):
-        c = 0
-        for i, item in enumerate(reversed(num_str)):
-            c = self.__mul[c][self.__per[i % 8][int(item)]]
-        return c == 0
-
-    def generate(self, num_str):
-        c = 0
-        for i, item in enumerate(reversed(num_str)):
-            c = self.__mul[c][self.__per[(i + 1) % 8][int(item)]]
-        return self.__inv[c]
-
-# Pydantic Model for PAN Validation Request
-class PanValidationRequest(BaseModel):
-    pan: str
-    panName: str
-    dob: str
-    dobType: str
-
-    @field_validator('pan')
-    @classmethod
-    def validate_pan_format(cls, v: str) -> str:
-        if not re.fullmatch(r'^[A-Z]{5}\d{4}[A-Z]{1}$', v):
-            raise ValueError('Invalid PAN format (e.g., ABCDE1234F).')
-        return v
-
-    @field_validator('dob')
-    @classmethod
-    def validate_dob_format(cls, v: str) -> str:
-        if not re.fullmatch(r'^\d{2}\/\d{2}\/\d{4}$', v):
-            raise ValueError('Date format is DD/MM/YYYY.')
-        try:
-            day, month, year = map(int, v.split('/'))
-            input_date = datetime.date(year, month, day)
-            today = datetime.date.today()
-            if input_date > today:
-                raise ValueError('Date cannot be in the future.')
-        except ValueError:
-            raise ValueError('Invalid date provided.')
-        return v
-
-# --- Pydantic Model for Final Submission Request Body ---
-class UdyamFormRequest(BaseModel):
-    adharno: str = Field(..., min_length=12, max_length=12, description="Aadhaar number")
-    ownername: str = Field(..., min_length=1, max_length=100, description="Name of Entrepreneur")
-    aadhaarDeclaration: bool = Field(..., description="Aadhaar declaration consent")
-    organizationType: str = Field(..., description="Type of Organisation")
-    hasPan: str = Field(..., description="Does the organization have PAN?")
-    pan: Optional[str] = Field(None, min_length=10, max_length=10, description="PAN number")
-    panName: Optional[str] = Field(None, min_length=1, max_length=100, description="Name of PAN Holder")
-    dob: Optional[str] = Field(None, description="Date of Birth or Incorporation (DD/MM/YYYY)")
-    dobType: Optional[str] = Field(None, description="Type of Date (DOB/DOI)")
-    panDeclaration: Optional[bool] = Field(None, description="PAN declaration consent")
-    hasGstin: Optional[str] = Field(None, description="Does the organization have GSTIN?")
-    totalTurnoverA: Optional[float] = Field(None, description="Total Turnover (A)")
-    totalTurnoverB: Optional[float] = Field(None, description="Total Turnover (B)")
-
-    @field_validator('adharno')
-    @classmethod
-    def validate_adharno(cls, v: str, info: FieldValidationInfo) -> str:
-        if not re.fullmatch(r'^\d{12}$', v):
-            raise ValueError('Aadhaar must be 12 digits and contain only numbers.')
-        if not Verhoeff().validate(v):
-            raise ValueError('Invalid Aadhaar number (checksum failed).')
-        if v.startswith('0') or v.startswith('1'):
-            raise ValueError('Aadhaar number cannot start with 0 or 1.')
-        return v
-
-    @field_validator('organizationType')
-    @classmethod
-    def validate_organization_type(cls, v: str) -> str:
-        if v == '0':
-            raise ValueError('Please select a valid type of organisation.')
-        return v
-
-    @field_validator('pan')
-    @classmethod
-    def validate_pan(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
-        non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
-        is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
-        has_pan_field = info.data.get('hasPan')
-
-        if is_pan_required:
-            if has_pan_field == 'no':
-                raise ValueError('PAN is mandatory for this type of organization. Please select "Yes".')
-            if has_pan_field == 'yes':
-                if not v:
-                    raise ValueError('PAN number is required.')
-                if not re.fullmatch(r'^[A-Z]{5}\d{4}[A-Z]{1}$', v):
-                    raise ValueError('Invalid PAN format (e.g., ABCDE1234F).')
-        return v
-
-    @field_validator('panName')
-    @classmethod
-    def validate_pan_name(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
-        non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
-        is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
-        has_pan_field = info.data.get('hasPan')
-
-        if is_pan_required and has_pan_field == 'yes':
-            if not v:
-                raise ValueError('Name of PAN Holder is required.')
-        return v
-
-    @field_validator('dob')
-    @classmethod
-    def validate_dob(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
-        non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
-        is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
-        has_pan_field = info.data.get('hasPan')
-
-        if is_pan_required and has_pan_field == 'yes':
-            if not v:
-                raise ValueError('DOB or DOI is required.')
-            if not re.fullmatch(r'^\d{2}\/\d{2}\/\d{4}$', v):
-                raise ValueError('Date format is DD/MM/YYYY.')
-            
+# Request counts and latencies for /metrics
+app.add_middleware(MetricsMiddleware)
+registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the async pool.",
+    lambda: database.async_engine.sync_engine.pool.checkedout(),
+))
+registry.register(Gauge(
+    "db_replicas_healthy", "Read replicas currently receiving reads.",
+    lambda: replica_router.healthy(),
+))
+registry.register(Gauge(
+    "write_behind_queue_depth", "Accepted registrations not yet written to the database.",
+    lambda: submission_queue.depth(),
+))
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_errors(request: Request, exc: RequestValidationError):
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    record_validation_errors(route, exc.errors())
+    return await request_validation_exception_handler(request, exc)
+
+# --- Bulk Registration Settings ---
+# Rows per multi-row INSERT statement, and the largest batch accepted per request
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+BATCH_MAX_RECORDS = int(os.getenv("BATCH_MAX_RECORDS", "10000"))
+
+# What to do when a submitted Aadhaar number already exists:
+# "reject" answers 409 Conflict, "upsert" updates the stored registration
+SUBMIT_CONFLICT_MODE = os.getenv("SUBMIT_CONFLICT_MODE", "reject")
+DUPLICATE_MESSAGE = "A registration with this Aadhaar number or PAN already exists."
+
+def parse_batch_body(body: bytes, content_type: str) -> tuple[list, list]:
+    """
+    Splits a batch request body into records. Accepts a JSON array, or NDJSON
+    (one object per line) when the content type is application/x-ndjson.
+    Returns (records, errors) where each record is (index, payload); lines that
+    are not valid JSON are reported as errors instead of failing the batch.
+    """
+    records, errors = [], []
+    if "ndjson" in content_type:
+        for index, line in enumerate(line for line in body.splitlines() if line.strip()):
             try:
-                day, month, year = map(int, v.split('/'))
-                input_date = datetime.date(year, month, day)
-                today = datetime.date.today()
-                if input_date > today:
-                    raise ValueError('Date cannot be in the future.')
-            except ValueError:
-                raise ValueError('Invalid date provided.')
-        return v
-
-    @field_validator('panDeclaration')
-    @classmethod
-    def validate_pan_declaration(cls, v: Optional[bool], info: FieldValidationInfo) -> Optional[bool]:
-        non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
-        is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
-        has_pan_field = info.data.get('hasPan')
-
-        if is_pan_required and has_pan_field == 'yes':
-            if not v:
-                raise ValueError('You must agree to the PAN declaration.')
-        return v
-
-    @field_validator('hasGstin')
-    @classmethod
-    def validate_gstin_conditional(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
-        if v == 'no' and info.data.get('totalTurnoverA') is not None and info.data['totalTurnoverA'] > 4000000:
-            raise ValueError('GSTIN is mandatory if turnover exceeds ₹40 Lakhs.')
-        return v
+                records.append((index, json.loads(line)))
+            except json.JSONDecodeError as e:
+                errors.append({"index": index, "errors": [{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {e}"}]})
+        return records, errors
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of registrations.")
+    return list(enumerate(payload)), errors
 
 # --- API Endpoints ---
-@app.post("/validate-pan")
-async def validate_pan_endpoint(pan_data: PanValidationRequest):
+@app.get("/metrics")
+async def metrics():
     """
-    Validates PAN details (PAN, name, DOB) against mock data.
-    In a real-world scenario, this would involve a government API call.
+    Request, validation and database metrics in the Prometheus text format.
     """
-    # Simulate a successful PAN validation
-    # A real implementation would call an external service
-    return {"isValid": True, "message": "PAN details are valid."}
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
 
-@app.post("/submit")
-async def submit_udyam_form(form_data: UdyamFormRequest):
+@app.post("/validate-pan", openapi_extra=json_body_openapi(PanValidationRequest))
+async def validate_pan_endpoint(pan_data: PanValidationRequest = Depends(json_body(PanValidationRequest))):
     """
-    Receives and validates Udyam registration form data.
+    Validates PAN details (PAN, name, DOB) with the configured verification
+    service. Results are cached and identical concurrent lookups share one call.
     """
     try:
-        db = SessionLocal()
-        new_registration = UdyamRegistration(
-            adharno=form_data.adharno,
-            ownername=form_data.ownername,
-            organization_type=form_data.organizationType,
-            pan=form_data.pan,
-            pan_name=form_data.panName,
-            dob=form_data.dob,
-            aadhaarDeclaration=form_data.aadhaarDeclaration,
-            hasPan=form_data.hasPan,
-            dobType=form_data.dobType,
-            panDeclaration=form_data.panDeclaration,
-            hasGstin=form_data.hasGstin,
-            totalTurnoverA=form_data.totalTurnoverA,
-            totalTurnoverB=form_data.totalTurnoverB
-        )
-        db.add(new_registration)
-        db.commit()
-        db.refresh(new_registration)
-        return {"message": "Form submitted successfully!", "id": new_registration.id}
+        result = await pan_verifier.verify(pan_data.pan, pan_data.panName, pan_data.dob, pan_data.dobType)
+    except PanVerificationError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return FastJSONResponse({"isValid": result.is_valid, "message": result.message})
+
+@app.get("/pincodes/{pincode}")
+async def lookup_pincode(pincode: str, request: Request, response: Response):
+    """
+    Returns the city and state for a 6-digit pincode from the bundled pincode
+    index. Lookups are cacheable; a matching If-None-Match is answered with 304.
+    """
+    index = get_pincode_index()
+    place = index.lookup(pincode)
+    if place is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown pincode.")
+    headers = {"ETag": index.etag(pincode), "Cache-Control": f"public, max-age={PINCODE_CACHE_MAX_AGE}"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    city, state = place
+    return {"pincode": pincode, "city": city, "state": state}
+
+@app.get("/form-schema")
+async def get_form_schema(request: Request, response: Response):
+    """
+    Field rules (patterns, lengths, options) compiled from the scraped form,
+    for the frontend to validate with the same rules as the backend. Clients
+    revalidate with If-None-Match and get 304 until the rules change.
+    """
+    schema = form_schema.current()
+    headers = {"ETag": f'"{schema.version}"', "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return schema.export()
+
+async def store_registration(form_data: UdyamFormRequest, db: AsyncSession) -> dict:
+    """
+    Inserts a validated registration. Resubmissions of a registered Aadhaar
+    number or PAN are answered with 409.
+    """
+    row = registration_row(form_data)
+    if SUBMIT_CONFLICT_MODE != "upsert":
+        with stage_duration_seconds.time("duplicate_check"):
+            duplicate = await find_duplicate(db, duplicate_filter, row["adharno"], row["pan"])
+        if duplicate:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=duplicate)
+    try:
+        with stage_duration_seconds.time("insert"):
+            registration_id = (await store_registrations(db, [row], SUBMIT_CONFLICT_MODE)).get(row["adharno"])
+        with stage_duration_seconds.time("commit"):
+            await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=DUPLICATE_MESSAGE)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {e}")
-    finally:
-        db.close()
\ No newline at end of file
+    if registration_id is None:
+        # Lost a race with a concurrent submission (or another worker) of the same keys
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=DUPLICATE_MESSAGE)
+    duplicate_filter.add(row["adharno"], row["pan"])
+    return {"message": "Form submitted successfully!", "id": registration_id}
+
+async def queue_registration(form_data: UdyamFormRequest) -> FastJSONResponse:
+    """
+    Write-behind mode: appends the registration to the local queue and
+    answers 202 with a ticket for GET /submissions/{ticket}.
+    """
+    with stage_duration_seconds.time("enqueue"):
+        queued = await submission_queue.enqueue(form_data)
+    return FastJSONResponse(
+        {"message": "Form accepted and queued for registration.", **queued}, status_code=status.HTTP_202_ACCEPTED
+    )
+
+async def get_submit_db():
+    """The request's session, or None in write-behind mode, where no connection is needed."""
+    if submission_queue is not None:
+        yield None
+        return
+    async for session in get_async_db():
+        yield session
+
+@app.post("/submit", openapi_extra=json_body_openapi(UdyamFormRequest))
+async def submit_udyam_form(form_data: UdyamFormRequest = Depends(json_body(UdyamFormRequest)),
+                            db: Optional[AsyncSession] = Depends(get_submit_db)):
+    """
+    Receives and validates Udyam registration form data.
+    """
+    if db is None:
+        return await queue_registration(form_data)
+    return FastJSONResponse(await store_registration(form_data, db))
+
+@app.get("/submissions/{ticket}")
+async def get_submission(ticket: str):
+    """
+    Outcome of a registration accepted in write-behind mode: queued or
+    flushing, then stored (with its id), rejected as a duplicate, or failed
+    after every retry.
+    """
+    found = submission_queue.status(ticket) if submission_queue is not None else None
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown submission ticket.")
+    return found
+
+@app.post("/submit/batch")
+async def submit_udyam_form_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Receives many Udyam registrations at once (JSON array or NDJSON).
+    Every record is validated independently; valid rows are written with one
+    multi-row INSERT ... RETURNING per chunk and invalid ones are reported by index.
+    Rows whose Aadhaar number or PAN is already registered are reported as duplicates.
+    """
+    try:
+        records, errors = parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if len(records) + len(errors) > BATCH_MAX_RECORDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {BATCH_MAX_RECORDS} registrations.",
+        )
+
+    valid_rows = []
+    for index, record in records:
+        try:
+            form_data = UdyamFormRequest.model_validate(record)
+        except ValidationError as e:
+            record_errors = e.errors(include_url=False, include_context=False, include_input=False)
+            record_validation_errors("/submit/batch", record_errors)
+            errors.append({"index": index, "errors": record_errors})
+            continue
+        valid_rows.append((index, registration_row(form_data)))
+
+    results = []
+    for start in range(0, len(valid_rows), BATCH_CHUNK_SIZE):
+        chunk = valid_rows[start:start + BATCH_CHUNK_SIZE]
+        try:
+            ids_by_adharno = await store_registrations(db, [row for _, row in chunk], SUBMIT_CONFLICT_MODE)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            errors.extend(
+                {"index": index, "errors": [{"type": "database_error", "loc": [], "msg": f"Database error: {e}"}]}
+                for index, _ in chunk
+            )
+            continue
+        for index, row in chunk:
+            # Each returned id is claimed once, so a repeated Aadhaar number within the batch is a duplicate too
+            registration_id = ids_by_adharno.pop(row["adharno"], None)
+            if registration_id is None:
+                errors.append({"index": index, "errors": [{"type": "duplicate", "loc": [], "msg": DUPLICATE_MESSAGE}]})
+                continue
+            duplicate_filter.add(row["adharno"], row["pan"])
+            results.append({"index": index, "id": registration_id})
+
+    errors.sort(key=lambda error: error["index"])
+    return {"inserted": len(results), "failed": len(errors), "results": results, "errors": errors}
+
+# --- Registration Search API ---
+class RegistrationFilters:
+    """Query parameters shared by the list and export endpoints."""
+
+    def __init__(
+        self,
+        organizationType: Optional[str] = Query(None, pattern=r"^\d{1,2}$"),
+        hasGstin: Optional[Literal["yes", "no"]] = None,
+        minTurnover: Optional[float] = Query(None, ge=0),
+        maxTurnover: Optional[float] = Query(None, ge=0),
+        panPrefix: Optional[str] = Query(None, pattern=r"^[A-Za-z0-9]{1,10}$"),
+        adharnoPrefix: Optional[str] = Query(None, pattern=r"^\d{1,12}$"),
+        registeredFrom: Optional[datetime.date] = None,
+        registeredTo: Optional[datetime.date] = None,
+        cursor: Optional[str] = None,
+    ):
+        try:
+            after_id = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        self.statement = registration_query(
+            organization_type=organizationType,
+            has_gstin=hasGstin,
+            min_turnover=minTurnover,
+            max_turnover=maxTurnover,
+            pan_prefix=panPrefix.upper() if panPrefix else None,
+            adharno_prefix=adharnoPrefix,
+            registered_from=registeredFrom,
+            registered_to=registeredTo,
+            after_id=after_id,
+        )
+
+@app.get("/registrations", dependencies=[Depends(require_admin)])
+async def list_registrations(
+    filters: RegistrationFilters = Depends(),
+    limit: int = Query(REGISTRATIONS_DEFAULT_LIMIT, ge=1, le=REGISTRATIONS_MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Lists registrations in id order, filtered by organization type, GSTIN,
+    turnover (A) range, PAN/Aadhaar prefix and registration date (YYYY-MM-DD). Pass the returned nextCursor
+    as `cursor` to fetch the following page; it is null on the last page.
+    """
+    return await fetch_page(db, filters.statement, limit)
+
+@app.get("/registrations/export", dependencies=[Depends(require_admin)])
+async def export_registrations(request: Request, filters: RegistrationFilters = Depends()):
+    """
+    Streams every matching registration as NDJSON (one JSON object per line),
+    with the same filters as GET /registrations.
+    """
+    primary = reads_own_writes(request)
+    return StreamingResponse(
+        export_ndjson(filters.statement, lambda: replica_router.session(primary=primary)),
+        media_type="application/x-ndjson",
+    )
+
+# --- Analytics API ---
+@app.get("/analytics/summary", dependencies=[Depends(require_admin)])
+async def get_analytics_summary(
+    groupBy: list[Literal["organizationType", "hasGstin", "sizeClass"]] = Query([]),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Registration counts and turnover (A) sum/mean/min/max, grouped by any of
+    organizationType, hasGstin and sizeClass (micro/small/medium/large by
+    turnover). Read from the precomputed summary table, never the registrations.
+    """
+    return {"groupBy": groupBy, "groups": await summary_report(db, list(dict.fromkeys(groupBy)))}
+
+# --- Draft API (multi-step form) ---
+async def load_draft(draft_id: str) -> dict:
+    draft = await draft_store.get(draft_id)
+    if draft is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found or expired.")
+    return draft
+
+def draft_response(draft_id: str, draft: dict) -> dict:
+    return {"draftId": draft_id, "completedSteps": [step for step in FORM_STEPS if step in draft["steps"]]}
+
+async def save_draft_step(draft_id: str, step: str, step_data) -> dict:
+    draft = await load_draft(draft_id)
+    draft["steps"][step] = step_data.model_dump()
+    await draft_store.set(draft_id, draft)
+    return draft_response(draft_id, draft)
+
+@app.post("/drafts", status_code=status.HTTP_201_CREATED)
+async def create_draft():
+    """
+    Starts a draft registration. Steps are saved (and validated) one at a
+    time with PATCH /drafts/{draftId}/{step}, then committed with
+    POST /drafts/{draftId}/submit.
+    """
+    draft_id = new_draft_id()
+    draft = {"steps": {}}
+    await draft_store.set(draft_id, draft)
+    return draft_response(draft_id, draft)
+
+@app.get("/drafts/{draft_id}")
+async def get_draft(draft_id: str):
+    draft = await load_draft(draft_id)
+    data = {}
+    for step_data in draft["steps"].values():
+        data.update(step_data)
+    return {**draft_response(draft_id, draft), "data": data}
+
+@app.patch("/drafts/{draft_id}/aadhaar")
+async def save_aadhaar_step(draft_id: str, step_data: AadhaarDetails):
+    return await save_draft_step(draft_id, "aadhaar", step_data)
+
+@app.patch("/drafts/{draft_id}/pan")
+async def save_pan_step(draft_id: str, step_data: PanDetails):
+    return await save_draft_step(draft_id, "pan", step_data)
+
+@app.patch("/drafts/{draft_id}/business")
+async def save_business_step(draft_id: str, step_data: BusinessDetails):
+    return await save_draft_step(draft_id, "business", step_data)
+
+@app.post("/drafts/{draft_id}/submit")
+async def submit_draft(draft_id: str, db: Optional[AsyncSession] = Depends(get_submit_db)):
+    """
+    Commits a completed draft. The combined steps are validated again as a
+    whole, since the stored data may predate a rule change (or the draft
+    store may be shared with other writers); failures are answered with 422.
+    """
+    draft = await load_draft(draft_id)
+    missing = [step for step in FORM_STEPS if step not in draft["steps"]]
+    if missing:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Draft is missing steps: {', '.join(missing)}.",
+        )
+    data = {}
+    for step_data in draft["steps"].values():
+        data.update(step_data)
+    try:
+        form_data = UdyamFormRequest.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    if db is None:
+        result = await queue_registration(form_data)
+    else:
+        result = FastJSONResponse(await store_registration(form_data, db))
+    await draft_store.delete(draft_id)
+    return result
@@ -0,0 +1,268 @@
+# metrics.py (Request Metrics in the Prometheus Text Format)
+#
+# A deliberately small metrics registry: counters and histograms are plain
+# dicts of per-label-set values updated from the event loop, so recording a
+# sample costs a dict lookup and a bisect. GET /metrics renders everything in
+# the Prometheus text exposition format.
+#
+# Each worker process has its own registry. With METRICS_MULTIPROCESS_DIR set
+# (backend.server sets it when it starts more than one worker), every worker
+# writes a snapshot of its counters and histograms there each
+# METRICS_SYNC_INTERVAL seconds, and whichever worker answers /metrics adds
+# up all the snapshots. Files of workers that have exited are kept, so
+# counters never go backwards; gauges are read from the answering worker.
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directory shared by the workers of one server for their metric snapshots
+METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR")
+# Seconds between a worker's snapshots, i.e. how stale other workers' numbers may be
+METRICS_SYNC_INTERVAL = float(os.getenv("METRICS_SYNC_INTERVAL", "1"))
+
+# Latency buckets in seconds, from sub-millisecond validation to slow commits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    @staticmethod
+    def merge(values: dict, labelvalues: tuple, value) -> None:
+        values[labelvalues] = values.get(labelvalues, 0) + value
+
+    def render(self, values: Optional[dict] = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in (self.values if values is None else values).items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    """A value read from a callback when the metrics are rendered."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> list:
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {_number(value)}"]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        series = self.values.get(labelvalues)
+        if series is None:
+            series = self.values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labelvalues) -> _Timer:
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labelvalues)
+
+    @staticmethod
+    def merge(values: dict, labelvalues: tuple, series: list) -> None:
+        total = values.get(labelvalues)
+        values[labelvalues] = list(series) if total is None else [a + b for a, b in zip(total, series)]
+
+    def render(self, values: Optional[dict] = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in (self.values if values is None else values).items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labelvalues, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {series[-1]!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    The metrics of this process. With a `directory`, render() adds up the
+    snapshots every worker sharing it has written there (see write_snapshot).
+    """
+
+    def __init__(self, directory: Optional[str] = None, worker_id: Optional[str] = None):
+        self.metrics = []
+        self.directory = directory
+        self.worker_id = worker_id or str(os.getpid())
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def _shared(self) -> list:
+        return [metric for metric in self.metrics if isinstance(metric, (Counter, Histogram))]
+
+    def write_snapshot(self) -> None:
+        """Replaces this worker's snapshot file with its current counters and histograms."""
+        snapshot = {metric.name: [[list(labelvalues), value] for labelvalues, value in metric.values.items()]
+                    for metric in self._shared()}
+        path = os.path.join(self.directory, f"worker-{self.worker_id}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(f"{path}.tmp", path)
+
+    def merged_values(self) -> dict:
+        """{metric name: values} added up over every snapshot in the directory."""
+        shared = {metric.name: metric for metric in self._shared()}
+        merged = {name: {} for name in shared}
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, series in snapshot.items():
+                if name in shared:
+                    for labelvalues, value in series:
+                        shared[name].merge(merged[name], tuple(labelvalues), value)
+        return merged
+
+    def render(self) -> str:
+        merged = {}
+        if self.directory:
+            self.write_snapshot()
+            merged = self.merged_values()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(merged[metric.name]) if metric.name in merged else metric.render())
+        return "\n".join(lines) + "\n"
+
+    async def sync_periodically(self, interval: float = METRICS_SYNC_INTERVAL) -> None:
+        """Background task: writes this worker's snapshot every `interval` seconds, and once more when cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except OSError:
+                    logger.exception("Writing the metrics snapshot failed")
+        finally:
+            self.write_snapshot()
+
+
+registry = Registry(METRICS_MULTIPROCESS_DIR)
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route and status code.", ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route.", ("method", "route")
+))
+validation_failures_total = registry.register(Counter(
+    "validation_failures_total", "Rejected request fields by route and field.", ("route", "field")
+))
+db_pool_checkout_seconds = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a connection from the async pool."
+))
+stage_duration_seconds = registry.register(Histogram(
+    "stage_duration_seconds",
+    "Time spent in each stage of a registration (validation, verhoeff, duplicate_check, insert, commit).",
+    ("stage",),
+))
+
+
+def record_validation_errors(route: str, errors: Iterable[dict]) -> None:
+    """Counts pydantic errors by field (the string parts of `loc`, without the leading "body")."""
+    for error in errors:
+        loc = [part for part in error.get("loc", ()) if isinstance(part, str)]
+        if loc and loc[0] == "body":
+            loc = loc[1:]
+        validation_failures_total.inc(route, ".".join(loc) or "body")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count and latency of every HTTP request,
+    labelled with the matched route template (not the raw path) to keep the
+    number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, route)
+            http_requests_total.inc(method, route, status_code)
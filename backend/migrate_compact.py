@@ -0,0 +1,190 @@
+# migrate_compact.py (Migration of udyam_registrations to Compact Column Types)
+#
+# Tables created before the compact layout store dob as DD/MM/YYYY text,
+# hasPan/hasGstin as 'yes'/'no', organization_type as text and turnover as
+# double precision. This converts such a table in place, in one transaction:
+#
+#   python -m backend.migrate_compact --check   # only report rows that cannot be converted
+#   python -m backend.migrate_compact           # convert ($DATABASE_URL or --database-url)
+#
+# PostgreSQL converts with one ALTER TABLE ... USING (a single table rewrite
+# that keeps indexes and constraints, under an exclusive lock for its
+# duration); SQLite, which cannot change column types, rebuilds the table
+# inside one BEGIN IMMEDIATE ... COMMIT.
+# Both drop the redundant index on the primary key.
+# Existing rows get the migration date as registered_on. Any value without a
+# compact equivalent (a date that does not parse, a turnover the numeric
+# column cannot hold) aborts the migration, leaving the table untouched:
+# --check lists the rows to fix first.
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+import math
+
+from sqlalchemy import Boolean, Column, Index, Integer, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.dialects.postgresql import FLOAT
+from sqlalchemy.schema import CreateTable
+
+from .database import UdyamRegistration, create_tables, needs_compact_migration
+from .dates import parse_date
+from .schemas import TURNOVER_MAX, YES_NO
+
+TABLE = UdyamRegistration.__tablename__
+REBUILD_TABLE = TABLE + "__compact"
+
+POSTGRES_CONVERSION = (f"""
+ALTER TABLE {TABLE}
+    ALTER COLUMN organization_type TYPE smallint USING organization_type::smallint,
+    ALTER COLUMN dob TYPE date USING to_date(NULLIF(dob, ''), 'DD/MM/YYYY'),
+    ALTER COLUMN "hasPan" TYPE boolean USING "hasPan" = 'yes',
+    ALTER COLUMN "hasGstin" TYPE boolean USING "hasGstin" = 'yes',
+    ALTER COLUMN "totalTurnoverA" TYPE numeric(15, 2),
+    ALTER COLUMN "totalTurnoverB" TYPE numeric(15, 2),
+    ADD COLUMN registered_on date NOT NULL DEFAULT CURRENT_DATE
+""", "DROP INDEX IF EXISTS ix_udyam_registrations_id")
+
+# registered_on is left to its column default
+SQLITE_COPY = f"""
+INSERT INTO {REBUILD_TABLE} (
+    id, adharno, ownername, organization_type, pan, pan_name, dob, "aadhaarDeclaration",
+    "hasPan", "dobType", "panDeclaration", "hasGstin", "totalTurnoverA", "totalTurnoverB"
+)
+SELECT
+    id, adharno, ownername, CAST(organization_type AS INTEGER), pan, pan_name,
+    CASE WHEN dob IS NULL OR dob = '' THEN NULL
+         ELSE substr(dob, 7, 4) || '-' || substr(dob, 4, 2) || '-' || substr(dob, 1, 2) END,
+    "aadhaarDeclaration", "hasPan" = 'yes', "dobType", "panDeclaration", "hasGstin" = 'yes',
+    ROUND("totalTurnoverA", 2), ROUND("totalTurnoverB", 2)
+FROM {TABLE}
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+def legacy_table(metadata: Optional[MetaData] = None) -> Table:
+    """The pre-compact layout of udyam_registrations, for tests and the storage benchmark."""
+    return Table(
+        TABLE, metadata if metadata is not None else MetaData(),
+        Column("id", Integer, primary_key=True, index=True),
+        Column("adharno", String, unique=True, index=True),
+        Column("ownername", String),
+        Column("organization_type", String),
+        Column("pan", String, unique=True, nullable=True),
+        Column("pan_name", String, nullable=True),
+        Column("dob", String, nullable=True),
+        Column("aadhaarDeclaration", Boolean),
+        Column("hasPan", String),
+        Column("dobType", String, nullable=True),
+        Column("panDeclaration", Boolean, nullable=True),
+        Column("hasGstin", String, nullable=True),
+        Column("totalTurnoverA", FLOAT, nullable=True),
+        Column("totalTurnoverB", FLOAT, nullable=True),
+        Index("ix_udyam_registrations_organization_type_id", "organization_type", "id"),
+        Index("ix_udyam_registrations_hasGstin_id", "hasGstin", "id"),
+        Index("ix_udyam_registrations_totalTurnoverA", "totalTurnoverA"),
+    )
+
+
+def find_unconvertible(connection, batch_size: int = 10000) -> dict:
+    """{column: [ids]} of legacy rows whose value has no compact equivalent."""
+    legacy = legacy_table()
+    found = {"organization_type": [], "hasPan": [], "hasGstin": [], "dob": [], "totalTurnoverA": [], "totalTurnoverB": []}
+    rows = connection.execution_options(yield_per=batch_size).execute(select(
+        legacy.c.id, legacy.c.organization_type, legacy.c.hasPan, legacy.c.hasGstin, legacy.c.dob,
+        legacy.c.totalTurnoverA, legacy.c.totalTurnoverB,
+    ))
+    for id_, organization_type, has_pan, has_gstin, dob, turnover_a, turnover_b in rows:
+        if organization_type is not None and not (organization_type.isdigit() and int(organization_type) < 2 ** 15):
+            found["organization_type"].append(id_)
+        if has_pan is not None and has_pan not in YES_NO:
+            found["hasPan"].append(id_)
+        if has_gstin is not None and has_gstin not in YES_NO:
+            found["hasGstin"].append(id_)
+        if dob and parse_date(dob)[1] is not None:
+            found["dob"].append(id_)
+        for column, turnover in (("totalTurnoverA", turnover_a), ("totalTurnoverB", turnover_b)):
+            if turnover is not None and not (math.isfinite(turnover) and 0 <= round(turnover, 2) <= TURNOVER_MAX):
+                found[column].append(id_)
+    return found
+
+
+def begin_immediate(connection) -> None:
+    """
+    Opens the SQLite transaction explicitly, taking the write lock up front.
+    pysqlite only begins one before INSERT/UPDATE/DELETE, so the check, the
+    CREATE TABLE and the DROP TABLE of a rebuild would otherwise each commit
+    on their own, and a rebuild dying partway could leave the table half
+    migrated.
+    """
+    driver_connection = connection.connection.driver_connection
+    if not driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def migrate(connection) -> dict:
+    """Converts a legacy table in the connection's transaction; returns what was done."""
+    if not needs_compact_migration(connection):
+        return {"migrated": False}
+    started = time.perf_counter()
+    if connection.dialect.name == "sqlite":
+        begin_immediate(connection)
+    unconvertible = find_unconvertible(connection)
+    blocking = {column: ids for column, ids in unconvertible.items() if ids}
+    if blocking:
+        details = "; ".join(f"{column}: ids {ids[:20]}" for column, ids in blocking.items())
+        raise MigrationError(f"Rows with values that cannot be converted (fix them and run again): {details}")
+
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_CONVERSION:
+            connection.execute(text(statement))
+    elif connection.dialect.name == "sqlite":
+        # The table is recreated under a temporary name and its indexes only
+        # after the rename, since SQLite index names are database-wide
+        connection.execute(text(f"DROP TABLE IF EXISTS {REBUILD_TABLE}"))
+        connection.execute(CreateTable(UdyamRegistration.__table__.to_metadata(MetaData(), name=REBUILD_TABLE)))
+        connection.execute(text(SQLITE_COPY))
+        connection.execute(text(f"DROP TABLE {TABLE}"))
+        connection.execute(text(f"ALTER TABLE {REBUILD_TABLE} RENAME TO {TABLE}"))
+    else:
+        raise MigrationError(f"No compact migration for {connection.dialect.name}.")
+    create_tables(connection)
+    return {
+        "migrated": True,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert udyam_registrations to the compact column types.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL")
+    parser.add_argument("--check", action="store_true", help="Only report rows that cannot be converted")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+
+    engine = create_engine(args.database_url)
+    try:
+        with engine.begin() as connection:
+            if not needs_compact_migration(connection):
+                print("udyam_registrations already uses the compact layout (or does not exist).")
+                return 0
+            if args.check:
+                for column, ids in find_unconvertible(connection).items():
+                    print(f"{column}: {len(ids)} unconvertible" + (f" (ids {ids[:20]})" if ids else ""))
+                return 0
+            print(migrate(connection))
+    except MigrationError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# mock_pan_server.py (Local Mock of the PAN Verification API)
+#
+# Stands in for the external government API so PAN verification latency and
+# cache hit rates can be tested offline:
+#
+#   MOCK_PAN_LATENCY_MS=150 uvicorn backend.mock_pan_server:app --port 8001
+#   PAN_VERIFIER_URL=http://localhost:8001 uvicorn backend.main:app
+import asyncio
+import os
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+MOCK_PAN_LATENCY_MS = float(os.getenv("MOCK_PAN_LATENCY_MS", "100"))
+# PANs the mock reports as not matching its records
+MOCK_INVALID_PANS = frozenset(filter(None, os.getenv("MOCK_INVALID_PANS", "AAAAA0000A").split(",")))
+
+app = FastAPI()
+app.state.latency_ms = MOCK_PAN_LATENCY_MS
+app.state.calls = 0
+
+
+class VerifyRequest(BaseModel):
+    pan: str
+    panName: str
+    dob: str
+    dobType: str
+
+
+@app.post("/verify")
+async def verify(request: VerifyRequest):
+    app.state.calls += 1
+    await asyncio.sleep(app.state.latency_ms / 1000)
+    if request.pan in MOCK_INVALID_PANS:
+        return {"isValid": False, "message": "PAN details do not match the records."}
+    return {"isValid": True, "message": "PAN details are valid."}
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": app.state.calls, "latencyMs": app.state.latency_ms}
@@ -0,0 +1,166 @@
+# pan_verification.py (PAN Verification Service)
+#
+# /validate-pan delegates to a PanVerifier. The default MockPanVerifier keeps
+# the previous behaviour (every well-formed request is valid); setting
+# PAN_VERIFIER_URL switches to HttpPanVerifier, which calls an external
+# verification API (or the local mock server in mock_pan_server.py) over a
+# pooled async HTTP client. Either backend is wrapped in CachingPanVerifier:
+#   - TTL + LRU cache keyed on (pan, panName, dob, dobType)
+#   - concurrent identical lookups coalesced into one upstream call
+#   - token-bucket rate limit on upstream calls
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .cache import SingleFlight, TTLCache
+
+PAN_VERIFIER_URL = os.getenv("PAN_VERIFIER_URL")
+PAN_VERIFIER_TIMEOUT = float(os.getenv("PAN_VERIFIER_TIMEOUT", "5"))
+PAN_VERIFIER_MAX_CONNECTIONS = int(os.getenv("PAN_VERIFIER_MAX_CONNECTIONS", "20"))
+PAN_CACHE_SIZE = int(os.getenv("PAN_CACHE_SIZE", "10000"))
+PAN_CACHE_TTL = float(os.getenv("PAN_CACHE_TTL", "3600"))
+# Upstream calls per second, burst size, and how long a request may wait for a token
+PAN_RATE_LIMIT = float(os.getenv("PAN_RATE_LIMIT", "10"))
+PAN_RATE_BURST = int(os.getenv("PAN_RATE_BURST", "20"))
+PAN_RATE_MAX_WAIT = float(os.getenv("PAN_RATE_MAX_WAIT", "2"))
+
+
+class PanVerificationError(Exception):
+    """The verification backend is unavailable, rate limited or misbehaving."""
+
+
+@dataclass(frozen=True)
+class PanVerificationResult:
+    is_valid: bool
+    message: str
+
+
+class TokenBucket:
+    """Token-bucket rate limiter for a single event loop."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Takes a token if one is available; otherwise returns the seconds until one will be."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self, max_wait: float) -> None:
+        deadline = self.clock() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return
+            if self.clock() + wait > deadline:
+                raise PanVerificationError("PAN verification is rate limited, please retry shortly.")
+            await asyncio.sleep(wait)
+
+
+class PanVerifier(ABC):
+    """Interface for PAN verification backends."""
+
+    @abstractmethod
+    async def verify(self, pan: str, pan_name: str, dob: str, dob_type: str) -> PanVerificationResult:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MockPanVerifier(PanVerifier):
+    """Accepts every (already format-validated) request."""
+
+    async def verify(self, pan, pan_name, dob, dob_type):
+        return PanVerificationResult(True, "PAN details are valid.")
+
+
+class HttpPanVerifier(PanVerifier):
+    """
+    Calls POST {base_url}/verify with {pan, panName, dob, dobType} and expects
+    {"isValid": bool, "message": str} back. Connections are pooled and kept alive.
+    """
+
+    def __init__(self, base_url: str, timeout: float = PAN_VERIFIER_TIMEOUT,
+                 max_connections: int = PAN_VERIFIER_MAX_CONNECTIONS, transport=None):
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def verify(self, pan, pan_name, dob, dob_type):
+        try:
+            response = await self.client.post(
+                "/verify", json={"pan": pan, "panName": pan_name, "dob": dob, "dobType": dob_type}
+            )
+            response.raise_for_status()
+            body = response.json()
+        except (self._httpx.HTTPError, ValueError) as e:
+            raise PanVerificationError(f"PAN verification service unavailable: {e}") from e
+        if not isinstance(body, dict) or not isinstance(body.get("isValid"), bool):
+            raise PanVerificationError("PAN verification service returned an unexpected response.")
+        return PanVerificationResult(body["isValid"], str(body.get("message", "")))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class CachingPanVerifier(PanVerifier):
+    """Adds caching, request coalescing and rate limiting in front of a backend."""
+
+    def __init__(self, backend: PanVerifier, cache: Optional[TTLCache] = None,
+                 limiter: Optional[TokenBucket] = None, max_wait: float = PAN_RATE_MAX_WAIT):
+        self.backend = backend
+        self.cache = cache if cache is not None else TTLCache(PAN_CACHE_SIZE, PAN_CACHE_TTL)
+        self.limiter = limiter
+        self.max_wait = max_wait
+        self.in_flight = SingleFlight()
+        self.upstream_calls = 0
+
+    async def verify(self, pan, pan_name, dob, dob_type):
+        key = (pan, pan_name, dob, dob_type)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        return await self.in_flight.do(key, lambda: self._fetch(key))
+
+    async def _fetch(self, key):
+        if self.limiter is not None:
+            await self.limiter.acquire(self.max_wait)
+        self.upstream_calls += 1
+        result = await self.backend.verify(*key)
+        self.cache.set(key, result)
+        return result
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+def create_pan_verifier() -> PanVerifier:
+    """Builds the verifier configured by the PAN_* environment variables."""
+    if PAN_VERIFIER_URL:
+        return CachingPanVerifier(
+            HttpPanVerifier(PAN_VERIFIER_URL),
+            limiter=TokenBucket(PAN_RATE_LIMIT, PAN_RATE_BURST),
+        )
+    return CachingPanVerifier(MockPanVerifier())
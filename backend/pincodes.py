@@ -0,0 +1,148 @@
+# pincodes.py (Pincode -> City/State Lookup)
+#
+# The lookup table is loaded once from a bundled CSV (pincode,city,state) into
+# a sorted array of pincodes plus a parallel array of indexes into a small list
+# of distinct (city, state) pairs, and searched with bisect. Thousands of
+# pincodes share a few hundred places, so this stays far smaller than a
+# dict-of-dicts keyed on pincode.
+#
+# The bundled file is only a sample of head post offices, so most pincodes
+# miss. Convert the All India Pincode Directory (data.gov.in, CSV) once and
+# point PINCODE_DATA_FILE at the result, or overwrite the bundled file:
+#
+#   python -m backend.pincodes convert all_india_pincode_directory.csv --output pincodes.csv
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "pincodes.csv")
+PINCODE_DATA_FILE = os.getenv("PINCODE_DATA_FILE", BUNDLED_DATA_FILE)
+# How long browsers may reuse a lookup before revalidating it
+PINCODE_CACHE_MAX_AGE = int(os.getenv("PINCODE_CACHE_MAX_AGE", "86400"))
+
+
+class PincodeIndex:
+    """Immutable pincode -> (city, state) index over sorted parallel arrays."""
+
+    def __init__(self, pincodes: array, place_ids: array, places: list, version: str):
+        self.pincodes = pincodes
+        self.place_ids = place_ids
+        self.places = places
+        # Identifies the data set; part of every ETag so a new data file invalidates cached lookups
+        self.version = version
+
+    @classmethod
+    def from_rows(cls, rows, version: str = "") -> "PincodeIndex":
+        """Builds the index from (pincode, city, state) rows; later rows win on repeated pincodes."""
+        place_ids_by_place = {}
+        by_pincode = {}
+        for pincode, city, state in rows:
+            place = (city.strip(), state.strip())
+            by_pincode[int(pincode)] = place_ids_by_place.setdefault(place, len(place_ids_by_place))
+        ordered = sorted(by_pincode.items())
+        pincodes = array("I", (pincode for pincode, _ in ordered))
+        place_ids = array("H" if len(place_ids_by_place) <= 0xFFFF else "I", (place_id for _, place_id in ordered))
+        return cls(pincodes, place_ids, list(place_ids_by_place), version)
+
+    @classmethod
+    def load(cls, path: str = PINCODE_DATA_FILE) -> "PincodeIndex":
+        with open(path, "rb") as f:
+            raw = f.read()
+        reader = csv.reader(raw.decode("utf-8").splitlines())
+        next(reader, None)  # Header
+        rows = (row for row in reader if row)
+        return cls.from_rows(rows, hashlib.blake2b(raw, digest_size=8).hexdigest())
+
+    def lookup(self, pincode: str) -> Optional[tuple[str, str]]:
+        if len(pincode) != 6 or not pincode.isdigit():
+            return None
+        key = int(pincode)
+        position = bisect_left(self.pincodes, key)
+        if position == len(self.pincodes) or self.pincodes[position] != key:
+            return None
+        return self.places[self.place_ids[position]]
+
+    def etag(self, pincode: str) -> str:
+        return f'"{self.version}-{pincode}"'
+
+    def __len__(self) -> int:
+        return len(self.pincodes)
+
+
+@lru_cache(maxsize=1)
+def get_pincode_index() -> PincodeIndex:
+    """The process-wide index, loaded on first use (the app preloads it at startup)."""
+    index = PincodeIndex.load()
+    if os.path.abspath(PINCODE_DATA_FILE) == BUNDLED_DATA_FILE:
+        logger.warning("Serving the bundled sample of %d pincodes; most lookups will miss until "
+                       "PINCODE_DATA_FILE points at a converted directory (python -m backend.pincodes convert).", len(index))
+    return index
+
+
+def _column(fieldnames: list, *candidates: str) -> str:
+    """The header among `fieldnames` matching one of `candidates`, ignoring case and spaces."""
+    normalized = {name.strip().lower().replace(" ", ""): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    raise ValueError(f"Pincode directory has no {candidates[0]} column (found: {', '.join(fieldnames)}).")
+
+
+def convert_directory(source: str, destination: str) -> int:
+    """
+    Writes the pincode,city,state file the index loads from an All India
+    Pincode Directory CSV (one row per post office; the city is the district).
+    A pincode served by several offices takes the first delivery office's
+    district. Returns the number of pincodes written.
+    """
+    places = {}
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        pincode_column = _column(fieldnames, "pincode")
+        district_column = _column(fieldnames, "district", "districtname")
+        state_column = _column(fieldnames, "statename", "state")
+        delivery_column = next(
+            (name for name in fieldnames if name.strip().lower() in ("delivery", "deliverystatus")), None
+        )
+        for row in reader:
+            pincode = (row[pincode_column] or "").strip()
+            if len(pincode) != 6 or not pincode.isdigit():
+                continue
+            delivers = delivery_column is None or (row[delivery_column] or "").strip().lower() == "delivery"
+            if pincode in places and (places[pincode][0] or not delivers):
+                continue
+            place = ((row[district_column] or "").strip().title(), (row[state_column] or "").strip().title())
+            places[pincode] = (delivers, place)
+
+    with open(f"{destination}.tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("pincode", "city", "state"))
+        writer.writerows((pincode, city, state) for pincode, (_, (city, state)) in sorted(places.items()))
+    os.replace(f"{destination}.tmp", destination)
+    return len(places)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert the All India Pincode Directory for the pincode lookup.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    convert = subcommands.add_parser("convert", help="Write pincode,city,state from a directory CSV")
+    convert.add_argument("source", help="All India Pincode Directory CSV")
+    convert.add_argument("--output", default=BUNDLED_DATA_FILE, help="Defaults to the bundled data file")
+    args = parser.parse_args(argv)
+    count = convert_directory(args.source, args.output)
+    print(f"{count} pincodes written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# registrations.py (Reading Registrations Back: Filters, Keyset Pagination, NDJSON Export)
+#
+# GET /registrations pages through the table in id order with an opaque
+# cursor (the last id of the previous page), so every page is an index range
+# scan no matter how deep it is, unlike OFFSET. GET /registrations/export
+# streams the same filtered rows as NDJSON, fetching EXPORT_BATCH_SIZE rows at
+# a time, so an export never holds the whole result in memory.
+import base64
+import binascii
+import datetime
+import json
+import os
+from typing import Optional
+
+from sqlalchemy import select
+
+from .database import UdyamRegistration
+from .schemas import YES_NO, registration_record
+
+REGISTRATIONS_DEFAULT_LIMIT = int(os.getenv("REGISTRATIONS_DEFAULT_LIMIT", "100"))
+REGISTRATIONS_MAX_LIMIT = int(os.getenv("REGISTRATIONS_MAX_LIMIT", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+registrations = UdyamRegistration.__table__
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """The last id of the previous page; raises ValueError for a cursor this API did not issue."""
+    try:
+        last_id = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor.")
+    if last_id < 0:
+        raise ValueError("Invalid cursor.")
+    return last_id
+
+
+def prefix_range(column, prefix: str):
+    """
+    column LIKE 'prefix%' written as a range, which any B-tree index on the
+    column can serve (LIKE cannot under SQLite's case-insensitive LIKE or a
+    non-C PostgreSQL collation). Prefixes are digits or upper-case letters.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (column >= prefix) & (column < upper)
+
+
+def registration_query(
+    organization_type: Optional[str] = None,
+    has_gstin: Optional[str] = None,
+    min_turnover: Optional[float] = None,
+    max_turnover: Optional[float] = None,
+    pan_prefix: Optional[str] = None,
+    adharno_prefix: Optional[str] = None,
+    registered_from: Optional[datetime.date] = None,
+    registered_to: Optional[datetime.date] = None,
+    after_id: Optional[int] = None,
+):
+    """
+    SELECT of the matching registrations in id order, starting after
+    `after_id`. Filters take the form's values ("5", "yes").
+    """
+    statement = select(registrations).order_by(registrations.c.id)
+    if organization_type is not None:
+        statement = statement.where(registrations.c.organization_type == int(organization_type))
+    if has_gstin is not None:
+        statement = statement.where(registrations.c.hasGstin == YES_NO[has_gstin])
+    if min_turnover is not None:
+        statement = statement.where(registrations.c.totalTurnoverA >= min_turnover)
+    if max_turnover is not None:
+        statement = statement.where(registrations.c.totalTurnoverA <= max_turnover)
+    if pan_prefix:
+        statement = statement.where(prefix_range(registrations.c.pan, pan_prefix))
+    if adharno_prefix:
+        statement = statement.where(prefix_range(registrations.c.adharno, adharno_prefix))
+    if registered_from is not None:
+        statement = statement.where(registrations.c.registered_on >= registered_from)
+    if registered_to is not None:
+        statement = statement.where(registrations.c.registered_on <= registered_to)
+    if after_id is not None:
+        statement = statement.where(registrations.c.id > after_id)
+    return statement
+
+
+async def fetch_page(db, statement, limit: int) -> dict:
+    """One page of `statement`, with the cursor of the next page (None on the last one)."""
+    rows = [registration_record(row._mapping) for row in (await db.execute(statement.limit(limit + 1))).all()]
+    next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+    return {"items": rows[:limit], "nextCursor": next_cursor}
+
+
+async def export_ndjson(statement, open_session, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yields the rows of `statement` as NDJSON, one chunk per batch. Opens its
+    own session with `open_session()`, which stays open for as long as the
+    response is streaming.
+    """
+    async with open_session() as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield "".join(json.dumps(registration_record(row._mapping)) + "\n" for row in partition)
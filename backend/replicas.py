@@ -0,0 +1,163 @@
+# replicas.py (Read Replica Routing)
+#
+# With DATABASE_REPLICA_URLS set, the read-only endpoints (registration
+# search and export, analytics) take their session from a replica, chosen
+# round-robin; writes, and every read inside a write, stay on the primary.
+# A replica that fails to connect is skipped for REPLICA_RETRY_AFTER seconds
+# and its reads fail over to the next one, then to the primary.
+#
+# Replicas lag behind the primary, so a client that has just written reads
+# from the primary for READ_YOUR_WRITES_WINDOW seconds: successful writes set
+# a short-lived cookie, which ReadYourWritesMiddleware adds and
+# get_read_db honours. The cookie holds a wall-clock deadline, so it works
+# whichever worker the next request lands on.
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from . import database
+from .database import pool_options, to_async_url
+from .metrics import db_pool_checkout_seconds
+
+# Read replicas, comma separated (same URL forms as DATABASE_URL)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Seconds a replica that failed to connect is left out before it is tried again
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", "30"))
+# Seconds after a successful write during which the same client reads from the primary
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+# Seconds to wait for a replica connection before failing over
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
+PRIMARY_COOKIE = "udyam_read_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        # Created on first use, like the primary's (see database.py)
+        self.engine = None
+        self._sessionmaker = None
+        # clock() value until which the replica is skipped
+        self.failed_until = 0.0
+
+    def open_session(self) -> AsyncSession:
+        if self._sessionmaker is None:
+            self.engine = create_async_engine(to_async_url(self.url), **pool_options(self.url))
+            self._sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        return self._sessionmaker()
+
+
+class ReplicaRouter:
+    """
+    Hands out sessions: the primary's when asked for, otherwise a healthy
+    replica's in round-robin order, falling back to the primary when none
+    can be reached.
+    """
+
+    def __init__(
+        self,
+        urls: list,
+        primary: Optional[Callable[[], AsyncSession]] = None,
+        retry_after: float = REPLICA_RETRY_AFTER,
+        connect_timeout: float = REPLICA_CONNECT_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        # database.AsyncSessionLocal unless given
+        self.primary = primary
+        self.retry_after = retry_after
+        self.connect_timeout = connect_timeout
+        self.clock = clock
+        self._turn = itertools.count()
+
+    def healthy(self) -> int:
+        now = self.clock()
+        return sum(replica.failed_until <= now for replica in self.replicas)
+
+    def candidates(self) -> list:
+        """Healthy replicas, starting with the next one in the rotation."""
+        if not self.replicas:
+            return []
+        start = next(self._turn) % len(self.replicas)
+        now = self.clock()
+        rotation = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in rotation if replica.failed_until <= now]
+
+    @asynccontextmanager
+    async def session(self, primary: bool = False):
+        """A session with its connection already checked out, on a replica unless `primary`."""
+        session = None
+        with db_pool_checkout_seconds.time():
+            for replica in [] if primary else self.candidates():
+                candidate = replica.open_session()
+                try:
+                    await asyncio.wait_for(candidate.connection(), self.connect_timeout)
+                except (DBAPIError, OSError, asyncio.TimeoutError):
+                    await candidate.close()
+                    replica.failed_until = self.clock() + self.retry_after
+                    continue
+                session = candidate
+                break
+            if session is None:
+                session = (self.primary or database.AsyncSessionLocal)()
+                try:
+                    await session.connection()
+                except BaseException:
+                    await session.close()
+                    raise
+        async with session:
+            yield session
+
+    async def reset(self, close: bool = True) -> None:
+        """Drops the replicas' pooled connections (close=False after a fork, as init_db does)."""
+        for replica in self.replicas:
+            if replica.engine is not None:
+                await replica.engine.dispose(close=close)
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+
+def reads_own_writes(request: Request, clock: Callable[[], float] = time.time) -> bool:
+    """True while the client's last write may not have reached the replicas yet."""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, "0")) > clock()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request):
+    """FastAPI dependency for read-only endpoints: a replica session, or the primary's after a recent write."""
+    async with replica_router.session(primary=reads_own_writes(request)) as session:
+        yield session
+
+
+class ReadYourWritesMiddleware:
+    """Marks clients whose write succeeded, so their reads go to the primary for a while."""
+
+    def __init__(self, app, window: float = READ_YOUR_WRITES_WINDOW, clock: Callable[[], float] = time.time):
+        self.app = app
+        self.window = window
+        self.clock = clock
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def mark(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                deadline = self.clock() + self.window
+                cookie = f"{PRIMARY_COOKIE}={deadline:.3f}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message.get("headers", ()), (b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, mark)
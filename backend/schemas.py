@@ -0,0 +1,260 @@
+# schemas.py (Pydantic Request Models and Validation Rules)
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator, FieldValidationInfo
+from pydantic_core import InitErrorDetails, PydanticCustomError
+import re
+from typing import Optional
+import datetime
+from .dates import date_error, parse_date
+from .form_schema import form_schema
+from .metrics import stage_duration_seconds
+from .verhoeff import verhoeff
+
+# --- Validation Rules ---
+# Organisation types (dropdown values) for which PAN details are mandatory
+NON_PROPRIETARY_ORG_TYPES = frozenset({'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'})
+# Every organisation type of the dropdown ('1' is Proprietary); stored as a small integer
+ORGANIZATION_TYPES = NON_PROPRIETARY_ORG_TYPES | {'1'}
+# Answers of the yes/no radio buttons, stored as booleans
+YES_NO = {'yes': True, 'no': False}
+AADHAAR_PATTERN = re.compile(r'^\d{12}$')
+PAN_PATTERN = re.compile(r'^[A-Z]{5}\d{4}[A-Z]{1}$')
+# GSTIN becomes mandatory above ₹40 Lakhs turnover
+GSTIN_TURNOVER_LIMIT = 4000000
+# Largest turnover the numeric(15, 2) columns hold
+TURNOVER_MAX = 9_999_999_999_999.99
+
+# Pydantic Model for PAN Validation Request
+class PanValidationRequest(BaseModel):
+    pan: str
+    panName: str
+    dob: str
+    dobType: str
+
+    @field_validator('pan')
+    @classmethod
+    def validate_pan_format(cls, v: str) -> str:
+        if not PAN_PATTERN.fullmatch(v):
+            raise ValueError('Invalid PAN format (e.g., ABCDE1234F).')
+        return v
+
+    @field_validator('dob')
+    @classmethod
+    def validate_dob_format(cls, v: str) -> str:
+        error = date_error(v)
+        if error:
+            raise ValueError(error)
+        return v
+
+def _raise_field_errors(model: BaseModel, errors: list) -> None:
+    """Raises one ValidationError reporting each (field, message) at its own location."""
+    if errors:
+        raise ValidationError.from_exception_data(model.__class__.__name__, [
+            InitErrorDetails(
+                type=PydanticCustomError('value_error', 'Value error, {error}', {'error': message}),
+                loc=(field,),
+                input=getattr(model, field),
+            )
+            for field, message in errors
+        ])
+
+# --- Pydantic Models for the Form Steps ---
+# Each step of the multi-step form validates on its own (see the draft API);
+# UdyamFormRequest combines them for a full submission.
+class FormStep(BaseModel):
+
+    @field_validator('*')
+    @classmethod
+    def check_scraped_rules(cls, v, info: FieldValidationInfo):
+        """
+        Applies the pattern/length/option rules compiled from the scraped form
+        (see form_schema.py) on top of each field's own constraints.
+        """
+        if isinstance(v, str):
+            error = form_schema.current().check(info.field_name, v)
+            if error:
+                raise ValueError(error)
+        return v
+
+class AadhaarDetails(FormStep):
+    adharno: str = Field(..., min_length=12, max_length=12, description="Aadhaar number")
+    ownername: str = Field(..., min_length=1, max_length=100, description="Name of Entrepreneur")
+    aadhaarDeclaration: bool = Field(..., description="Aadhaar declaration consent")
+
+    @field_validator('adharno')
+    @classmethod
+    def validate_adharno(cls, v: str, info: FieldValidationInfo) -> str:
+        if not AADHAAR_PATTERN.fullmatch(v):
+            raise ValueError('Aadhaar must be 12 digits and contain only numbers.')
+        with stage_duration_seconds.time('verhoeff'):
+            checksum_ok = verhoeff.validate(v)
+        if not checksum_ok:
+            raise ValueError('Invalid Aadhaar number (checksum failed).')
+        if v.startswith('0') or v.startswith('1'):
+            raise ValueError('Aadhaar number cannot start with 0 or 1.')
+        return v
+
+class PanDetails(FormStep):
+    organizationType: str = Field(..., description="Type of Organisation")
+    hasPan: str = Field(..., description="Does the organization have PAN?")
+    pan: Optional[str] = Field(None, min_length=10, max_length=10, description="PAN number")
+    panName: Optional[str] = Field(None, min_length=1, max_length=100, description="Name of PAN Holder")
+    dob: Optional[str] = Field(None, description="Date of Birth or Incorporation (DD/MM/YYYY)")
+    dobType: Optional[str] = Field(None, description="Type of Date (DOB/DOI)")
+    panDeclaration: Optional[bool] = Field(None, description="PAN declaration consent")
+
+    @field_validator('organizationType')
+    @classmethod
+    def validate_organization_type(cls, v: str) -> str:
+        if v not in ORGANIZATION_TYPES:
+            raise ValueError('Please select a valid type of organisation.')
+        return v
+
+    @field_validator('hasPan')
+    @classmethod
+    def validate_has_pan(cls, v: str) -> str:
+        if v not in YES_NO:
+            raise ValueError("Please answer 'yes' or 'no'.")
+        return v
+
+    @model_validator(mode='after')
+    def validate_conditional_rules(self) -> 'PanDetails':
+        _raise_field_errors(self, self._pan_errors())
+        return self
+
+    def _pan_errors(self) -> list:
+        """
+        PAN details are mandatory for non-proprietary organisations. The
+        organisation/PAN context is computed once for all four fields.
+        """
+        errors = []
+        dob_checked = False
+        if self.organizationType in NON_PROPRIETARY_ORG_TYPES:
+            if self.hasPan == 'no':
+                errors.append(('pan', 'PAN is mandatory for this type of organization. Please select "Yes".'))
+            elif self.hasPan == 'yes':
+                if not self.pan:
+                    errors.append(('pan', 'PAN number is required.'))
+                elif not PAN_PATTERN.fullmatch(self.pan):
+                    errors.append(('pan', 'Invalid PAN format (e.g., ABCDE1234F).'))
+                if not self.panName:
+                    errors.append(('panName', 'Name of PAN Holder is required.'))
+                dob_checked = True
+                dob_error = self._dob_error(self.dob)
+                if dob_error:
+                    errors.append(('dob', dob_error))
+                if not self.panDeclaration:
+                    errors.append(('panDeclaration', 'You must agree to the PAN declaration.'))
+        if not dob_checked and self.dob:
+            # Optional here, but a date that is given must still be a valid one
+            dob_error = date_error(self.dob)
+            if dob_error:
+                errors.append(('dob', dob_error))
+        return errors
+
+    @staticmethod
+    def _dob_error(v: Optional[str]) -> Optional[str]:
+        if not v:
+            return 'DOB or DOI is required.'
+        return date_error(v)
+
+class BusinessDetails(FormStep):
+    hasGstin: Optional[str] = Field(None, description="Does the organization have GSTIN?")
+    totalTurnoverA: Optional[float] = Field(None, ge=0, le=TURNOVER_MAX, allow_inf_nan=False, description="Total Turnover (A)")
+    totalTurnoverB: Optional[float] = Field(None, ge=0, le=TURNOVER_MAX, allow_inf_nan=False, description="Total Turnover (B)")
+
+    @field_validator('hasGstin')
+    @classmethod
+    def validate_has_gstin(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in YES_NO:
+            raise ValueError("Please answer 'yes' or 'no'.")
+        return v
+
+    @model_validator(mode='after')
+    def validate_conditional_rules(self) -> 'BusinessDetails':
+        _raise_field_errors(self, self._gstin_errors())
+        return self
+
+    def _gstin_errors(self) -> list:
+        if self.hasGstin == 'no' and self.totalTurnoverA is not None and self.totalTurnoverA > GSTIN_TURNOVER_LIMIT:
+            return [('hasGstin', 'GSTIN is mandatory if turnover exceeds ₹40 Lakhs.')]
+        return []
+
+# --- Pydantic Model for Final Submission Request Body ---
+# Bases are listed last-step-first so the fields keep the form's order
+class UdyamFormRequest(BusinessDetails, PanDetails, AadhaarDetails):
+
+    @model_validator(mode='wrap')
+    @classmethod
+    def time_validation(cls, data, handler):
+        # Whole-model validation time, reported as the "validation" stage in /metrics
+        with stage_duration_seconds.time('validation'):
+            return handler(data)
+
+    @model_validator(mode='after')
+    def validate_conditional_rules(self) -> 'UdyamFormRequest':
+        """
+        Cross-field rules of every step in one pass, so every failing field is
+        reported with its own location.
+        """
+        _raise_field_errors(self, self._pan_errors() + self._gstin_errors())
+        return self
+
+# Form steps by the name used in the draft API
+FORM_STEPS = {
+    "aadhaar": AadhaarDetails,
+    "pan": PanDetails,
+    "business": BusinessDetails,
+}
+
+# --- Storage Mapping ---
+# The table keeps compact types (date, booleans, a small integer code, numeric
+# turnover); the API keeps the form's strings. These convert between the two.
+def parse_form_date(value: Optional[str]) -> Optional[datetime.date]:
+    """DD/MM/YYYY as a date, None when empty; ValueError when it is not a valid date."""
+    if not value:
+        return None
+    parsed, error = parse_date(value)
+    if error:
+        raise ValueError(f'{value!r}: {error}')
+    return parsed
+
+def format_form_date(value: Optional[datetime.date]) -> Optional[str]:
+    return value.strftime('%d/%m/%Y') if value is not None else None
+
+def format_yes_no(value: Optional[bool]) -> Optional[str]:
+    return None if value is None else 'yes' if value else 'no'
+
+def registration_row(form_data: UdyamFormRequest) -> dict:
+    """
+    Maps a validated form onto the columns of UdyamRegistration.
+    """
+    return {
+        "adharno": form_data.adharno,
+        "ownername": form_data.ownername,
+        "organization_type": int(form_data.organizationType),
+        "pan": form_data.pan,
+        "pan_name": form_data.panName,
+        "dob": parse_form_date(form_data.dob),
+        "aadhaarDeclaration": form_data.aadhaarDeclaration,
+        "hasPan": YES_NO[form_data.hasPan],
+        "dobType": form_data.dobType,
+        "panDeclaration": form_data.panDeclaration,
+        "hasGstin": YES_NO.get(form_data.hasGstin),
+        "totalTurnoverA": form_data.totalTurnoverA,
+        "totalTurnoverB": form_data.totalTurnoverB,
+    }
+
+def registration_record(row) -> dict:
+    """
+    A stored registration (a row mapping) in the form's representation, as
+    returned by the search and export endpoints.
+    """
+    record = dict(row)
+    record.update(
+        organization_type=str(row["organization_type"]),
+        dob=format_form_date(row["dob"]),
+        hasPan=format_yes_no(row["hasPan"]),
+        hasGstin=format_yes_no(row["hasGstin"]),
+        registered_on=row["registered_on"].isoformat() if row["registered_on"] is not None else None,
+    )
+    return record
@@ -0,0 +1,117 @@
+# server.py (Production Entry Point)
+#
+# Starts the API under uvicorn with one worker process per usable core.
+# Tables are created once here, before the workers are forked; each worker
+# then only resets its connection pool and checks the database in the app's
+# lifespan, and closes the pool after in-flight requests have drained.
+# Drafts and idempotent responses must be visible to every worker, so more
+# than one worker needs DRAFT_STORE_URL and IDEMPOTENCY_STORE_URL (Redis);
+# without them the server runs a single worker. Several workers share their
+# metrics through METRICS_MULTIPROCESS_DIR (a fresh temporary directory unless
+# set), so GET /metrics reports the totals of all of them.
+#
+#   python -m backend.server                  # WEB_CONCURRENCY workers on HOST:PORT
+#   python -m backend.server --workers 1 --reload
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# Number of worker processes; defaults to the cores this process may run on
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+# Seconds in-flight requests get to finish after SIGTERM before workers are stopped
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))
+APP = "backend.main:app"
+# Stores that are per-process unless pointed at a shared server
+SHARED_STORE_SETTINGS = ("DRAFT_STORE_URL", "IDEMPOTENCY_STORE_URL")
+
+
+def usable_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def worker_count(value: Optional[str] = WEB_CONCURRENCY) -> int:
+    """WEB_CONCURRENCY as a positive integer, or the number of usable cores when unset."""
+    if not value:
+        return usable_cores()
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"WEB_CONCURRENCY must be at least 1, got {value!r}.")
+    return workers
+
+
+def unshared_stores() -> list:
+    """The settings in SHARED_STORE_SETTINGS that are not set."""
+    return [name for name in SHARED_STORE_SETTINGS if not os.getenv(name)]
+
+
+def prepare_metrics_directory() -> str:
+    """
+    Points the workers at one METRICS_MULTIPROCESS_DIR, emptied of the
+    snapshots of a previous run; returns the directory.
+    """
+    directory = os.getenv("METRICS_MULTIPROCESS_DIR") or tempfile.mkdtemp(prefix="udyam-metrics-")
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("worker-") and name.endswith((".json", ".json.tmp")):
+            os.remove(os.path.join(directory, name))
+    os.environ["METRICS_MULTIPROCESS_DIR"] = directory
+    return directory
+
+
+def prepare_database() -> None:
+    """Creates missing tables once, so the workers can skip it at startup."""
+    from .database import create_schema
+
+    create_schema()
+    os.environ["DB_CREATE_SCHEMA"] = "false"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Udyam registration API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: WEB_CONCURRENCY or core count)")
+    parser.add_argument("--reload", action="store_true", help="Restart on code changes (single worker, development only)")
+    args = parser.parse_args(argv)
+
+    workers = 1 if args.reload else args.workers or worker_count()
+    logging.basicConfig(level=LOG_LEVEL.upper())
+    missing = unshared_stores()
+    if workers > 1 and missing:
+        # A draft or stored response kept by one worker is invisible to the others
+        logger.warning("Running 1 worker instead of %d: set %s to share state between workers.",
+                       workers, " and ".join(missing))
+        workers = 1
+    if workers > 1:
+        logger.info("Workers share metrics through %s", prepare_metrics_directory())
+
+    prepare_database()
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=args.reload,
+        log_level=LOG_LEVEL,
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
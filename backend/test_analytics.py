@@ -0,0 +1,170 @@
+# test_analytics.py (Pytest for registration summaries and distribution reports)
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.analytics import (
+    distribution,
+    fold_periodically,
+    fold_summaries,
+    load_columns,
+    merge_deltas,
+    record_registrations,
+    refresh_summaries,
+    size_class,
+    stored_rows,
+    summary_deltas,
+    summary_source,
+)
+from backend.database import Base, RegistrationSummary, RegistrationSummaryDelta, registration_insert
+
+np = pytest.importorskip("numpy")
+
+
+def make_rows(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "adharno": f"{200000000000 + index}",
+            "ownername": "Owner",
+            "organization_type": rng.choice((1, 2, 5, 11)),
+            "aadhaarDeclaration": True,
+            "hasPan": False,
+            "hasGstin": rng.choice((True, False, None)),
+            "totalTurnoverA": rng.choice((None, round(rng.uniform(0, 3e9), 2))),
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'analytics.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def summary_rows(connection) -> list:
+    return sorted(tuple(row) for row in connection.execute(select(RegistrationSummary.__table__)).all())
+
+
+def test_size_class_limits_are_inclusive():
+    assert [size_class(value) for value in (None, 0, 5e7, 5e7 + 1, 5e8, 2.5e9, 2.5e9 + 1)] == [
+        "unknown", "micro", "micro", "small", "small", "medium", "large",
+    ]
+
+
+def test_incremental_summary_matches_a_bulk_refresh(engine):
+    rows = make_rows(300)
+    with engine.begin() as connection:
+        for start in range(0, len(rows), 40):
+            chunk = rows[start:start + 40]
+            # The last chunk repeats rows already stored; only new rows may be counted
+            chunk += rows[:3] if start + 40 >= len(rows) else []
+            returned = connection.execute(registration_insert("sqlite", chunk)).all()
+            stored = stored_rows(chunk, {adharno: id_ for id_, adharno in returned})
+            if stored:
+                connection.execute(insert(RegistrationSummaryDelta.__table__), summary_deltas(stored))
+            if start % 120 == 0:
+                fold_summaries(connection)
+        assert fold_summaries(connection) > 0
+        assert fold_summaries(connection) == 0
+        incremental = summary_rows(connection)
+        refresh_summaries(connection)
+        refreshed = summary_rows(connection)
+    assert [row[:5] for row in refreshed] == [row[:5] for row in incremental]
+    for refreshed_row, incremental_row in zip(refreshed, incremental):
+        assert refreshed_row[5:] == pytest.approx(incremental_row[5:])
+    assert sum(row[3] for row in incremental) == len(rows)
+
+
+def test_distribution_matches_numpy_per_group(engine):
+    rows = make_rows(500)
+    with engine.begin() as connection:
+        connection.execute(registration_insert("sqlite", rows))
+        columns = load_columns(connection)
+    report = distribution(*columns, ["organizationType", "hasGstin"], percentiles=(0, 50, 90, 100))
+
+    assert sum(entry["registrations"] for entry in report) == len(rows)
+    for entry in report:
+        values = [
+            row["totalTurnoverA"] for row in rows
+            if str(row["organization_type"]) == entry["organizationType"]
+            and {True: "yes", False: "no", None: "unknown"}[row["hasGstin"]] == entry["hasGstin"]
+        ]
+        turnovers = [value for value in values if value is not None]
+        assert entry["registrations"] == len(values)
+        assert entry["withTurnover"] == len(turnovers)
+        if turnovers:
+            expected = np.percentile(turnovers, [0, 50, 90, 100])
+            assert [entry["turnover"][key] for key in ("p0", "p50", "p90", "p100")] == pytest.approx(expected)
+            assert entry["turnover"]["mean"] == pytest.approx(np.mean(turnovers))
+
+
+def test_distribution_of_all_rows_and_of_nothing():
+    organization_types = np.array([1, 1, 2], dtype=np.int16)
+    gstins = np.array([1, 0, -1], dtype=np.int8)
+    turnovers = np.array([10.0, np.nan, 30.0])
+    report = distribution(organization_types, gstins, turnovers, [], percentiles=(50,))
+    assert report == [{"registrations": 3, "withTurnover": 2, "turnover": {"mean": 20.0, "p50": 20.0}}]
+    assert distribution(organization_types[:0], gstins[:0], turnovers[:0], ["sizeClass"]) == []
+
+
+def test_deltas_are_merged_in_key_order():
+    deltas = summary_deltas([
+        {"organization_type": 5, "hasGstin": True, "totalTurnoverA": 10.0},
+        {"organization_type": 1, "hasGstin": None, "totalTurnoverA": None},
+        {"organization_type": 5, "hasGstin": True, "totalTurnoverA": 30.0},
+    ])
+    assert [(delta["organization_type"], delta["gstin"], delta["size_class"]) for delta in deltas] == [
+        (1, "unknown", "unknown"), (5, "yes", "micro"),
+    ]
+    assert merge_deltas(deltas + deltas)[1] == {
+        "organization_type": 5, "gstin": "yes", "size_class": "micro", "registrations": 4,
+        "turnover_count": 4, "turnover_sum": 80.0, "turnover_min": 10.0, "turnover_max": 30.0,
+    }
+
+
+def test_replaced_registrations_are_subtracted():
+    old = {"organization_type": 5, "hasGstin": True, "totalTurnoverA": 10.0}
+    deltas = summary_deltas([dict(old, totalTurnoverA=30.0), dict(old, hasGstin=False)], removed=[old])
+    # The replaced row's turnover leaves the sum but not the minimum, which cannot be taken back
+    assert [(delta["gstin"], delta["registrations"], delta["turnover_sum"], delta["turnover_min"]) for delta in deltas] == [
+        ("no", 1, 10.0, 10.0), ("yes", 0, 20.0, 30.0),
+    ]
+
+
+def test_other_databases_report_from_the_registrations(engine):
+    rows = make_rows(50)
+    with engine.begin() as connection:
+        connection.execute(registration_insert("sqlite", rows))
+        source = summary_source("mssql")
+        total = connection.execute(select(func.sum(source.c.registrations))).scalar()
+    assert total == len(rows)
+
+
+def test_deltas_are_folded_in_the_background(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'fold.db'}"
+
+    async def scenario():
+        engine = create_async_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as db:
+            await record_registrations(db, make_rows(20))
+            await db.commit()
+        task = asyncio.create_task(fold_periodically(session_factory, interval=0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        async with engine.connect() as connection:
+            pending = (await connection.execute(select(func.count()).select_from(RegistrationSummaryDelta))).scalar()
+            folded = (await connection.execute(select(func.sum(RegistrationSummary.registrations)))).scalar()
+        await engine.dispose()
+        return pending, folded
+
+    assert asyncio.run(scenario()) == (0, 20)
@@ -0,0 +1,61 @@
+# test_dates.py (Pytest for DD/MM/YYYY date parsing)
+import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from backend.dates import Today, date_error, parse_date, today
+from backend.schemas import PanValidationRequest, parse_form_date
+
+
+@pytest.mark.parametrize("value, reason", [
+    ("1980-05-15", "Date format is DD/MM/YYYY."),
+    ("5/5/1980", "Date format is DD/MM/YYYY."),
+    ("15/13/1980", "Month must be between 01 and 12."),
+    ("15/00/1980", "Month must be between 01 and 12."),
+    ("30/02/2020", "Day must be between 01 and 29 for 02/2020."),
+    ("29/02/2021", "Day must be between 01 and 28 for 02/2021."),
+    ("00/01/2021", "Day must be between 01 and 31 for 01/2021."),
+    ("01/01/0000", "Year must be 0001 or later."),
+])
+def test_invalid_dates_report_the_reason(value, reason):
+    assert parse_date(value) == (None, reason)
+    assert date_error(value) == reason
+
+
+def test_valid_and_future_dates():
+    assert parse_date("29/02/2020") == (datetime.date(2020, 2, 29), None)
+    assert date_error("29/02/2020") is None
+    tomorrow = (today() + datetime.timedelta(days=1)).strftime("%d/%m/%Y")
+    assert date_error(tomorrow) == "Date cannot be in the future."
+    # The storage mapping keeps what parses, whether or not it lies in the future
+    assert parse_form_date(tomorrow) == today() + datetime.timedelta(days=1)
+    assert parse_form_date("") is None
+    with pytest.raises(ValueError):
+        parse_form_date("31/02/2020")
+
+
+def test_parsed_dates_are_cached():
+    parse_date.cache_clear()
+    for _ in range(3):
+        parse_date("15/05/1980")
+    info = parse_date.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_today_changes_only_after_local_midnight():
+    midnight = datetime.datetime(2024, 3, 10).timestamp()
+    now = [midnight - 1]
+    current_date = Today(clock=lambda: now[0])
+    assert current_date() == datetime.date(2024, 3, 9)
+    now[0] = midnight - 0.001
+    assert current_date() == datetime.date(2024, 3, 9)
+    now[0] = midnight
+    assert current_date() == datetime.date(2024, 3, 10)
+
+
+def test_pan_request_reports_future_dates_precisely():
+    tomorrow = (today() + datetime.timedelta(days=1)).strftime("%d/%m/%Y")
+    with pytest.raises(ValidationError) as excinfo:
+        PanValidationRequest(pan="ABCDE1234F", panName="A", dob=tomorrow, dobType="DOB")
+    assert "Date cannot be in the future." in excinfo.value.errors()[0]["msg"]
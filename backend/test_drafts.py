@@ -0,0 +1,37 @@
+# test_drafts.py (Pytest for draft storage)
+import asyncio
+
+import pytest
+
+from backend.drafts import DraftStore, InMemoryDraftStore
+
+def test_in_memory_store_expires_and_evicts(clock):
+    async def scenario():
+        store = InMemoryDraftStore(maxsize=2, ttl=60, clock=clock)
+        await store.set("a", {"steps": {}})
+        await store.set("b", {"steps": {}})
+        await store.set("c", {"steps": {}})  # Evicts "a"
+        evicted = await store.get("a")
+        clock.now = 30
+        await store.set("b", {"steps": {"aadhaar": {"ownername": "x"}}})  # Refreshes the TTL
+        clock.now = 61
+        return evicted, await store.get("b"), await store.get("c")
+
+    evicted, refreshed, expired = asyncio.run(scenario())
+    assert evicted is None
+    assert refreshed == {"steps": {"aadhaar": {"ownername": "x"}}}
+    assert expired is None
+
+def test_in_memory_store_returns_copies():
+    async def scenario():
+        store = InMemoryDraftStore()
+        await store.set("a", {"steps": {}})
+        draft = await store.get("a")
+        draft["steps"]["pan"] = {}
+        return await store.get("a")
+
+    assert asyncio.run(scenario()) == {"steps": {}}
+
+def test_draft_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        DraftStore()
@@ -0,0 +1,40 @@
+# test_duplicates.py (Pytest for duplicate Aadhaar/PAN detection)
+import asyncio
+import random
+
+from backend.database import AsyncSessionLocal, Base, SessionLocal, UdyamRegistration, engine
+from backend.duplicates import BloomFilter, DuplicateFilter
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    rng = random.Random(5)
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    members = {str(rng.randrange(10**12)) for _ in range(10000)}
+    for key in members:
+        bloom.add(key)
+    assert all(key in bloom for key in members)
+    probes = [str(10**12 + i) for i in range(10000)]
+    false_positives = sum(key in bloom for key in probes)
+    assert false_positives / len(probes) < 0.03
+
+def test_duplicate_filter_is_conservative_until_warmed():
+    duplicate_filter = DuplicateFilter(capacity=1000)
+    assert duplicate_filter.might_exist("234567890129")
+    duplicate_filter.ready = True
+    assert not duplicate_filter.might_exist("234567890129")
+    duplicate_filter.add("234567890129", "ABCDE1234F")
+    assert duplicate_filter.might_exist("234567890129")
+    assert duplicate_filter.might_exist("345678901235", "ABCDE1234F")
+
+def test_warm_loads_stored_keys():
+    Base.metadata.create_all(bind=engine)
+    try:
+        with SessionLocal() as db:
+            db.add(UdyamRegistration(adharno="234567890129", ownername="Stored", organization_type=5, pan="ABCDE1234F", hasPan=True))
+            db.commit()
+        duplicate_filter = DuplicateFilter(capacity=1000)
+        assert asyncio.run(duplicate_filter.warm(AsyncSessionLocal)) == 1
+        assert duplicate_filter.ready
+        assert duplicate_filter.might_exist("234567890129")
+        assert duplicate_filter.might_exist("999999999999", "ABCDE1234F")
+    finally:
+        Base.metadata.drop_all(bind=engine)
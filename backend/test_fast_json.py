@@ -0,0 +1,62 @@
+# test_fast_json.py (Pytest for the JSON fast path)
+import json
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from backend.fast_json import FastJSONResponse, dumps, json_body, json_body_openapi
+
+
+class Item(BaseModel):
+    name: str
+    amount: float
+    active: bool
+
+
+def make_client(strict: bool) -> TestClient:
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.post("/items", openapi_extra=json_body_openapi(Item))
+    async def create_item(item: Item = Depends(json_body(Item, strict=strict))):
+        return FastJSONResponse(item.model_dump())
+
+    return TestClient(app)
+
+
+def test_dumps_matches_standard_json_response():
+    content = {"message": "₹40 Lakhs", "id": 7, "ratio": 0.5, "items": [None, True]}
+    assert json.loads(dumps(content)) == content
+    assert FastJSONResponse(content).body == dumps(content)
+    assert b"\\u" not in dumps(content)
+
+
+def test_body_is_parsed_into_the_model():
+    response = make_client(strict=False).post("/items", json={"name": "a", "amount": 1000, "active": True})
+    assert response.status_code == 200
+    assert response.json() == {"name": "a", "amount": 1000.0, "active": True}
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_errors_are_reported_at_body_locations():
+    client = make_client(strict=False)
+    response = client.post("/items", json={"name": "a", "active": True})
+    assert response.status_code == 422
+    assert [(error["type"], error["loc"]) for error in response.json()["detail"]] == [("missing", ["body", "amount"])]
+
+    response = client.post("/items", content=b"{not json", headers={"content-type": "application/json"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_strict_parsing_does_not_coerce_types():
+    body = {"name": "a", "amount": "1000", "active": 1}
+    assert make_client(strict=False).post("/items", json=body).status_code == 200
+    response = make_client(strict=True).post("/items", json=body)
+    assert response.status_code == 422
+    assert sorted(error["loc"][1] for error in response.json()["detail"]) == ["active", "amount"]
+
+
+def test_request_body_stays_documented():
+    schema = make_client(strict=False).app.openapi()["paths"]["/items"]["post"]["requestBody"]
+    assert schema["content"]["application/json"]["schema"]["required"] == ["name", "amount", "active"]
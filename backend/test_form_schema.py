@@ -0,0 +1,91 @@
+# test_form_schema.py (Pytest for rules compiled from the scraped form)
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from backend import schemas
+from backend.form_schema import FormSchemaStore, compile_schema, load_form_schema
+
+def _input(control, **attrs):
+    return {"name": f"ctl00$ContentPlaceHolder1${control}", "id": f"ctl00_ContentPlaceHolder1_{control}", **attrs}
+
+def test_compile_maps_scraped_controls_to_fields():
+    schema = compile_schema({
+        "step1": {"inputs": [
+            _input("txtadharno", maxlength="12", minlength="12", pattern=r"[2-9]\d{11}"),
+            _input("txtownername", maxlength="100", pattern=""),
+            {"name": "__VIEWSTATE", "id": "__VIEWSTATE", "maxlength": None},
+        ]},
+        "step2": {"inputs": [_input("txtPan", maxlength="10", pattern="[A-Z]{5}[0-9]{4}[A-Z]")]},
+    }, version="v1")
+
+    assert set(schema.rules) == {"adharno", "ownername", "pan"}
+    assert schema.check("adharno", "234567890129") is None
+    assert schema.check("adharno", "134567890129") == "adharno does not match the required format."
+    assert schema.check("adharno", "23456789012") == "adharno must be at least 12 characters."
+    assert schema.check("pan", "ABCDE1234FX") == "pan must be at most 10 characters."
+    assert schema.check("unknown", "anything") is None
+    assert schema.export()["fields"]["pan"] == {
+        "maxLength": 10, "minLength": None, "pattern": "[A-Z]{5}[0-9]{4}[A-Z]", "options": None,
+    }
+
+def test_invalid_patterns_are_logged_and_ignored(caplog):
+    schema = compile_schema({"inputs": [_input("txtPan", maxlength="10", pattern="[A-Z")]}, version="v1")
+    assert schema.rules["pan"].pattern is None
+    assert "Ignoring pattern of pan that is not a valid regex: [A-Z" in caplog.text
+
+def test_bundled_scrape_compiles():
+    rules = load_form_schema().rules
+    assert rules["adharno"].max_length == 12
+    assert rules["ownername"].max_length == 100
+
+def test_store_reloads_when_the_file_changes(tmp_path, clock):
+    path = tmp_path / "form.json"
+    path.write_text(json.dumps({"inputs": [_input("txtownername", maxlength="100")]}))
+    store = FormSchemaStore(str(path), reload_interval=30, clock=clock)
+    first = store.current()
+    assert first.rules["ownername"].max_length == 100
+
+    path.write_text(json.dumps({"inputs": [_input("txtownername", maxlength="5")]}))
+    os.utime(path, (1, 1))
+    assert store.current() is first  # Not re-checked within the interval
+    clock.now = 31
+    assert store.current().rules["ownername"].max_length == 5
+
+def test_step_models_apply_scraped_rules(tmp_path, monkeypatch):
+    path = tmp_path / "form.json"
+    path.write_text(json.dumps({"inputs": [_input("txtownername", maxlength="5")]}))
+    monkeypatch.setattr(schemas, "form_schema", FormSchemaStore(str(path)))
+
+    with pytest.raises(ValidationError) as excinfo:
+        schemas.UdyamFormRequest(
+            adharno="234567890129", ownername="Too Long A Name", aadhaarDeclaration=True,
+            organizationType="1", hasPan="no",
+        )
+    assert [error["loc"] for error in excinfo.value.errors()] == [("ownername",)]
+    assert schemas.AadhaarDetails(adharno="234567890129", ownername="Short", aadhaarDeclaration=True)
+
+def test_store_keeps_the_last_good_schema_when_the_file_is_malformed(tmp_path, caplog, clock):
+    path = tmp_path / "form.json"
+    path.write_text(json.dumps({"inputs": [_input("txtownername", maxlength="100")]}))
+    store = FormSchemaStore(str(path), reload_interval=30, clock=clock)
+    first = store.current()
+
+    path.write_text('{"inputs": [')  # Caught halfway through a rewrite
+    os.utime(path, (1, 1))
+    clock.now = 31
+    assert store.current() is first
+    assert "Could not load the form schema" in caplog.text
+
+    path.write_text(json.dumps({"inputs": [_input("txtownername", maxlength="5")]}))
+    os.utime(path, (2, 2))
+    clock.now = 62
+    assert store.current().rules["ownername"].max_length == 5
+
+def test_malformed_schema_does_not_fail_validation(tmp_path, monkeypatch):
+    path = tmp_path / "form.json"
+    path.write_text("not json")
+    monkeypatch.setattr(schemas, "form_schema", FormSchemaStore(str(path)))
+    assert schemas.AadhaarDetails(adharno="234567890129", ownername="Owner", aadhaarDeclaration=True)
@@ -0,0 +1,141 @@
+# test_idempotency.py (Pytest for Idempotency-Key handling)
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.idempotency import IdempotencyMiddleware, IdempotencyStore, InMemoryIdempotencyStore, StoredResponse
+
+
+class CountingApp:
+    """ASGI app echoing the request body, slow enough for retries to overlap."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        body = (await receive())["body"]
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": self.status,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps({"call": self.calls, "echo": body.decode()}).encode()})
+
+
+def run(app, requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/submit", content=body, headers=headers) for body, headers in requests))
+
+    return asyncio.run(scenario())
+
+
+def test_repeated_key_is_replayed_without_calling_the_app():
+    app = CountingApp()
+    middleware = IdempotencyMiddleware(app, InMemoryIdempotencyStore())
+    first, = run(middleware, [(b"a", {"Idempotency-Key": "k1"})])
+    retry, = run(middleware, [(b"a", {"Idempotency-Key": "k1"})])
+    assert app.calls == 1
+    assert retry.json() == first.json() == {"call": 1, "echo": "a"}
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_concurrent_requests_with_one_key_are_coalesced():
+    app = CountingApp()
+    middleware = IdempotencyMiddleware(app, InMemoryIdempotencyStore())
+    responses = run(middleware, [(b"a", {"Idempotency-Key": "k1"})] * 5 + [(b"a", {})])
+    assert app.calls == 2  # One for the key, one for the request without a key
+    assert [response.json()["call"] for response in responses[:5]] == [responses[0].json()["call"]] * 5
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+
+
+def run_on_workers(workers, requests):
+    """Sends request i to workers[i % len(workers)], all at once, as a load balancer spreading retries would."""
+    async def scenario():
+        clients = [httpx.AsyncClient(transport=httpx.ASGITransport(app=worker), base_url="http://test") for worker in workers]
+        try:
+            return await asyncio.gather(*(
+                clients[i % len(clients)].post("/submit", content=body, headers=headers)
+                for i, (body, headers) in enumerate(requests)
+            ))
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_requests_on_different_workers_run_once():
+    app, store = CountingApp(), InMemoryIdempotencyStore()
+    workers = [IdempotencyMiddleware(app, store, poll_interval=0.01) for _ in range(2)]
+    responses = run_on_workers(workers, [(b"a", {"Idempotency-Key": "k1"})] * 4)
+    assert app.calls == 1
+    assert {response.json()["call"] for response in responses} == {1}
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 3
+
+
+def test_retry_gets_409_while_another_worker_is_still_running():
+    app, store = CountingApp(), InMemoryIdempotencyStore()
+    workers = [IdempotencyMiddleware(app, store), IdempotencyMiddleware(app, store, wait=0.01, poll_interval=0.005)]
+    first, retry = run_on_workers(workers, [(b"a", {"Idempotency-Key": "k1"})] * 2)
+    assert (first.status_code, retry.status_code) == (200, 409)
+    assert app.calls == 1
+    # Once the first attempt has finished, the retry is replayed
+    replayed, = run_on_workers(workers[1:], [(b"a", {"Idempotency-Key": "k1"})])
+    assert replayed.json() == first.json()
+
+
+def test_claim_is_released_after_a_server_error():
+    app, store = CountingApp(status=503), InMemoryIdempotencyStore()
+    workers = [IdempotencyMiddleware(app, store, poll_interval=0.01) for _ in range(2)]
+    responses = run_on_workers(workers, [(b"a", {"Idempotency-Key": "k1"})] * 2)
+    # The waiting worker claims the key again and runs the request itself
+    assert app.calls == 2
+    assert [response.status_code for response in responses] == [503, 503]
+
+
+def test_reused_key_with_different_body_is_rejected():
+    middleware = IdempotencyMiddleware(CountingApp(), InMemoryIdempotencyStore())
+    run(middleware, [(b"a", {"Idempotency-Key": "k1"})])
+    response, = run(middleware, [(b"b", {"Idempotency-Key": "k1"})])
+    assert response.status_code == 422
+
+
+def test_server_errors_are_not_stored():
+    app = CountingApp(status=503)
+    middleware = IdempotencyMiddleware(app, InMemoryIdempotencyStore())
+    run(middleware, [(b"a", {"Idempotency-Key": "k1"})])
+    run(middleware, [(b"a", {"Idempotency-Key": "k1"})])
+    assert app.calls == 2
+
+
+def test_stored_response_round_trips_through_json():
+    response = StoredResponse("f", 200, ((b"content-type", b"application/json"),), b'{"id": 1}', "/submit")
+    assert StoredResponse.from_json(response.to_json()) == response
+
+
+def test_keys_are_scoped_to_the_client():
+    app = CountingApp()
+    middleware = IdempotencyMiddleware(app, InMemoryIdempotencyStore())
+    run(middleware, [(b"a", {"Idempotency-Key": "k1", "User-Agent": "client-a"})])
+    other, = run(middleware, [(b"a", {"Idempotency-Key": "k1", "User-Agent": "client-b"})])
+    authorized, = run(middleware, [(b"a", {"Idempotency-Key": "k1", "User-Agent": "client-a", "Authorization": "Bearer t"})])
+    assert app.calls == 3
+    assert "idempotent-replayed" not in other.headers and "idempotent-replayed" not in authorized.headers
+
+
+def test_request_bodies_are_capped():
+    app = CountingApp()
+    middleware = IdempotencyMiddleware(app, InMemoryIdempotencyStore(), max_body=8)
+    small, large = run(middleware, [(b"12345678", {"Idempotency-Key": "k1"}), (b"123456789", {"Idempotency-Key": "k2"})])
+    assert (small.status_code, large.status_code) == (200, 413)
+    assert app.calls == 1
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyStore()
@@ -0,0 +1,87 @@
+# test_importer.py (Pytest for the bulk importer)
+import csv
+import json
+
+import pytest
+from sqlalchemy import MetaData, create_engine, select
+
+from backend.database import UdyamRegistration
+from backend.importer import ImportReport, main, run_import
+from backend.migrate_compact import legacy_table
+
+FIELDS = ["adharno", "ownername", "aadhaarDeclaration", "organizationType", "hasPan", "pan", "panName",
+          "dob", "dobType", "panDeclaration", "hasGstin", "totalTurnoverA", "totalTurnoverB"]
+
+def proprietary(adharno, ownername="Imported Proprietor"):
+    return {"adharno": adharno, "ownername": ownername, "aadhaarDeclaration": "true", "organizationType": "1",
+            "hasPan": "no", "hasGstin": "no", "totalTurnoverA": "1000000", "totalTurnoverB": "0"}
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'import.db'}"
+
+def stored_adharnos(database_url):
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        result = connection.execute(select(UdyamRegistration.adharno).order_by(UdyamRegistration.adharno)).scalars().all()
+    engine.dispose()
+    return result
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_csv_import_loads_valid_rows_and_writes_rejects(tmp_path, database_url, workers):
+    path = tmp_path / "registrations.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerow(proprietary("234567890129"))
+        writer.writerow(proprietary("234567890121"))  # Fails checksum
+        writer.writerow(proprietary("345678901235"))
+    rejects = tmp_path / "rejects.ndjson"
+
+    report = run_import(str(path), database_url, workers=workers, chunk_size=2, rejects_path=str(rejects))
+
+    assert (report.read, report.loaded, report.rejected) == (3, 2, 1)
+    assert stored_adharnos(database_url) == ["234567890129", "345678901235"]
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert rejected[0]["line"] == 3
+    assert "checksum failed" in rejected[0]["errors"][0]["msg"]
+    assert rejected[0]["input"] == path.read_text().splitlines()[2]
+
+def test_ndjson_import_rejects_duplicates_and_malformed_lines(tmp_path, database_url):
+    path = tmp_path / "registrations.ndjson"
+    path.write_text("\n".join([
+        json.dumps(proprietary("234567890129")),
+        "{not json",
+        json.dumps(proprietary("234567890129", "Duplicate")),
+        json.dumps(proprietary("456789012340")),
+    ]) + "\n")
+
+    report = run_import(str(path), database_url, workers=1, chunk_size=10)
+
+    assert (report.read, report.loaded, report.rejected) == (4, 2, 2)
+    assert stored_adharnos(database_url) == ["234567890129", "456789012340"]
+    rejected = [json.loads(line) for line in (tmp_path / "registrations.ndjson.rejected.ndjson").read_text().splitlines()]
+    assert sorted(reject["line"] for reject in rejected) == [2, 3]
+    # The original lines, not the database rows, so the file can be fixed and loaded again
+    by_line = {reject["line"]: reject for reject in rejected}
+    assert by_line[2]["input"] == "{not json" and by_line[2]["record"] is None
+    assert by_line[3]["input"] == json.dumps(proprietary("234567890129", "Duplicate"))
+    assert by_line[3]["record"] == proprietary("234567890129", "Duplicate")
+
+def test_cli_reports_throughput(tmp_path, database_url, capsys):
+    path = tmp_path / "registrations.ndjson"
+    path.write_text(json.dumps(proprietary("234567890129")) + "\n")
+    assert main([str(path), "--database-url", database_url, "--workers", "1"]) == 0
+    assert "loaded 1" in capsys.readouterr().err
+    assert ImportReport(read=10, elapsed=2.0).rows_per_second == 5.0
+
+def test_import_into_a_pre_compact_table_asks_for_the_migration(tmp_path, database_url, capsys):
+    engine = create_engine(database_url)
+    metadata = MetaData()
+    legacy_table(metadata)
+    metadata.create_all(engine)
+    engine.dispose()
+    path = tmp_path / "registrations.ndjson"
+    path.write_text(json.dumps(proprietary("234567890129")) + "\n")
+    assert main([str(path), "--database-url", database_url, "--workers", "1"]) == 1
+    assert "python -m backend.migrate_compact" in capsys.readouterr().err
@@ -1,7 +1,9 @@
 # test_main.py (Pytest for Backend)
 from fastapi.testclient import TestClient
 from backend.main import app, Verhoeff, UdyamRegistration, SessionLocal, Base, engine
+from backend.database import to_async_url, pool_options
 import datetime
+import json
 from sqlalchemy.orm import Session
 import pytest
 
@@ -19,6 +21,13 @@ def db_session():
         # Clean up the database after each test
         Base.metadata.drop_all(bind=engine)
 
+# A client of the admin endpoints (registrations, export, analytics)
+@pytest.fixture
+def admin_client(monkeypatch):
+    import backend.auth
+    monkeypatch.setattr(backend.auth, "ADMIN_API_TOKENS", ["test-admin-token"])
+    return TestClient(app, headers={"Authorization": "Bearer test-admin-token"})
+
 def test_read_main():
     response = client.get("/")
     assert response.status_code == 404
@@ -343,4 +352,356 @@ def test_submit_aadhaar_verhoeff_invalid():
         },
     )
     assert response.status_code == 422
-    assert "Invalid Aadhaar number (checksum failed)." in response.json()['detail'][0]['msg']
\ No newline at end of file
+    assert "Invalid Aadhaar number (checksum failed)." in response.json()['detail'][0]['msg']
+
+def test_submit_persists_registration_via_async_session(db_session: Session):
+    response = client.post(
+        "/submit",
+        json={
+            "adharno": "234567890129",  # Passes the Verhoeff checksum
+            "ownername": "Test Proprietor",
+            "aadhaarDeclaration": True,
+            "organizationType": "1",
+            "hasPan": "no",
+            "hasGstin": "no",
+            "totalTurnoverA": 1000000,
+            "totalTurnoverB": 0,
+        },
+    )
+    assert response.status_code == 200
+    registration = db_session.get(UdyamRegistration, response.json()['id'])
+    assert registration.adharno == "234567890129"
+    assert registration.ownername == "Test Proprietor"
+
+def test_to_async_url_maps_drivers():
+    assert to_async_url("postgresql://u:p@db:5432/udyam") == "postgresql+asyncpg://u:p@db:5432/udyam"
+    assert to_async_url("postgresql+psycopg2://u:p@db/udyam") == "postgresql+asyncpg://u:p@db/udyam"
+    assert to_async_url("sqlite:///./udyam.db") == "sqlite+aiosqlite:///./udyam.db"
+    assert to_async_url("sqlite+aiosqlite:///./udyam.db") == "sqlite+aiosqlite:///./udyam.db"
+
+def test_pool_options_skip_sizing_for_sqlite():
+    assert "pool_size" not in pool_options("sqlite:///./udyam.db")
+    options = pool_options("postgresql://u:p@db/udyam")
+    assert options["pool_size"] > 0
+    assert options["pool_pre_ping"] is True
+
+def _proprietary_payload(adharno: str, ownername: str = "Batch Proprietor") -> dict:
+    return {
+        "adharno": adharno,
+        "ownername": ownername,
+        "aadhaarDeclaration": True,
+        "organizationType": "1",
+        "hasPan": "no",
+        "hasGstin": "no",
+        "totalTurnoverA": 1000000,
+        "totalTurnoverB": 0,
+    }
+
+def test_submit_batch_json_array_reports_per_record_errors(db_session: Session):
+    response = client.post(
+        "/submit/batch",
+        json=[
+            _proprietary_payload("234567890129"),
+            _proprietary_payload("234567890121"),  # Fails checksum
+            _proprietary_payload("345678901235"),
+        ],
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 2
+    assert [result["index"] for result in body["results"]] == [0, 2]
+    assert body["errors"][0]["index"] == 1
+    assert "checksum failed" in body["errors"][0]["errors"][0]["msg"]
+    registration = db_session.get(UdyamRegistration, body["results"][1]["id"])
+    assert registration.adharno == "345678901235"
+
+def test_submit_batch_ndjson(db_session: Session):
+    import json
+    lines = [json.dumps(_proprietary_payload("234567890129")), "{not json", json.dumps(_proprietary_payload("456789012340"))]
+    response = client.post(
+        "/submit/batch",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 2
+    assert body["errors"][0]["index"] == 1
+    assert body["errors"][0]["errors"][0]["type"] == "json_invalid"
+
+def test_submit_batch_rejects_non_array():
+    response = client.post("/submit/batch", json={"adharno": "234567890129"})
+    assert response.status_code == 400
+
+def test_conditional_rules_report_each_failing_field():
+    response = client.post(
+        "/submit",
+        json={
+            "adharno": "234567890129",
+            "ownername": "Test Company",
+            "aadhaarDeclaration": True,
+            "organizationType": "5",
+            "hasPan": "yes",
+            "pan": "ABCDE1234F",
+            "panName": None,
+            "dob": None,
+            "dobType": "DOI",
+            "panDeclaration": True,
+            "hasGstin": "yes",
+            "totalTurnoverA": 0,
+            "totalTurnoverB": 0,
+        },
+    )
+    assert response.status_code == 422
+    detail = response.json()['detail']
+    assert [error['loc'] for error in detail] == [['body', 'panName'], ['body', 'dob']]
+    assert "Name of PAN Holder is required." in detail[0]['msg']
+    assert "DOB or DOI is required." in detail[1]['msg']
+
+def test_gstin_required_above_turnover_limit():
+    response = client.post("/submit", json={**_proprietary_payload("234567890129"), "totalTurnoverA": 5000000})
+    assert response.status_code == 422
+    detail = response.json()['detail']
+    assert detail[0]['loc'] == ['body', 'hasGstin']
+    assert "GSTIN is mandatory if turnover exceeds ₹40 Lakhs." in detail[0]['msg']
+
+def test_resubmission_is_rejected_with_409(db_session: Session):
+    payload = _proprietary_payload("234567890129")
+    assert client.post("/submit", json=payload).status_code == 200
+    response = client.post("/submit", json=payload)
+    assert response.status_code == 409
+    assert response.json()['detail'] == "A registration with this Aadhaar number already exists."
+
+def test_batch_reports_duplicates(db_session: Session):
+    client.post("/submit", json=_proprietary_payload("234567890129"))
+    response = client.post(
+        "/submit/batch",
+        json=[
+            _proprietary_payload("234567890129"),  # Already registered
+            _proprietary_payload("345678901235"),
+            _proprietary_payload("345678901235"),  # Repeated within the batch
+        ],
+    )
+    body = response.json()
+    assert body["inserted"] == 1
+    assert body["results"][0]["index"] == 1
+    assert [(error["index"], error["errors"][0]["type"]) for error in body["errors"]] == [(0, "duplicate"), (2, "duplicate")]
+
+def test_upsert_mode_updates_existing_registration(db_session: Session, monkeypatch):
+    import backend.main
+    monkeypatch.setattr(backend.main, "SUBMIT_CONFLICT_MODE", "upsert")
+    first = client.post("/submit", json=_proprietary_payload("234567890129", "Original Name"))
+    second = client.post("/submit", json=_proprietary_payload("234567890129", "Updated Name"))
+    assert second.status_code == 200
+    assert second.json()['id'] == first.json()['id']
+    assert db_session.get(UdyamRegistration, first.json()['id']).ownername == "Updated Name"
+
+def test_validate_pan_endpoint():
+    response = client.post(
+        "/validate-pan",
+        json={"pan": "ABCDE1234F", "panName": "Holder", "dob": "01/01/2000", "dobType": "DOB"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"isValid": True, "message": "PAN details are valid."}
+
+def test_draft_flow_validates_each_step_and_submits(db_session: Session):
+    draft_id = client.post("/drafts").json()["draftId"]
+
+    response = client.patch(f"/drafts/{draft_id}/aadhaar", json={"adharno": "234567890121", "ownername": "Draft Owner", "aadhaarDeclaration": True})
+    assert response.status_code == 422
+    assert "checksum failed" in response.json()['detail'][0]['msg']
+
+    response = client.patch(f"/drafts/{draft_id}/aadhaar", json={"adharno": "234567890129", "ownername": "Draft Owner", "aadhaarDeclaration": True})
+    assert response.json()["completedSteps"] == ["aadhaar"]
+    response = client.patch(f"/drafts/{draft_id}/pan", json={"organizationType": "5", "hasPan": "yes"})
+    assert response.status_code == 422
+    response = client.patch(f"/drafts/{draft_id}/pan", json={
+        "organizationType": "5", "hasPan": "yes", "pan": "ABCCE1234F", "panName": "Draft Pvt Ltd",
+        "dob": "01/04/2015", "dobType": "DOI", "panDeclaration": True,
+    })
+    assert response.json()["completedSteps"] == ["aadhaar", "pan"]
+
+    response = client.post(f"/drafts/{draft_id}/submit")
+    assert response.status_code == 422
+    assert "business" in response.json()['detail']
+
+    client.patch(f"/drafts/{draft_id}/business", json={"hasGstin": "yes", "totalTurnoverA": 5000000, "totalTurnoverB": 0})
+    assert client.get(f"/drafts/{draft_id}").json()["data"]["pan"] == "ABCCE1234F"
+    response = client.post(f"/drafts/{draft_id}/submit")
+    assert response.status_code == 200
+    registration = db_session.get(UdyamRegistration, response.json()['id'])
+    assert (registration.adharno, registration.pan, registration.totalTurnoverA) == ("234567890129", "ABCCE1234F", 5000000)
+    # Submitted drafts are discarded
+    assert client.get(f"/drafts/{draft_id}").status_code == 404
+
+def test_draft_submit_revalidates_stored_data(db_session: Session):
+    import asyncio
+    import backend.main
+    draft_id = client.post("/drafts").json()["draftId"]
+    payload = _proprietary_payload("234567890129")
+    steps = {
+        "aadhaar": {"adharno": "234567890121", "ownername": "Tampered", "aadhaarDeclaration": True},  # Fails checksum
+        "pan": {"organizationType": "1", "hasPan": "no"},
+        "business": {key: payload[key] for key in ("hasGstin", "totalTurnoverA", "totalTurnoverB")},
+    }
+    asyncio.run(backend.main.draft_store.set(draft_id, {"steps": steps}))
+    response = client.post(f"/drafts/{draft_id}/submit")
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "adharno"]
+    assert db_session.query(UdyamRegistration).count() == 0
+    # Kept, so it can be corrected
+    assert client.get(f"/drafts/{draft_id}").status_code == 200
+
+def test_unknown_draft_is_404():
+    assert client.patch("/drafts/missing/business", json={"hasGstin": "yes"}).status_code == 404
+
+def test_pincode_lookup_is_cacheable():
+    response = client.get("/pincodes/110001")
+    assert response.status_code == 200
+    assert response.json() == {"pincode": "110001", "city": "New Delhi", "state": "Delhi"}
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    cached = client.get("/pincodes/110001", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+def test_unknown_pincode_is_404():
+    assert client.get("/pincodes/999999").status_code == 404
+
+def test_metrics_exposes_routes_stages_and_validation_failures(db_session: Session):
+    client.post("/submit", json=_proprietary_payload("345678901235", "Metrics Owner"))
+    client.post("/submit", json=_proprietary_payload("345678901230", "Bad Checksum"))
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/submit",status="200"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",route="/submit"}' in body
+    assert 'validation_failures_total{route="/submit",field="adharno"}' in body
+    for stage in ("validation", "verhoeff", "duplicate_check", "insert", "commit"):
+        assert f'stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert "db_pool_checkout_seconds_count" in body
+
+def test_form_schema_export_is_revalidated_with_etag():
+    response = client.get("/form-schema")
+    assert response.status_code == 200
+    assert response.json()["fields"]["adharno"]["maxLength"] == 12
+    assert response.headers["cache-control"] == "no-cache"
+    cached = client.get("/form-schema", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+def test_idempotent_submit_retry_replays_stored_response(db_session: Session):
+    payload = _proprietary_payload("234567890129")
+    headers = {"Idempotency-Key": "retry-test-submit"}
+    first = client.post("/submit", json=payload, headers=headers)
+    retry = client.post("/submit", json=payload, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()  # Not the 409 of a second insert
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert db_session.query(UdyamRegistration).count() == 1
+    reused = client.post("/submit", json=_proprietary_payload("345678901235"), headers=headers)
+    assert reused.status_code == 422
+
+def test_registrations_are_filtered_and_paginated_by_cursor(db_session: Session, admin_client):
+    payloads = [_proprietary_payload(adharno) for adharno in ("234567890129", "345678901235", "456789012340")]
+    payloads[2]["hasGstin"] = "yes"
+    for payload in payloads:
+        assert client.post("/submit", json=payload).status_code == 200
+
+    first = admin_client.get("/registrations", params={"limit": 2}).json()
+    assert [item["adharno"] for item in first["items"]] == ["234567890129", "345678901235"]
+    # Stored compactly, reported in the form's values
+    assert (first["items"][0]["organization_type"], first["items"][0]["hasPan"], first["items"][0]["hasGstin"]) == ("1", "no", "no")
+    second = admin_client.get("/registrations", params={"limit": 2, "cursor": first["nextCursor"]}).json()
+    assert [item["adharno"] for item in second["items"]] == ["456789012340"]
+    assert second["nextCursor"] is None
+
+    assert [item["adharno"] for item in admin_client.get("/registrations", params={"hasGstin": "yes"}).json()["items"]] == ["456789012340"]
+    assert [item["adharno"] for item in admin_client.get("/registrations", params={"adharnoPrefix": "34"}).json()["items"]] == ["345678901235"]
+    assert admin_client.get("/registrations", params={"minTurnover": 2000000}).json()["items"] == []
+    assert admin_client.get("/registrations", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert admin_client.get("/registrations", params={"adharnoPrefix": "12ab"}).status_code == 422
+
+def test_registrations_export_streams_ndjson(db_session: Session, admin_client):
+    for adharno in ("234567890129", "345678901235"):
+        client.post("/submit", json=_proprietary_payload(adharno))
+    response = admin_client.get("/registrations/export", params={"organizationType": "1"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["adharno"] for line in lines] == ["234567890129", "345678901235"]
+
+def test_write_behind_submit_returns_ticket_then_stores(db_session: Session, monkeypatch, tmp_path):
+    import functools
+    import time
+    import backend.main
+    monkeypatch.setattr(backend.main, "WRITE_BEHIND", True)
+    monkeypatch.setattr(
+        backend.main, "SubmissionQueue",
+        functools.partial(backend.main.SubmissionQueue, str(tmp_path / "queue.db"), flush_interval=0.01),
+    )
+    with TestClient(app) as queued_client:
+        response = queued_client.post("/submit", json=_proprietary_payload("234567890129"))
+        assert response.status_code == 202
+        ticket = response.json()["ticket"]
+        for _ in range(200):
+            found = queued_client.get(f"/submissions/{ticket}").json()
+            if found["status"] == "stored":
+                break
+            time.sleep(0.01)
+        assert found["status"] == "stored"
+        assert db_session.get(UdyamRegistration, found["id"]).adharno == "234567890129"
+    assert backend.main.submission_queue is None
+    assert client.get(f"/submissions/{ticket}").status_code == 404
+
+def test_analytics_summary_is_maintained_on_submit(db_session: Session, admin_client):
+    payloads = [_proprietary_payload(adharno) for adharno in ("234567890129", "345678901235", "456789012340")]
+    payloads[2].update(hasGstin="yes", totalTurnoverA=60000000)
+    assert client.post("/submit", json=payloads[0]).status_code == 200
+    assert client.post("/submit/batch", json=payloads).json()["inserted"] == 2
+
+    total = admin_client.get("/analytics/summary").json()["groups"]
+    assert total == [{"registrations": 3, "withTurnover": 3,
+                      "turnover": {"sum": 62000000.0, "mean": 62000000 / 3, "min": 1000000.0, "max": 60000000.0}}]
+    by_class = admin_client.get("/analytics/summary", params={"groupBy": ["sizeClass", "hasGstin"]}).json()["groups"]
+    assert [(group["sizeClass"], group["hasGstin"], group["registrations"]) for group in by_class] == [
+        ("micro", "no", 2), ("small", "yes", 1),
+    ]
+    assert admin_client.get("/analytics/summary", params={"groupBy": "pan"}).status_code == 422
+
+def test_analytics_summary_follows_upsert_mode_submissions(db_session: Session, admin_client, monkeypatch):
+    import backend.main
+    monkeypatch.setattr(backend.main, "SUBMIT_CONFLICT_MODE", "upsert")
+    payloads = [_proprietary_payload(adharno) for adharno in ("234567890129", "345678901235")]
+    assert client.post("/submit", json=payloads[0]).status_code == 200
+    assert client.post("/submit/batch", json=payloads).json()["inserted"] == 2
+    # Replacing a registration moves it to its new group instead of counting it twice
+    payloads[0].update(hasGstin="yes", totalTurnoverA=60000000)
+    assert client.post("/submit", json=payloads[0]).status_code == 200
+
+    by_class = admin_client.get("/analytics/summary", params={"groupBy": ["sizeClass", "hasGstin"]}).json()["groups"]
+    assert [(group["sizeClass"], group["hasGstin"], group["registrations"], group["turnover"]["sum"])
+            for group in by_class] == [("micro", "no", 1, 1000000.0), ("small", "yes", 1, 60000000.0)]
+
+@pytest.mark.parametrize("turnover", [1e20, "inf", "nan", -5])
+def test_submit_rejects_turnover_the_column_cannot_hold(turnover):
+    payload = _proprietary_payload("234567890129")
+    payload["totalTurnoverA"] = turnover
+    response = client.post("/submit", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "totalTurnoverA"]
+
+def test_submit_rejects_invalid_optional_dob():
+    # A proprietor's PAN details are optional, but a date that is given must be valid
+    payload = _proprietary_payload("234567890129")
+    payload.update(hasPan="yes", dob="31/02/2020")
+    response = client.post("/submit", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "dob"]
+
+@pytest.mark.parametrize("path", ["/registrations", "/registrations/export", "/analytics/summary"])
+def test_admin_endpoints_require_a_token(db_session: Session, admin_client, path):
+    assert admin_client.get(path).status_code == 200
+    response = client.get(path)
+    assert response.status_code == 401 and response.headers["www-authenticate"] == "Bearer"
+    assert client.get(path, headers={"Authorization": "Bearer wrong-token"}).status_code == 401
@@ -0,0 +1,50 @@
+# test_metrics.py (Pytest for the metrics registry)
+from backend.metrics import Counter, Histogram, Registry, record_validation_errors, validation_failures_total
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("job_seconds", "Job time.", ("job",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5, "a")
+    lines = histogram.render()
+    assert 'job_seconds_bucket{job="a",le="0.1"} 1' in lines
+    assert 'job_seconds_bucket{job="a",le="1"} 2' in lines
+    assert 'job_seconds_bucket{job="a",le="+Inf"} 3' in lines
+    assert 'job_seconds_count{job="a"} 3' in lines
+    assert 'job_seconds_sum{job="a"} 5.55' in lines
+
+def test_counter_escapes_label_values():
+    counter = Counter("events_total", "Events.", ("name",))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    assert counter.render()[-1] == 'events_total{name="say \\"hi\\""} 3'
+
+def test_validation_errors_are_counted_by_field():
+    record_validation_errors("/test", [
+        {"loc": ("body", "adharno"), "msg": "bad"},
+        {"loc": ("body", 12), "msg": "JSON decode error"},
+        {"loc": ("pan",), "msg": "bad"},
+    ])
+    assert validation_failures_total.values[("/test", "adharno")] == 1
+    assert validation_failures_total.values[("/test", "body")] == 1
+    assert validation_failures_total.values[("/test", "pan")] == 1
+
+def test_workers_sharing_a_directory_report_their_totals(tmp_path):
+    workers = []
+    for worker_id in ("1", "2"):
+        registry = Registry(str(tmp_path), worker_id=worker_id)
+        counter = registry.register(Counter("events_total", "Events.", ("name",)))
+        histogram = registry.register(Histogram("job_seconds", "Job time.", buckets=(1.0,)))
+        workers.append((registry, counter, histogram))
+    workers[0][1].inc("a")
+    workers[0][2].observe(0.5)
+    workers[1][1].inc("a", amount=2)
+    workers[1][1].inc("b")
+    workers[1][2].observe(5)
+    workers[1][0].write_snapshot()
+
+    lines = workers[0][0].render().splitlines()
+    assert 'events_total{name="a"} 3' in lines and 'events_total{name="b"} 1' in lines
+    assert 'job_seconds_bucket{le="1"} 1' in lines and "job_seconds_count 2" in lines
+    # The registry's own values are untouched
+    assert workers[0][1].values == {("a",): 1}
@@ -0,0 +1,90 @@
+# test_migrate_compact.py (Pytest for the compact schema migration)
+import datetime
+
+import pytest
+from sqlalchemy import MetaData, create_engine, inspect, select
+
+from backend.database import UdyamRegistration, create_tables, needs_compact_migration
+from backend.migrate_compact import REBUILD_TABLE, MigrationError, find_unconvertible, legacy_table, migrate
+
+LEGACY_ROWS = [
+    dict(adharno="234567890129", ownername="Company Owner", organization_type="5", pan="ABCDE1234F",
+         pan_name="COMPANY OWNER", dob="15/05/1980", aadhaarDeclaration=True, hasPan="yes", dobType="DOI",
+         panDeclaration=True, hasGstin="no", totalTurnoverA=1234.567, totalTurnoverB=0.0),
+    dict(adharno="345678901235", ownername="Proprietor", organization_type="1", pan=None, pan_name=None,
+         dob="", aadhaarDeclaration=True, hasPan="no", dobType=None, panDeclaration=None,
+         hasGstin=None, totalTurnoverA=None, totalTurnoverB=None),
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    metadata = MetaData()
+    legacy = legacy_table(metadata)
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(legacy.insert(), LEGACY_ROWS)
+    yield engine
+    engine.dispose()
+
+
+def test_legacy_table_is_converted_in_place(legacy_engine):
+    with legacy_engine.begin() as connection:
+        with pytest.raises(RuntimeError):
+            create_tables(connection)  # Startup refuses to run on the old layout
+        report = migrate(connection)
+    assert report["migrated"]
+
+    with legacy_engine.connect() as connection:
+        assert not needs_compact_migration(connection)
+        company, proprietor = connection.execute(select(UdyamRegistration.__table__).order_by("id")).all()
+    assert (company.organization_type, company.hasPan, company.hasGstin) == (5, True, False)
+    assert company.dob == datetime.date(1980, 5, 15)
+    assert company.totalTurnoverA == pytest.approx(1234.57)
+    assert company.registered_on is not None
+    assert (proprietor.dob, proprietor.hasGstin, proprietor.totalTurnoverA) == (None, None, None)
+
+    with legacy_engine.begin() as connection:
+        assert migrate(connection) == {"migrated": False}
+
+
+@pytest.mark.parametrize("column, value", [
+    ("hasPan", "maybe"),
+    # A proprietor's optional date was never validated
+    ("dob", "31/02/2020"),
+    ("totalTurnoverA", 1e20),
+    ("totalTurnoverB", -5.0),
+    ("totalTurnoverA", float("inf")),
+])
+def test_unconvertible_values_abort_the_migration(legacy_engine, column, value):
+    legacy = legacy_table()
+    with legacy_engine.begin() as connection:
+        connection.execute(legacy.update().where(legacy.c.adharno == "345678901235").values({column: value}))
+        assert find_unconvertible(connection)[column] == [2]
+    with pytest.raises(MigrationError):
+        with legacy_engine.begin() as connection:
+            migrate(connection)
+    with legacy_engine.connect() as connection:
+        assert needs_compact_migration(connection)
+        dob, turnover_b = connection.execute(select(legacy.c.dob, legacy.c.totalTurnoverB).where(legacy.c.id == 2)).one()
+    # Nothing was rewritten
+    assert (dob, turnover_b) == (value if column == "dob" else "", value if column == "totalTurnoverB" else None)
+
+
+def test_a_rebuild_that_fails_partway_leaves_the_table_untouched(legacy_engine, monkeypatch):
+    import backend.migrate_compact
+
+    def fail(connection):
+        raise RuntimeError("killed after the rename")
+
+    monkeypatch.setattr(backend.migrate_compact, "create_tables", fail)
+    with pytest.raises(RuntimeError):
+        with legacy_engine.begin() as connection:
+            migrate(connection)
+    with legacy_engine.connect() as connection:
+        assert needs_compact_migration(connection)
+        assert connection.execute(select(legacy_table().c.adharno).order_by("id")).scalars().all() == [
+            row["adharno"] for row in LEGACY_ROWS
+        ]
+        assert not inspect(connection).has_table(REBUILD_TABLE)
@@ -0,0 +1,101 @@
+# test_pan_verification.py (Pytest for the PAN verification service)
+import asyncio
+
+import httpx
+import pytest
+
+from backend import mock_pan_server
+from backend.cache import TTLCache
+from backend.pan_verification import (
+    CachingPanVerifier,
+    HttpPanVerifier,
+    PanVerificationError,
+    PanVerifier,
+    TokenBucket,
+)
+
+@pytest.fixture
+def mock_server():
+    mock_pan_server.app.state.calls = 0
+    mock_pan_server.app.state.latency_ms = 20
+    return mock_pan_server.app
+
+def http_verifier(app, **kwargs):
+    return CachingPanVerifier(
+        HttpPanVerifier("http://mock-pan", transport=httpx.ASGITransport(app=app)), **kwargs
+    )
+
+def test_http_verifier_caches_results(mock_server):
+    async def scenario():
+        verifier = http_verifier(mock_server)
+        first = await verifier.verify("ABCDE1234F", "Holder", "01/01/2000", "DOB")
+        second = await verifier.verify("ABCDE1234F", "Holder", "01/01/2000", "DOB")
+        invalid = await verifier.verify("AAAAA0000A", "Holder", "01/01/2000", "DOB")
+        await verifier.aclose()
+        return verifier, first, second, invalid
+
+    verifier, first, second, invalid = asyncio.run(scenario())
+    assert first.is_valid and second is first
+    assert not invalid.is_valid
+    assert mock_server.state.calls == 2
+    assert verifier.cache.hit_rate == pytest.approx(1 / 3)
+
+def test_concurrent_identical_lookups_are_coalesced(mock_server):
+    async def scenario():
+        verifier = http_verifier(mock_server)
+        results = await asyncio.gather(*(verifier.verify("ABCDE1234F", "Holder", "01/01/2000", "DOB") for _ in range(20)))
+        await verifier.aclose()
+        return verifier, results
+
+    verifier, results = asyncio.run(scenario())
+    assert all(result.is_valid for result in results)
+    assert verifier.upstream_calls == 1
+    assert mock_server.state.calls == 1
+
+def test_backend_errors_are_not_cached():
+    async def scenario():
+        verifier = CachingPanVerifier(HttpPanVerifier("http://mock-pan", transport=httpx.MockTransport(lambda request: httpx.Response(502))))
+        with pytest.raises(PanVerificationError):
+            await verifier.verify("ABCDE1234F", "Holder", "01/01/2000", "DOB")
+        await verifier.aclose()
+        return verifier
+
+    assert len(asyncio.run(scenario()).cache) == 0
+
+@pytest.mark.parametrize("body", [
+    [], ["isValid"], "valid", None, 1,
+    {"isValid": "false"}, {"isValid": "no"}, {"isValid": 1}, {"message": "PAN details are valid."},
+])
+def test_malformed_responses_are_upstream_errors(body):
+    async def scenario():
+        verifier = HttpPanVerifier("http://mock-pan", transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body)))
+        try:
+            await verifier.verify("ABCDE1234F", "Holder", "01/01/2000", "DOB")
+        finally:
+            await verifier.aclose()
+
+    with pytest.raises(PanVerificationError):
+        asyncio.run(scenario())
+
+def test_pan_verifier_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PanVerifier()
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # Evicts "b", the least recently used
+    assert "b" not in cache and cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+
+def test_token_bucket_limits_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0
+    with pytest.raises(PanVerificationError):
+        asyncio.run(bucket.acquire(max_wait=0.1))
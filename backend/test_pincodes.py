@@ -0,0 +1,44 @@
+# test_pincodes.py (Pytest for the pincode index)
+from backend.pincodes import PincodeIndex, convert_directory, get_pincode_index
+
+def test_lookup_uses_sorted_arrays_and_shared_places():
+    index = PincodeIndex.from_rows([
+        ("400001", "Mumbai", "Maharashtra"),
+        ("110001", "New Delhi", "Delhi"),
+        ("400050", "Mumbai", "Maharashtra"),
+    ], version="v1")
+    assert list(index.pincodes) == [110001, 400001, 400050]
+    assert len(index.places) == 2
+    assert index.lookup("400050") == ("Mumbai", "Maharashtra")
+    assert index.lookup("110001") == ("New Delhi", "Delhi")
+
+def test_lookup_misses():
+    index = PincodeIndex.from_rows([("110001", "New Delhi", "Delhi")])
+    assert index.lookup("110002") is None
+    assert index.lookup("999999") is None
+    assert index.lookup("000001") is None
+    assert index.lookup("11000") is None
+    assert index.lookup("11000a") is None
+
+def test_bundled_data_loads():
+    index = get_pincode_index()
+    assert len(index) > 0
+    assert index.lookup("560001") == ("Bengaluru", "Karnataka")
+    assert index.etag("560001") == f'"{index.version}-560001"'
+
+def test_convert_directory(tmp_path):
+    source = tmp_path / "directory.csv"
+    source.write_text(
+        "circlename,regionname,divisionname,officename,pincode,officetype,delivery,district,statename,latitude,longitude\n"
+        "Delhi Circle,Delhi,New Delhi Central,Connaught Place S.O,110001,S.O,Non Delivery,CENTRAL DELHI,DELHI,,\n"
+        "Delhi Circle,Delhi,New Delhi Central,New Delhi G.P.O.,110001,H.O,Delivery,NEW DELHI,DELHI,,\n"
+        "Delhi Circle,Delhi,New Delhi Central,Sansad Marg H.O,110001,H.O,Delivery,CENTRAL DELHI,DELHI,,\n"
+        "Karnataka Circle,Bangalore HQ,Bangalore GPO,Bangalore G.P.O.,560001,H.O,Delivery,BENGALURU,KARNATAKA,,\n"
+        "Broken,,,Nowhere,56000,B.O,Delivery,NOWHERE,NOWHERE,,\n",
+        encoding="utf-8",
+    )
+    destination = tmp_path / "pincodes.csv"
+    assert convert_directory(str(source), str(destination)) == 2
+    index = PincodeIndex.load(str(destination))
+    assert index.lookup("110001") == ("New Delhi", "Delhi")
+    assert index.lookup("560001") == ("Bengaluru", "Karnataka")
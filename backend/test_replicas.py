@@ -0,0 +1,110 @@
+# test_replicas.py (Pytest for read replica routing, with SQLite files as primary and replicas)
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import backend.replicas
+from backend.database import Base, UdyamRegistration, to_async_url
+from backend.replicas import PRIMARY_COOKIE, ReadYourWritesMiddleware, ReplicaRouter, get_read_db
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """URLs of SQLite files each holding one registration named after the file."""
+    urls = {}
+    for name in ("primary", "replica1", "replica2"):
+        url = f"sqlite:///{tmp_path / name}.db"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(insert(UdyamRegistration), {"adharno": name, "ownername": name})
+        engine.dispose()
+        urls[name] = url
+    # A replica that cannot be reached: its directory does not exist
+    urls["down"] = f"sqlite:///{tmp_path / 'missing' / 'down.db'}"
+    return urls
+
+
+@pytest.fixture
+def make_router(databases):
+    routers, engines = [], []
+
+    def make(*names, **options):
+        engine = create_async_engine(to_async_url(databases["primary"]))
+        engines.append(engine)
+        primary = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        router = ReplicaRouter([databases[name] for name in names], primary=primary, **options)
+        routers.append(router)
+        return router
+
+    yield make
+
+    async def dispose():
+        for router in routers:
+            await router.reset()
+        for engine in engines:
+            await engine.dispose()
+    asyncio.run(dispose())
+
+
+async def served_by(router, primary=False) -> str:
+    async with router.session(primary=primary) as session:
+        return (await session.execute(select(UdyamRegistration.ownername))).scalar_one()
+
+
+def test_reads_rotate_over_replicas_and_writes_stay_on_primary(make_router):
+    router = make_router("replica1", "replica2")
+
+    async def scenario():
+        return [await served_by(router) for _ in range(4)] + [await served_by(router, primary=True)]
+
+    assert asyncio.run(scenario()) == ["replica1", "replica2", "replica1", "replica2", "primary"]
+
+
+def test_unreachable_replica_is_skipped_until_retry(make_router, clock):
+    router = make_router("down", "replica1", retry_after=30, clock=clock)
+
+    async def scenario():
+        served = [await served_by(router) for _ in range(3)]
+        healthy = router.healthy()
+        clock.now = 31
+        # Tried again after retry_after (on its next turn), still down, failed over again
+        served += [await served_by(router) for _ in range(2)]
+        return served, healthy, router.healthy()
+
+    served, healthy_after_failure, healthy_after_retry = asyncio.run(scenario())
+    assert served == ["replica1"] * 5
+    assert (healthy_after_failure, healthy_after_retry) == (1, 1)
+    assert router.replicas[0].failed_until == 61
+
+
+def test_reads_fall_back_to_primary_without_healthy_replicas(make_router):
+    assert asyncio.run(served_by(make_router("down"))) == "primary"
+    assert asyncio.run(served_by(make_router())) == "primary"
+
+
+def test_client_reads_its_own_writes_from_primary(make_router, monkeypatch):
+    monkeypatch.setattr(backend.replicas, "replica_router", make_router("replica1"))
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window=5)
+
+    @app.post("/write")
+    async def write():
+        return {"ok": True}
+
+    @app.get("/read")
+    async def read(db: AsyncSession = Depends(get_read_db)):
+        return {"served_by": (await db.execute(select(UdyamRegistration.ownername))).scalar_one()}
+
+    with TestClient(app) as client:
+        assert client.get("/read").json() == {"served_by": "replica1"}
+        response = client.post("/write")
+        assert PRIMARY_COOKIE in response.cookies
+        assert client.get("/read").json() == {"served_by": "primary"}
+        # Once the window has passed, reads go back to the replicas
+        client.cookies.set(PRIMARY_COOKIE, "1.0")
+        assert client.get("/read").json() == {"served_by": "replica1"}
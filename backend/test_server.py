@@ -0,0 +1,54 @@
+# test_server.py (Pytest for the server entry point)
+import pytest
+
+from backend import server
+
+
+def test_worker_count_defaults_to_usable_cores():
+    assert server.worker_count(None) == server.usable_cores()
+    assert server.worker_count("") >= 1
+
+
+def test_worker_count_from_environment():
+    assert server.worker_count("4") == 4
+    with pytest.raises(ValueError):
+        server.worker_count("0")
+
+
+@pytest.fixture
+def run_calls(monkeypatch, tmp_path):
+    monkeypatch.setenv("METRICS_MULTIPROCESS_DIR", str(tmp_path / "metrics"))
+    calls = {}
+    monkeypatch.setattr(server, "prepare_database", lambda: calls.setdefault("prepared", True))
+    monkeypatch.setattr(server.uvicorn, "run", lambda app, **kwargs: calls.update(app=app, **kwargs))
+    return calls
+
+
+def test_main_prepares_database_and_runs_workers(monkeypatch, run_calls):
+    calls = run_calls
+    monkeypatch.setenv("DRAFT_STORE_URL", "redis://redis:6379/0")
+    monkeypatch.setenv("IDEMPOTENCY_STORE_URL", "redis://redis:6379/1")
+    assert server.main(["--workers", "3", "--port", "9000"]) == 0
+    assert calls["prepared"]
+    assert calls["app"] == "backend.main:app"
+    assert calls["workers"] == 3 and calls["port"] == 9000
+    assert calls["timeout_graceful_shutdown"] == server.GRACEFUL_SHUTDOWN_TIMEOUT
+
+
+def test_main_runs_one_worker_without_shared_stores(monkeypatch, run_calls):
+    monkeypatch.setenv("DRAFT_STORE_URL", "redis://redis:6379/0")
+    monkeypatch.delenv("IDEMPOTENCY_STORE_URL", raising=False)
+    assert server.unshared_stores() == ["IDEMPOTENCY_STORE_URL"]
+    assert server.main(["--workers", "4"]) == 0
+    assert run_calls["workers"] == 1
+
+
+def test_workers_share_a_fresh_metrics_directory(monkeypatch, run_calls, tmp_path):
+    monkeypatch.setenv("DRAFT_STORE_URL", "redis://redis:6379/0")
+    monkeypatch.setenv("IDEMPOTENCY_STORE_URL", "redis://redis:6379/1")
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "worker-123.json").write_text("{}")
+    assert server.main(["--workers", "2"]) == 0
+    assert list(directory.iterdir()) == []
+    assert server.os.environ["METRICS_MULTIPROCESS_DIR"] == str(directory)
@@ -0,0 +1,79 @@
+# test_verhoeff.py (Pytest for the Verhoeff engine)
+import random
+
+import pytest
+
+from backend.verhoeff import Verhoeff, verhoeff, validate_many, generate_many
+
+# Reference implementation: the textbook nested-table form of the algorithm
+MUL = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5], [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
+    [3, 4, 0, 1, 2, 8, 9, 5, 6, 7], [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3], [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
+    [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+PER = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4], [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
+    [8, 9, 1, 6, 0, 4, 3, 5, 2, 7], [9, 4, 5, 3, 1, 2, 6, 8, 7, 0], [4, 2, 8, 7, 6, 5, 9, 3, 0, 1],
+    [2, 7, 9, 3, 8, 0, 1, 5, 4, 6], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+INV = [0, 4, 3, 2, 1, 5, 6, 7, 8, 9]
+
+def reference_checksum(num_str, offset):
+    c = 0
+    for i, item in enumerate(reversed(num_str)):
+        c = MUL[c][PER[(i + offset) % 8][int(item)]]
+    return c
+
+def random_numbers(count, width, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choices("0123456789", k=width)) for _ in range(count)]
+
+def test_matches_reference_implementation():
+    for number in random_numbers(500, 12):
+        assert verhoeff.validate(number) == (reference_checksum(number, 0) == 0)
+    for base in random_numbers(500, 11):
+        assert verhoeff.generate(base) == INV[reference_checksum(base, 1)]
+
+def test_accepts_bytes_and_memoryview():
+    base = "23456789012"
+    number = base + str(verhoeff.generate(base))
+    assert verhoeff.validate(number.encode())
+    assert verhoeff.validate(memoryview(number.encode()))
+    assert Verhoeff().validate(bytearray(number.encode()))
+
+def test_rejects_non_digits():
+    with pytest.raises(ValueError):
+        verhoeff.validate("23456789012A")
+
+def test_validate_many_matches_scalar_for_strings_bytes_and_ints():
+    np = pytest.importorskip("numpy")
+    bases = random_numbers(1000, 11, seed=11)
+    valid = [base + str(verhoeff.generate(base)) for base in bases]
+    corrupted = [number[:-1] + str((int(number[-1]) + 1) % 10) for number in valid[:500]]
+    numbers = valid + corrupted
+    expected = np.array([verhoeff.validate(number) for number in numbers])
+
+    assert expected[:1000].all() and not expected[1000:].any()
+    assert (validate_many(np.array(numbers)) == expected).all()
+    assert (validate_many(np.array(numbers, dtype="S12")) == expected).all()
+    assert (validate_many(np.array([int(n) for n in numbers], dtype=np.int64)) == expected).all()
+
+def test_validate_many_flags_malformed_entries():
+    np = pytest.importorskip("numpy")
+    result = validate_many(np.array(["234567890129", "23456789012", "2345678901A9", "2345678901299"]))
+    assert result.tolist() == [True, False, False, False]
+
+def test_validate_many_flags_non_ascii_entries():
+    pytest.importorskip("numpy")
+    # Devanagari digits for 234567890129, and a typographic apostrophe
+    result = validate_many(["२३४५६७८९०१२९", "234567890129", "23456789012’", ""])
+    assert result.tolist() == [False, True, False, False]
+
+def test_generate_many_matches_scalar():
+    np = pytest.importorskip("numpy")
+    bases = random_numbers(1000, 11, seed=3)
+    expected = [verhoeff.generate(base) for base in bases]
+    assert generate_many(np.array(bases)).tolist() == expected
+    with pytest.raises(ValueError):
+        generate_many(np.array(["123"]))
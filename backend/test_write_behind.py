@@ -0,0 +1,174 @@
+# test_write_behind.py (Pytest for the write-behind submission queue)
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.database import Base
+from backend.schemas import UdyamFormRequest
+from backend.write_behind import (
+    DUPLICATE_MESSAGE,
+    FAILED,
+    FLUSHING,
+    MAINTENANCE_INTERVAL,
+    QUEUED,
+    REJECTED,
+    STORED,
+    WRITE_BEHIND_CLAIM_TIMEOUT,
+    SubmissionQueue,
+)
+
+
+def _form(adharno: str) -> UdyamFormRequest:
+    return UdyamFormRequest(
+        adharno=adharno, ownername="Queued Proprietor", aadhaarDeclaration=True, organizationType="1",
+        hasPan="no", hasGstin="no", totalTurnoverA=1000000, totalTurnoverB=0,
+    )
+
+
+def enqueue(queue: SubmissionQueue, form: UdyamFormRequest) -> dict:
+    return asyncio.run(queue.enqueue(form))
+
+
+def test_enqueue_commits_off_the_event_loop(tmp_path):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"))
+    append, threads = queue._append, []
+
+    def recording_append(*args):
+        threads.append(threading.current_thread())
+        append(*args)
+
+    queue._append = recording_append
+    ticket = enqueue(queue, _form("234567890129"))["ticket"]
+    assert threads and threads[0] is not threading.main_thread()
+    assert queue.status(ticket)["status"] == QUEUED
+    queue.close()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'registrations.db'}")
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_flush_stores_batch_and_rejects_duplicates(tmp_path, session_factory):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), batch_size=10)
+    tickets = [enqueue(queue, _form(adharno))["ticket"] for adharno in ("234567890129", "345678901235", "234567890129")]
+    assert queue.depth() == 3
+    stored = []
+
+    assert asyncio.run(queue.flush_due(session_factory, stored.extend))
+    statuses = [queue.status(ticket) for ticket in tickets]
+    assert [status["status"] for status in statuses] == [STORED, STORED, REJECTED]
+    assert statuses[0]["id"] is not None and statuses[2]["id"] is None
+    assert [row["adharno"] for row in stored] == ["234567890129", "345678901235"]
+    assert queue.depth() == 0
+    assert queue.status("unknown") is None
+
+
+def test_failed_batches_back_off_then_fail(tmp_path, clock):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_delay=1, clock=clock)
+    ticket = enqueue(queue, _form("234567890129"))["ticket"]
+
+    def broken_session():
+        raise ConnectionError("database is down")
+
+    assert asyncio.run(queue.flush_due(broken_session))
+    assert queue.status(ticket)["status"] == QUEUED
+    assert queue.claim() == []  # Not due until the retry delay has passed
+    clock.now += 1
+    assert asyncio.run(queue.flush_due(broken_session))
+    found = queue.status(ticket)
+    assert found["status"] == FAILED and "database is down" in found["error"]
+
+
+def test_stale_claims_are_requeued_and_reconciled(tmp_path, session_factory, clock):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), clock=clock)
+    ticket = enqueue(queue, _form("234567890129"))["ticket"]
+    batch = queue.claim()
+    # The batch reaches the database, but the worker dies before recording the outcome
+    async def insert_only():
+        async with session_factory() as db:
+            await db.execute(Base.metadata.tables["udyam_registrations"].insert().values(batch[0][2]))
+            await db.commit()
+
+    asyncio.run(insert_only())
+    assert queue.status(ticket)["status"] == FLUSHING
+    clock.now += 301
+    assert queue.requeue_stale(timeout=300) == 1
+
+    asyncio.run(queue.flush_due(session_factory))
+    found = queue.status(ticket)
+    assert found["status"] == STORED and found["id"] is not None
+
+
+def test_running_flusher_requeues_stale_claims(tmp_path, clock):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), clock=clock)
+    ticket = enqueue(queue, _form("234567890129"))["ticket"]
+    queue.maintain()
+    queue.claim()  # By a flusher that then stops
+    clock.now += MAINTENANCE_INTERVAL
+    queue.maintain()
+    assert queue.status(ticket)["status"] == FLUSHING
+    clock.now += WRITE_BEHIND_CLAIM_TIMEOUT
+    queue.maintain()
+    assert queue.status(ticket)["status"] == QUEUED
+
+
+def test_queue_survives_reopening(tmp_path):
+    path = str(tmp_path / "queue.db")
+    ticket = enqueue(SubmissionQueue(path), _form("234567890129"))["ticket"]
+    reopened = SubmissionQueue(path)
+    assert reopened.status(ticket)["status"] == QUEUED
+    assert [claimed[1] for claimed in reopened.claim()] == [ticket]
+
+
+def test_a_refused_row_fails_alone(tmp_path, session_factory):
+    # In upsert mode a PAN held by another Aadhaar number makes the whole INSERT fail
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), conflict_mode="upsert")
+    with_pan = _form("234567890129").model_copy(update=dict(
+        hasPan="yes", pan="ABCDE1234F", panName="Holder", dob="01/01/1990", dobType="DOB", panDeclaration=True,
+    ))
+    enqueue(queue, with_pan)
+    asyncio.run(queue.flush_due(session_factory))
+
+    conflicting = with_pan.model_copy(update=dict(adharno="345678901235"))
+    tickets = [enqueue(queue, form)["ticket"] for form in (_form("456789012340"), conflicting, _form("567890123458"))]
+    stored = []
+    assert asyncio.run(queue.flush_due(session_factory, stored.extend))
+    assert [queue.status(ticket)["status"] for ticket in tickets] == [STORED, REJECTED, STORED]
+    assert [row["adharno"] for row in stored] == ["456789012340", "567890123458"]
+
+
+def test_a_refused_single_row_is_rejected_without_retries(tmp_path, session_factory):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), conflict_mode="upsert")
+    with_pan = _form("234567890129").model_copy(update=dict(
+        hasPan="yes", pan="ABCDE1234F", panName="Holder", dob="01/01/1990", dobType="DOB", panDeclaration=True,
+    ))
+    enqueue(queue, with_pan)
+    asyncio.run(queue.flush_due(session_factory))
+
+    ticket = enqueue(queue, with_pan.model_copy(update=dict(adharno="345678901235")))["ticket"]
+    assert asyncio.run(queue.flush_due(session_factory))
+    found = queue.status(ticket)
+    assert found["status"] == REJECTED and found["error"] == DUPLICATE_MESSAGE
+    assert queue.depth() == 0
+
+
+def test_rows_are_requeued_when_the_database_goes_away(tmp_path, clock):
+    queue = SubmissionQueue(str(tmp_path / "queue.db"), retry_delay=1, clock=clock)
+    tickets = [enqueue(queue, _form(adharno))["ticket"] for adharno in ("234567890129", "345678901235")]
+
+    def broken_session():
+        raise ConnectionError("database is down")
+
+    assert asyncio.run(queue.flush_due(broken_session))
+    assert [queue.status(ticket)["status"] for ticket in tickets] == [QUEUED, QUEUED]
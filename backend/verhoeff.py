@@ -0,0 +1,155 @@
+# verhoeff.py (Verhoeff Algorithm for Aadhaar Checksum)
+#
+# The dihedral multiplication and permutation tables are combined once, at
+# import time, into a single flattened step table indexed by
+# (position % 8, running checksum, digit), so checking a number is one byte
+# lookup per digit. validate_many / generate_many run the same table over
+# NumPy arrays for audits over millions of stored numbers.
+
+_MULTIPLICATION = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+    (1, 2, 3, 4, 0, 6, 7, 8, 9, 5),
+    (2, 3, 4, 0, 1, 7, 8, 9, 5, 6),
+    (3, 4, 0, 1, 2, 8, 9, 5, 6, 7),
+    (4, 0, 1, 2, 3, 9, 5, 6, 7, 8),
+    (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+    (6, 5, 9, 8, 7, 1, 0, 4, 3, 2),
+    (7, 6, 5, 9, 8, 2, 1, 0, 4, 3),
+    (8, 7, 6, 5, 9, 3, 2, 1, 0, 4),
+    (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+)
+_PERMUTATION = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+    (1, 5, 7, 6, 2, 8, 3, 0, 9, 4),
+    (5, 8, 0, 3, 7, 9, 6, 1, 4, 2),
+    (8, 9, 1, 6, 0, 4, 3, 5, 2, 7),
+    (9, 4, 5, 3, 1, 2, 6, 8, 7, 0),
+    (4, 2, 8, 7, 6, 5, 9, 3, 0, 1),
+    (2, 7, 9, 3, 8, 0, 1, 5, 4, 6),
+    (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+)
+_INVERSE = bytes((0, 4, 3, 2, 1, 5, 6, 7, 8, 9))
+
+# _STEP[position * 100 + checksum * 10 + digit] -> next checksum
+_STEP = bytes(
+    _MULTIPLICATION[checksum][_PERMUTATION[position][digit]]
+    for position in range(8)
+    for checksum in range(10)
+    for digit in range(10)
+)
+# ASCII '0'-'9' -> 0-9, applied with bytes.translate
+_ASCII_TO_DIGIT = bytes.maketrans(b"0123456789", bytes(range(10)))
+
+
+def _digits(number) -> bytes:
+    """
+    Returns the digit values of `number` (str or bytes-like) as raw bytes,
+    least significant digit first.
+    """
+    if isinstance(number, str):
+        try:
+            raw = number.encode("ascii")
+        except UnicodeEncodeError:
+            # Non-ASCII decimal digits (e.g. Devanagari) are normalised first
+            raw = "".join(str(int(char)) for char in number).encode("ascii")
+    else:
+        raw = bytes(memoryview(number))
+    if not raw.isdigit():
+        raise ValueError(f"Verhoeff input must contain only digits: {number!r}")
+    return raw.translate(_ASCII_TO_DIGIT)[::-1]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("validate_many / generate_many require numpy (pip install numpy).") from e
+    return numpy
+
+
+class Verhoeff:
+    """
+    Verhoeff checksum engine. Stateless; use the module-level `verhoeff`
+    instance rather than constructing one per call.
+    """
+
+    def validate(self, num_str) -> bool:
+        c = 0
+        step = _STEP
+        for i, digit in enumerate(_digits(num_str)):
+            c = step[(i & 7) * 100 + c * 10 + digit]
+        return c == 0
+
+    def generate(self, num_str) -> int:
+        c = 0
+        step = _STEP
+        for i, digit in enumerate(_digits(num_str)):
+            c = step[((i + 1) & 7) * 100 + c * 10 + digit]
+        return _INVERSE[c]
+
+    def validate_many(self, numbers, width: int = 12):
+        """
+        Vectorised validate over an array of numbers, given as strings/bytes
+        or as integers (which are zero-padded to `width` digits). Returns a
+        boolean array; entries that are not exactly `width` digits are False.
+        """
+        digits, well_formed = self._digit_matrix(numbers, width)
+        return (self._run(digits, offset=0) == 0) & well_formed
+
+    def generate_many(self, numbers, width: int = 11):
+        """
+        Vectorised generate: the check digit for each `width`-digit number.
+        Raises ValueError if any entry is not exactly `width` digits.
+        """
+        np = _numpy()
+        digits, well_formed = self._digit_matrix(numbers, width)
+        if not well_formed.all():
+            bad = np.flatnonzero(~well_formed)[:5].tolist()
+            raise ValueError(f"generate_many expects {width}-digit numbers; malformed entries at {bad}")
+        return np.frombuffer(_INVERSE, dtype=np.uint8)[self._run(digits, offset=1)]
+
+    @staticmethod
+    def _run(digits, offset: int):
+        np = _numpy()
+        step = np.frombuffer(_STEP, dtype=np.uint8).astype(np.intp)
+        width = digits.shape[1]
+        c = np.zeros(digits.shape[0], dtype=np.intp)
+        for i in range(width):
+            c = step[((i + offset) & 7) * 100 + c * 10 + digits[:, width - 1 - i]]
+        return c
+
+    @staticmethod
+    def _digit_matrix(numbers, width: int):
+        """
+        Converts numbers into an (n, width) matrix of digit values plus a mask
+        of entries that really are `width` decimal digits.
+        """
+        np = _numpy()
+        array = np.asarray(numbers)
+        if array.ndim != 1:
+            array = array.reshape(-1)
+        if array.dtype.kind in "iu":
+            values = array.astype(np.int64)
+            powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+            digits = (values[:, None] // powers) % 10
+            return digits.astype(np.intp), (values >= 0) & (values < 10 ** width)
+        encodable = True
+        if array.dtype.kind == "U":
+            # Entries with non-ASCII characters (Devanagari digits, a stray "’") cannot be
+            # encoded; they are blanked here and reported as not well formed
+            code_points = np.ascontiguousarray(array).reshape(-1, 1).view(np.uint32)
+            encodable = (code_points < 128).all(axis=1)
+            array = np.char.encode(np.where(encodable, array, ""), "ascii")
+        if array.dtype.kind != "S":
+            raise TypeError(f"Unsupported dtype for Verhoeff batch: {array.dtype}")
+        lengths = np.char.str_len(array)
+        raw = np.frombuffer(array.astype(f"S{width}").tobytes(), dtype=np.uint8).reshape(-1, width)
+        digits = raw - np.uint8(ord("0"))  # non-digits wrap around to values > 9
+        well_formed = encodable & (lengths == width) & (digits <= 9).all(axis=1)
+        return np.where(digits <= 9, digits, 0).astype(np.intp), well_formed
+
+
+# Shared, precomputed engine
+verhoeff = Verhoeff()
+validate_many = verhoeff.validate_many
+generate_many = verhoeff.generate_many
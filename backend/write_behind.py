@@ -0,0 +1,340 @@
+# write_behind.py (Write-Behind Queue for /submit)
+#
+# With WRITE_BEHIND enabled, a validated registration is appended to a local
+# SQLite queue (WAL journal) and acknowledged with a ticket right away; the
+# database commit moves off the request path. A background flusher claims
+# queued rows in batches, writes each batch with one multi-row
+# INSERT ... RETURNING, and records the outcome per ticket, which clients
+# look up with GET /submissions/{ticket}. A batch the database refuses is
+# written again row by row, so only the offending rows fail; batches that
+# could not be written at all are retried with exponential backoff. Several workers can share one queue file: claiming a
+# batch is a single UPDATE ... RETURNING, so no row is flushed twice at once.
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .analytics import store_registrations
+from .database import UdyamRegistration
+from .schemas import UdyamFormRequest, registration_row
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_QUEUE_FILE = os.getenv("WRITE_BEHIND_QUEUE_FILE", "./write_behind_queue.db")
+# Largest batch per INSERT, and the longest an idle flusher sleeps before looking again (seconds)
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.05"))
+# Attempts per batch before its tickets are marked failed; retries back off from WRITE_BEHIND_RETRY_DELAY seconds
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "8"))
+WRITE_BEHIND_RETRY_DELAY = float(os.getenv("WRITE_BEHIND_RETRY_DELAY", "0.5"))
+# FULL syncs the WAL on every enqueue (survives power loss); NORMAL only survives a process crash
+WRITE_BEHIND_SYNCHRONOUS = os.getenv("WRITE_BEHIND_SYNCHRONOUS", "FULL").upper()
+# Seconds a claimed batch may stay unfinished before it is assumed lost (a crashed worker) and requeued
+WRITE_BEHIND_CLAIM_TIMEOUT = float(os.getenv("WRITE_BEHIND_CLAIM_TIMEOUT", "300"))
+# Seconds finished tickets stay available to GET /submissions/{ticket}
+WRITE_BEHIND_RETENTION = float(os.getenv("WRITE_BEHIND_RETENTION", str(7 * 24 * 3600)))
+# Seconds between requeueing stale claims and purging finished tickets
+MAINTENANCE_INTERVAL = 60
+# Seconds shutdown waits for the queue to drain before leaving the rest for the next start
+WRITE_BEHIND_DRAIN_TIMEOUT = float(os.getenv("WRITE_BEHIND_DRAIN_TIMEOUT", "10"))
+
+QUEUED, FLUSHING, STORED, REJECTED, FAILED = "queued", "flushing", "stored", "rejected", "failed"
+DUPLICATE_MESSAGE = "A registration with this Aadhaar number or PAN already exists."
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    registration_id INTEGER,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_status ON submissions (status, seq);
+"""
+
+
+class SubmissionQueue:
+    """
+    The durable queue file and its flusher. Queue operations are short
+    synchronous SQLite transactions run on the event loop, except enqueue,
+    which commits (and with synchronous=FULL waits for the disk) on a writer
+    thread with its own connection, so a submission never stalls the others.
+    """
+
+    def __init__(
+        self,
+        path: str = WRITE_BEHIND_QUEUE_FILE,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS,
+        retry_delay: float = WRITE_BEHIND_RETRY_DELAY,
+        conflict_mode: str = "reject",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.conflict_mode = conflict_mode
+        self.clock = clock
+        self.connection = self._connect()
+        self.connection.executescript(SCHEMA)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-behind-enqueue")
+        self._writer_connection = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._maintained_at = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: every statement below is its own transaction
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={WRITE_BEHIND_SYNCHRONOUS}")
+        return connection
+
+    # --- Queue ---
+    async def enqueue(self, form_data: UdyamFormRequest) -> dict:
+        """Appends a validated registration; returns its ticket once the row is durable."""
+        ticket = uuid.uuid4().hex
+        await asyncio.get_running_loop().run_in_executor(
+            self._writer, self._append, ticket, form_data.model_dump_json()
+        )
+        self._wakeup.set()
+        return {"ticket": ticket, "status": QUEUED}
+
+    def _append(self, ticket: str, payload: str) -> None:
+        """Runs on the writer thread."""
+        if self._writer_connection is None:
+            self._writer_connection = self._connect()
+        self._writer_connection.execute(
+            "INSERT INTO submissions (ticket, payload, status, updated) VALUES (?, ?, ?, ?)",
+            (ticket, payload, QUEUED, self.clock()),
+        )
+
+    def status(self, ticket: str) -> Optional[dict]:
+        found = self.connection.execute(
+            "SELECT status, registration_id, error FROM submissions WHERE ticket = ?", (ticket,)
+        ).fetchone()
+        if found is None:
+            return None
+        status, registration_id, error = found
+        return {"ticket": ticket, "status": status, "id": registration_id, "error": error}
+
+    def depth(self) -> int:
+        """Tickets not yet stored, rejected or failed."""
+        return self.connection.execute(
+            "SELECT count(*) FROM submissions WHERE status IN (?, ?)", (QUEUED, FLUSHING)
+        ).fetchone()[0]
+
+    def claim(self) -> list:
+        """
+        Marks up to batch_size due rows as flushing; returns [(seq, ticket,
+        row, attempts)] in queue order, with each row ready for insertion.
+        """
+        now = self.clock()
+        claimed = self.connection.execute(
+            """
+            UPDATE submissions SET status = ?, updated = ?
+            WHERE seq IN (
+                SELECT seq FROM submissions WHERE status = ? AND not_before <= ? ORDER BY seq LIMIT ?
+            )
+            RETURNING seq, ticket, payload, attempts
+            """,
+            (FLUSHING, now, QUEUED, now, self.batch_size),
+        ).fetchall()
+        return sorted(
+            (seq, ticket, registration_row(UdyamFormRequest.model_construct(**json.loads(payload))), attempts)
+            for seq, ticket, payload, attempts in claimed
+        )
+
+    def complete(self, outcomes: list) -> None:
+        """Records (seq, status, registration_id, error) for a flushed batch."""
+        now = self.clock()
+        self.connection.executemany(
+            "UPDATE submissions SET status = ?, registration_id = ?, error = ?, updated = ? WHERE seq = ?",
+            [(status, registration_id, error, now, seq) for seq, status, registration_id, error in outcomes],
+        )
+
+    def retry(self, batch: list, error: str) -> None:
+        """Requeues a batch that could not be written, or fails it after max_attempts."""
+        now = self.clock()
+        updates = []
+        for seq, _, _, attempts in batch:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                updates.append((FAILED, attempts, 0, error, now, seq))
+            else:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                updates.append((QUEUED, attempts, now + delay, error, now, seq))
+        self.connection.executemany(
+            "UPDATE submissions SET status = ?, attempts = ?, not_before = ?, error = ?, updated = ? WHERE seq = ?",
+            updates,
+        )
+
+    def requeue_stale(self, timeout: float = WRITE_BEHIND_CLAIM_TIMEOUT) -> int:
+        """Requeues batches claimed by a flusher that died before finishing them."""
+        return self.connection.execute(
+            "UPDATE submissions SET status = ?, attempts = attempts + 1 WHERE status = ? AND updated < ?",
+            (QUEUED, FLUSHING, self.clock() - timeout),
+        ).rowcount
+
+    def purge(self, retention: float = WRITE_BEHIND_RETENTION) -> int:
+        return self.connection.execute(
+            "DELETE FROM submissions WHERE status IN (?, ?, ?) AND updated < ?",
+            (STORED, REJECTED, FAILED, self.clock() - retention),
+        ).rowcount
+
+    # --- Flusher ---
+    async def flush(self, session_factory, batch: list) -> list:
+        """
+        Writes one claimed batch and records the outcomes; returns the stored
+        rows. If the batch as a whole fails, its rows are written one at a
+        time (see flush_rows), so one bad row does not hold up the others.
+        """
+        try:
+            outcomes, stored = await self._write(session_factory, batch)
+        except Exception as e:
+            if len(batch) > 1:
+                outcomes, stored = await self.flush_rows(session_factory, batch)
+            else:
+                outcome = self.refused(batch[0][0], e)
+                if outcome is None:
+                    self.retry(batch, f"Database error: {e}")
+                    return []
+                outcomes, stored = [outcome], []
+        self.complete(outcomes)
+        return stored
+
+    @staticmethod
+    def refused(seq: int, error: Exception) -> Optional[tuple]:
+        """
+        The outcome of a row the database refused: rejected for a conflicting
+        PAN, failed for a value the table cannot hold. None for any other
+        error, which says nothing about the row.
+        """
+        if isinstance(error, IntegrityError):
+            return (seq, REJECTED, None, DUPLICATE_MESSAGE)
+        if isinstance(error, DataError):
+            return (seq, FAILED, None, f"Database error: {error}")
+        return None
+
+    async def flush_rows(self, session_factory, batch: list) -> tuple:
+        """
+        Writes a batch row by row; returns (outcomes, stored rows). A row the
+        database refuses gets its own outcome (see refused); any other error
+        means the database cannot be written, and the rest of the batch is
+        retried later.
+        """
+        outcomes, stored = [], []
+        for position, item in enumerate(batch):
+            try:
+                row_outcomes, row_stored = await self._write(session_factory, [item])
+            except Exception as e:
+                outcome = self.refused(item[0], e)
+                if outcome is None:
+                    self.retry(batch[position:], f"Database error: {e}")
+                    break
+                outcomes.append(outcome)
+                continue
+            outcomes += row_outcomes
+            stored += row_stored
+        return outcomes, stored
+
+    async def _write(self, session_factory, batch: list) -> tuple:
+        """
+        Inserts the batch in one transaction; returns (outcomes, stored rows).
+        Rows on their second or later attempt that hit an existing
+        registration are checked against it, since an earlier attempt may
+        have committed before its outcome was recorded.
+        """
+        rows = [row for _, _, row, _ in batch]
+        async with session_factory() as db:
+            ids_by_adharno = await store_registrations(db, rows, self.conflict_mode)
+            await db.commit()
+            outcomes, stored = [], []
+            for seq, _, row, attempts in batch:
+                registration_id = ids_by_adharno.pop(row["adharno"], None)
+                if registration_id is None and attempts:
+                    registration_id = await self._previously_stored(db, row)
+                if registration_id is None:
+                    outcomes.append((seq, REJECTED, None, DUPLICATE_MESSAGE))
+                else:
+                    outcomes.append((seq, STORED, registration_id, None))
+                    stored.append(row)
+        return outcomes, stored
+
+    @staticmethod
+    async def _previously_stored(db, row: dict) -> Optional[int]:
+        existing = (await db.execute(
+            select(UdyamRegistration.__table__).where(UdyamRegistration.adharno == row["adharno"])
+        )).first()
+        if existing is not None and all(existing._mapping[column] == value for column, value in row.items()):
+            return existing.id
+        return None
+
+    async def flush_due(self, session_factory, on_stored: Optional[Callable[[list], None]] = None) -> bool:
+        """Flushes one batch of due rows; returns False when there was none."""
+        batch = self.claim()
+        if not batch:
+            return False
+        stored = await self.flush(session_factory, batch)
+        if stored and on_stored is not None:
+            on_stored(stored)
+        return True
+
+    async def run(self, session_factory, on_stored: Optional[Callable[[list], None]] = None) -> None:
+        """
+        Flushes until stop(); full batches are written back to back, idle time
+        is spent waiting for work. Every MAINTENANCE_INTERVAL seconds, busy or
+        not, batches left claimed by a flusher that stopped are requeued and
+        old tickets purged.
+        """
+        while not self._stopping:
+            self.maintain()
+            if await self.flush_due(session_factory, on_stored):
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def maintain(self) -> None:
+        """requeue_stale() and purge(), at most once per MAINTENANCE_INTERVAL."""
+        if self._maintained_at is not None and self.clock() - self._maintained_at < MAINTENANCE_INTERVAL:
+            return
+        self.requeue_stale()
+        self.purge()
+        self._maintained_at = self.clock()
+
+    async def drain(self, session_factory, on_stored: Optional[Callable[[list], None]] = None,
+                    timeout: float = WRITE_BEHIND_DRAIN_TIMEOUT) -> None:
+        """Flushes whatever is due until the queue is empty or `timeout` runs out."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and await self.flush_due(session_factory, on_stored):
+            pass
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self._writer.submit(self._close_writer).result()
+        self._writer.shutdown()
+        self.connection.close()
+
+    def _close_writer(self) -> None:
+        if self._writer_connection is not None:
+            self._writer_connection.close()
+            self._writer_connection = None
@@ -0,0 +1,114 @@
+# bench_micro.py (Micro-benchmarks: Verhoeff engine, date checks and request validators)
+#
+# Reports ns/op (best of --repeat runs) for the checksum engine, for DOB/DOI
+# checks over the repeating dates of a bulk import, and for validating
+# registrations of every organisation type.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_micro
+#   python -m benchmarks.bench_micro --save-baseline
+#   python -m benchmarks.bench_micro --check-baseline --tolerance 0.3
+import argparse
+import datetime
+import re
+import sys
+import timeit
+
+from pydantic import ValidationError
+
+from backend.dates import date_error
+from backend.schemas import PanValidationRequest, UdyamFormRequest, registration_row
+from backend.verhoeff import verhoeff
+from benchmarks.datagen import ORG_TYPES, RegistrationGenerator
+from benchmarks.results import add_baseline_arguments, handle_baseline, metric, print_metrics
+
+SUITE = "micro"
+_DATE_PATTERN = re.compile(r'^\d{2}\/\d{2}\/\d{4}$')
+
+
+def legacy_date_error(v: str):
+    """The per-call check the validators ran before dates.py, for comparison."""
+    if not _DATE_PATTERN.fullmatch(v):
+        return 'Date format is DD/MM/YYYY.'
+    try:
+        day, month, year = map(int, v.split('/'))
+        input_date = datetime.date(year, month, day)
+        today = datetime.date.today()
+        if input_date > today:
+            raise ValueError('Date cannot be in the future.')
+    except ValueError:
+        return 'Invalid date provided.'
+    return None
+
+
+def ns_per_op(func, number: int, repeat: int, batch: int = 1) -> float:
+    """Best-of-`repeat` time per operation; `batch` operations happen per call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / (number * batch) * 1e9
+
+
+def run(number: int, repeat: int) -> dict:
+    generator = RegistrationGenerator(seed=7)
+    aadhaars = [generator.aadhaar() for _ in range(1000)]
+    metrics = {}
+
+    def per_value(method, values):
+        def loop():
+            for value in values:
+                method(value)
+        return ns_per_op(loop, max(1, number // len(values)), repeat, len(values))
+
+    metrics["verhoeff.validate"] = metric(per_value(verhoeff.validate, aadhaars), "ns/op")
+    metrics["verhoeff.generate"] = metric(per_value(verhoeff.generate, [a[:11] for a in aadhaars]), "ns/op")
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        array = np.array(aadhaars * 100, dtype="S12")
+        metrics["verhoeff.validate_many"] = metric(
+            ns_per_op(lambda: verhoeff.validate_many(array), 10, repeat, len(array)), "ns/number"
+        )
+
+    # Bulk imports repeat a few thousand dates; every value below recurs ten times
+    dates = [generator.registration("5")["dob"] for _ in range(200)] * 10
+    metrics["dob.legacy"] = metric(per_value(legacy_date_error, dates), "ns/op")
+    metrics["dob.cached"] = metric(per_value(date_error, dates), "ns/op")
+
+    for org_type in ORG_TYPES:
+        payload = generator.registration(org_type)
+        metrics[f"validate.org_type_{org_type}"] = metric(
+            ns_per_op(lambda: UdyamFormRequest.model_validate(payload), number, repeat), "ns/op"
+        )
+
+    invalid = dict(generator.registration("1"), adharno=aadhaars[0][:11] + str((int(aadhaars[0][11]) + 1) % 10))
+
+    def validate_invalid():
+        try:
+            UdyamFormRequest.model_validate(invalid)
+        except ValidationError:
+            pass
+    metrics["validate.checksum_failure"] = metric(ns_per_op(validate_invalid, number, repeat), "ns/op")
+
+    pan_request = generator.pan_request()
+    metrics["validate.pan_request"] = metric(
+        ns_per_op(lambda: PanValidationRequest.model_validate(pan_request), number, repeat), "ns/op"
+    )
+    form = UdyamFormRequest.model_validate(generator.registration("5"))
+    metrics["registration_row"] = metric(ns_per_op(lambda: registration_row(form), number, repeat), "ns/op")
+    return metrics
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the Verhoeff engine and validators.")
+    parser.add_argument("--number", type=int, default=20000, help="Operations per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs; the best is reported")
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    metrics = run(args.number, args.repeat)
+    print_metrics(metrics)
+    return handle_baseline(args, SUITE, metrics, {"number": args.number, "repeat": args.repeat})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
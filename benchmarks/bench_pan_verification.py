@@ -0,0 +1,69 @@
+# bench_pan_verification.py (PAN verification latency and cache hit rate against the local mock server)
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_pan_verification --lookups 5000 --distinct 500 --latency-ms 100
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+from backend import mock_pan_server
+from backend.pan_verification import CachingPanVerifier, HttpPanVerifier, TokenBucket
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def pan_for(index):
+    letters = "".join(chr(65 + (index // 26 ** i) % 26) for i in range(5))
+    return f"{letters}{index % 10000:04d}Z"
+
+
+async def run(args):
+    mock_pan_server.app.state.latency_ms = args.latency_ms
+    mock_pan_server.app.state.calls = 0
+    backend = HttpPanVerifier("http://mock-pan", transport=httpx.ASGITransport(app=mock_pan_server.app))
+    limiter = TokenBucket(args.rate_limit, args.burst) if args.rate_limit else None
+    verifier = CachingPanVerifier(backend, limiter=limiter, max_wait=60)
+
+    # Skewed key popularity: a few PANs are looked up far more often than the rest
+    rng = random.Random(1)
+    keys = [pan_for(int(rng.paretovariate(1.2)) % args.distinct) for _ in range(args.lookups)]
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def lookup(pan):
+        async with semaphore:
+            started = time.perf_counter()
+            await verifier.verify(pan, "Holder Name", "01/01/2000", "DOB")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(pan) for pan in keys))
+    elapsed = time.perf_counter() - started
+    await verifier.aclose()
+
+    print(f"lookups {args.lookups}  distinct keys {len(set(keys))}  upstream latency {args.latency_ms} ms")
+    print(f"upstream calls {mock_pan_server.app.state.calls}  cache hit rate {verifier.cache.hit_rate:.1%}")
+    print(f"throughput {args.lookups / elapsed:.0f} lookups/s  p50 {statistics.median(latencies) * 1000:.2f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cached PAN verification against the mock server.")
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Upstream calls/s (0 disables the limiter)")
+    parser.add_argument("--burst", type=int, default=20)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_pincodes.py (Pincode lookup: dict-of-dicts vs sorted-array index)
+#
+# Generates a directory-sized data file (India has ~19,000 pincodes spread
+# over ~750 districts), then measures load time, retained memory and lookup
+# speed for both representations.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_pincodes --pincodes 19000 --places 750
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from backend.pincodes import PincodeIndex
+
+
+def write_data_file(path, pincode_count, place_count, rng):
+    places = [(f"District {i}", f"State {i % 36}") for i in range(place_count)]
+    pincodes = rng.sample(range(110000, 860000), pincode_count)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["pincode", "city", "state"])
+        for pincode in pincodes:
+            writer.writerow([pincode, *rng.choice(places)])
+    return [str(pincode) for pincode in pincodes]
+
+
+def load_dict(path):
+    """The straightforward alternative: {pincode: {"city": ..., "state": ...}}."""
+    with open(path, newline="") as f:
+        return {row["pincode"]: {"city": row["city"], "state": row["state"]} for row in csv.DictReader(f)}
+
+
+def measure_load(label, loader):
+    tracemalloc.start()
+    started = time.perf_counter()
+    table = loader()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>12}: load {elapsed * 1000:7.1f} ms  retained {retained / 1024:8.1f} KiB")
+    return table
+
+
+def measure_lookups(label, lookup, keys):
+    started = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>12}: {elapsed / len(keys) * 1e9:7.1f} ns/lookup")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pincode index load time, memory and lookups.")
+    parser.add_argument("--pincodes", type=int, default=19000)
+    parser.add_argument("--places", type=int, default=750)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pincodes.csv")
+        pincodes = write_data_file(path, args.pincodes, args.places, rng)
+        print(f"data file: {args.pincodes} pincodes, {args.places} places, {os.path.getsize(path) / 1024:.1f} KiB")
+        table = measure_load("dict", lambda: load_dict(path))
+        index = measure_load("array index", lambda: PincodeIndex.load(path))
+
+    keys = [rng.choice(pincodes) for _ in range(args.lookups)]
+    measure_lookups("dict", table.get, keys)
+    measure_lookups("array index", index.lookup, keys)
+
+
+if __name__ == "__main__":
+    main()
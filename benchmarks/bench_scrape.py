@@ -0,0 +1,170 @@
+# bench_scrape.py (Step extraction: one RPC per attribute vs one injected script)
+#
+# Builds a form page of the given size and extracts it with scrape_step and
+# scrape_step_batched, counting WebDriver commands. With Chrome available the
+# page is loaded in a real headless browser; otherwise (or with --simulate) a
+# stand-in driver charges --rpc-latency-ms per command, which is what a remote
+# or busy browser costs.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_scrape --inputs 60 --selects 4 --options 30
+#   python -m benchmarks.bench_scrape --simulate --rpc-latency-ms 2
+import argparse
+import html
+import os
+import tempfile
+import time
+
+from webScrapping import create_driver, scrape_step, scrape_step_batched
+
+
+def build_form(inputs, selects, options, buttons):
+    """Element specs (tag, attributes, text, children) for a page shaped like the Udyam form."""
+    elements = []
+    for i in range(inputs):
+        attrs = {"name": f"ctl00$ContentPlaceHolder1$field{i}", "id": f"ctl00_ContentPlaceHolder1_field{i}",
+                 "type": "hidden" if i % 3 == 0 else "text", "placeholder": f"Field {i}", "maxlength": "100"}
+        elements.append(("label", {"for": attrs["id"]}, f"{i}. Field {i}", []))
+        elements.append(("input", attrs, "", []))
+    for i in range(selects):
+        children = [("option", {}, f"Option {j}", []) for j in range(options)]
+        elements.append(("select", {"name": f"select{i}", "id": f"select{i}"}, "", children))
+    for i in range(buttons):
+        elements.append(("button", {"id": f"btn{i}", "type": "submit"}, f"Button {i}", []))
+    return elements
+
+
+def render_html(elements):
+    def render(tag, attrs, text, children):
+        attributes = "".join(f' {key}="{html.escape(value)}"' for key, value in attrs.items())
+        inner = html.escape(text) + "".join(render(*child) for child in children)
+        return f"<{tag}{attributes}>" if tag == "input" else f"<{tag}{attributes}>{inner}</{tag}>"
+
+    return "<!DOCTYPE html><html><body><form>" + "".join(render(*e) for e in elements) + "</form></body></html>"
+
+
+class SimulatedElement:
+    def __init__(self, driver, tag, attrs, text, children):
+        self.driver = driver
+        self.tag_name = tag
+        self.attrs = attrs
+        self._text = text
+        self.children = [SimulatedElement(driver, *child) for child in children]
+
+    def get_attribute(self, name):
+        self.driver.command()
+        default = None if name in ("maxlength", "minlength", "for") else ""
+        return self.attrs.get(name, default)
+
+    @property
+    def text(self):
+        self.driver.command()
+        return self._text
+
+    def find_elements(self, by, value):
+        self.driver.command()
+        return [child for child in self.children if child.tag_name == value]
+
+
+class SimulatedDriver:
+    """Answers scrape_step and scrape_step_batched from element specs, sleeping per command."""
+
+    def __init__(self, elements, latency):
+        self.latency = latency
+        self.commands = 0
+        self.elements = [SimulatedElement(self, *element) for element in elements]
+
+    def command(self):
+        self.commands += 1
+        time.sleep(self.latency)
+
+    def find_elements(self, by, value):
+        self.command()
+        return [element for element in self.elements if element.tag_name == value]
+
+    def execute_script(self, script, *args):
+        self.command()
+        # The same structure the injected script returns, computed without further commands
+        attrs = lambda element, name, default="": element.attrs.get(name, default)
+        by_tag = lambda tag: [element for element in self.elements if element.tag_name == tag]
+        return {
+            "inputs": [
+                {"name": attrs(e, "name"), "id": attrs(e, "id"), "type": attrs(e, "type", "text"),
+                 "placeholder": attrs(e, "placeholder"), "pattern": attrs(e, "pattern"),
+                 "maxlength": attrs(e, "maxlength", None), "minlength": attrs(e, "minlength", None),
+                 "title": attrs(e, "title")}
+                for e in by_tag("input")
+            ],
+            "labels": [{"for": attrs(e, "for", None), "text": e._text} for e in by_tag("label")],
+            "dropdowns": [
+                {"name": attrs(e, "name"), "id": attrs(e, "id"), "options": [o._text for o in e.children]}
+                for e in by_tag("select")
+            ],
+            "buttons": [{"id": attrs(e, "id"), "type": attrs(e, "type"), "text": e._text} for e in by_tag("button")],
+        }
+
+
+def count_commands(driver):
+    """Wraps a real driver's command dispatch so every round-trip is counted."""
+    execute = driver.execute
+    driver.commands = 0
+
+    def counting_execute(*args, **kwargs):
+        driver.commands += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counting_execute
+    return driver
+
+
+def measure(label, driver, extract, repeat):
+    driver.commands = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = extract(driver)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:>22}: {driver.commands // repeat:6d} commands  {elapsed * 1000:9.1f} ms/step")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare scrape_step extraction modes.")
+    parser.add_argument("--inputs", type=int, default=60)
+    parser.add_argument("--selects", type=int, default=4)
+    parser.add_argument("--options", type=int, default=30)
+    parser.add_argument("--buttons", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--simulate", action="store_true", help="Use the stand-in driver even if Chrome is available")
+    parser.add_argument("--rpc-latency-ms", type=float, default=2.0, help="Per-command latency of the stand-in driver")
+    args = parser.parse_args(argv)
+
+    elements = build_form(args.inputs, args.selects, args.options, args.buttons)
+    driver = None
+    if not args.simulate:
+        try:
+            driver = count_commands(create_driver())
+        except Exception as e:
+            print(f"Chrome unavailable ({type(e).__name__}); using the simulated driver")
+    if driver is None:
+        driver = SimulatedDriver(elements, args.rpc_latency_ms / 1000)
+        print(f"simulated driver, {args.rpc_latency_ms} ms per command")
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            if not isinstance(driver, SimulatedDriver):
+                path = os.path.join(directory, "form.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(render_html(elements))
+                driver.get("file://" + path)
+            print(f"page: {args.inputs} inputs/labels, {args.selects} selects x {args.options} options, "
+                  f"{args.buttons} buttons")
+            legacy = measure("scrape_step", driver, scrape_step, args.repeat)
+            batched = measure("scrape_step_batched", driver, scrape_step_batched, args.repeat)
+            print(f"identical output: {legacy == batched}")
+        finally:
+            if not isinstance(driver, SimulatedDriver):
+                driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# bench_validators.py (UdyamFormRequest validation: single-pass model validator vs field-by-field)
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_validators --iterations 20000
+import argparse
+import datetime
+import os
+import re
+import tempfile
+import timeit
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator, FieldValidationInfo
+
+
+def build_legacy_model(verhoeff_cls):
+    """The previous field-by-field validators, kept verbatim for comparison."""
+
+    class LegacyUdyamFormRequest(BaseModel):
+        adharno: str = Field(..., min_length=12, max_length=12)
+        ownername: str = Field(..., min_length=1, max_length=100)
+        aadhaarDeclaration: bool = Field(...)
+        organizationType: str = Field(...)
+        hasPan: str = Field(...)
+        pan: Optional[str] = Field(None, min_length=10, max_length=10)
+        panName: Optional[str] = Field(None, min_length=1, max_length=100)
+        dob: Optional[str] = Field(None)
+        dobType: Optional[str] = Field(None)
+        panDeclaration: Optional[bool] = Field(None)
+        hasGstin: Optional[str] = Field(None)
+        totalTurnoverA: Optional[float] = Field(None)
+        totalTurnoverB: Optional[float] = Field(None)
+
+        @field_validator('adharno')
+        @classmethod
+        def validate_adharno(cls, v: str, info: FieldValidationInfo) -> str:
+            if not re.fullmatch(r'^\d{12}$', v):
+                raise ValueError('Aadhaar must be 12 digits and contain only numbers.')
+            if not verhoeff_cls().validate(v):
+                raise ValueError('Invalid Aadhaar number (checksum failed).')
+            if v.startswith('0') or v.startswith('1'):
+                raise ValueError('Aadhaar number cannot start with 0 or 1.')
+            return v
+
+        @field_validator('organizationType')
+        @classmethod
+        def validate_organization_type(cls, v: str) -> str:
+            if v == '0':
+                raise ValueError('Please select a valid type of organisation.')
+            return v
+
+        @field_validator('pan')
+        @classmethod
+        def validate_pan(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
+            non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
+            is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
+            has_pan_field = info.data.get('hasPan')
+            if is_pan_required:
+                if has_pan_field == 'no':
+                    raise ValueError('PAN is mandatory for this type of organization. Please select "Yes".')
+                if has_pan_field == 'yes':
+                    if not v:
+                        raise ValueError('PAN number is required.')
+                    if not re.fullmatch(r'^[A-Z]{5}\d{4}[A-Z]{1}$', v):
+                        raise ValueError('Invalid PAN format (e.g., ABCDE1234F).')
+            return v
+
+        @field_validator('panName')
+        @classmethod
+        def validate_pan_name(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
+            non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
+            is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
+            has_pan_field = info.data.get('hasPan')
+            if is_pan_required and has_pan_field == 'yes':
+                if not v:
+                    raise ValueError('Name of PAN Holder is required.')
+            return v
+
+        @field_validator('dob')
+        @classmethod
+        def validate_dob(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
+            non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
+            is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
+            has_pan_field = info.data.get('hasPan')
+            if is_pan_required and has_pan_field == 'yes':
+                if not v:
+                    raise ValueError('DOB or DOI is required.')
+                if not re.fullmatch(r'^\d{2}\/\d{2}\/\d{4}$', v):
+                    raise ValueError('Date format is DD/MM/YYYY.')
+                try:
+                    day, month, year = map(int, v.split('/'))
+                    input_date = datetime.date(year, month, day)
+                    today = datetime.date.today()
+                    if input_date > today:
+                        raise ValueError('Date cannot be in the future.')
+                except ValueError:
+                    raise ValueError('Invalid date provided.')
+            return v
+
+        @field_validator('panDeclaration')
+        @classmethod
+        def validate_pan_declaration(cls, v: Optional[bool], info: FieldValidationInfo) -> Optional[bool]:
+            non_proprietary_org_types = {'2', '3', '4', '5', '6', '7', '8', '9', '10', '11'}
+            is_pan_required = info.data.get('organizationType') in non_proprietary_org_types
+            has_pan_field = info.data.get('hasPan')
+            if is_pan_required and has_pan_field == 'yes':
+                if not v:
+                    raise ValueError('You must agree to the PAN declaration.')
+            return v
+
+        @field_validator('hasGstin')
+        @classmethod
+        def validate_gstin_conditional(cls, v: Optional[str], info: FieldValidationInfo) -> Optional[str]:
+            if v == 'no' and info.data.get('totalTurnoverA') is not None and info.data['totalTurnoverA'] > 4000000:
+                raise ValueError('GSTIN is mandatory if turnover exceeds ₹40 Lakhs.')
+            return v
+
+    return LegacyUdyamFormRequest
+
+
+PAYLOADS = {
+    "proprietary": {
+        "adharno": "234567890129", "ownername": "Bench Proprietor", "aadhaarDeclaration": True,
+        "organizationType": "1", "hasPan": "no", "hasGstin": "no",
+        "totalTurnoverA": 1000000, "totalTurnoverB": 0,
+    },
+    "company": {
+        "adharno": "345678901235", "ownername": "Bench Company", "aadhaarDeclaration": True,
+        "organizationType": "5", "hasPan": "yes", "pan": "ABCCE1234F", "panName": "Bench Company Pvt Ltd",
+        "dob": "01/04/2015", "dobType": "DOI", "panDeclaration": True, "hasGstin": "yes",
+        "totalTurnoverA": 52000000, "totalTurnoverB": 0,
+    },
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark UdyamFormRequest validation paths.")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='udyam-bench-'), 'bench.db')}"
+    from backend.main import UdyamFormRequest, Verhoeff
+
+    models = {"field-by-field": build_legacy_model(Verhoeff), "single-pass": UdyamFormRequest}
+    for name, payload in PAYLOADS.items():
+        timings = {}
+        for label, model in models.items():
+            best = min(timeit.repeat(lambda: model.model_validate(payload), number=args.iterations, repeat=args.repeat))
+            timings[label] = best / args.iterations
+            print(f"{name:>11} {label:>15}: {timings[label] * 1e6:7.2f} us/validation  ({1 / timings[label]:10.0f} /s)")
+        saved = timings["field-by-field"] - timings["single-pass"]
+        print(f"{name:>11} {'saving':>15}: {saved * 1e6:7.2f} us/request ({saved / timings['field-by-field']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
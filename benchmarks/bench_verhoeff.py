@@ -0,0 +1,62 @@
+# bench_verhoeff.py (Verhoeff checksum: per-request instance vs table-driven engine vs NumPy batch)
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_verhoeff --count 1000000
+import argparse
+import random
+import time
+
+from backend.verhoeff import verhoeff, validate_many
+
+
+class LegacyVerhoeff:
+    """The previous nested-list implementation, instantiated per call as validate_adharno did."""
+    __mul = [
+        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5], [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
+        [3, 4, 0, 1, 2, 8, 9, 5, 6, 7], [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+        [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3], [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
+        [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+    ]
+    __per = [
+        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4], [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
+        [8, 9, 1, 6, 0, 4, 3, 5, 2, 7], [9, 4, 5, 3, 1, 2, 6, 8, 7, 0], [4, 2, 8, 7, 6, 5, 9, 3, 0, 1],
+        [2, 7, 9, 3, 8, 0, 1, 5, 4, 6], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+    ]
+
+    def validate(self, num_str):
+        c = 0
+        for i, item in enumerate(reversed(num_str)):
+            c = self.__mul[c][self.__per[i % 8][int(item)]]
+        return c == 0
+
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    valid = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:>22}: {elapsed:8.3f} s  {elapsed / count * 1e9:9.1f} ns/number  ({valid} valid)")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Verhoeff validation paths.")
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    numbers = ["".join(rng.choices("0123456789", k=12)) for _ in range(args.count)]
+
+    legacy = timed("legacy per-call", args.count, lambda: sum(LegacyVerhoeff().validate(n) for n in numbers))
+    engine = timed("table-driven scalar", args.count, lambda: sum(verhoeff.validate(n) for n in numbers))
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy not installed; skipping validate_many")
+        return
+    array = np.array(numbers, dtype="S12")
+    batch = timed("validate_many (numpy)", args.count, lambda: int(validate_many(array).sum()))
+    print(f"speed-up vs legacy: scalar x{legacy / engine:.1f}, batch x{legacy / batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
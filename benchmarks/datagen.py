@@ -0,0 +1,136 @@
+# datagen.py (Synthetic Registration Data)
+#
+# Deterministic generator of registrations that pass UdyamFormRequest:
+# unique Aadhaar numbers with Verhoeff check digits, and PANs whose fourth
+# letter matches the holder type of each organisation type.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.datagen --count 10000 > registrations.ndjson
+#   python -m benchmarks.datagen --count 10000 --format csv > registrations.csv
+import argparse
+import csv
+import datetime
+import json
+import random
+import sys
+from typing import Optional
+
+from backend.schemas import GSTIN_TURNOVER_LIMIT, NON_PROPRIETARY_ORG_TYPES
+from backend.verhoeff import Verhoeff
+
+# Form dropdown value -> fourth PAN letter of that kind of holder
+# (P individual, H HUF, F firm/LLP, C company, A association of persons, T trust)
+PAN_HOLDER_TYPES = {
+    "1": "P",  # Proprietary
+    "2": "H",  # Hindu Undivided Family
+    "3": "F",  # Partnership
+    "4": "A",  # Co-Operative
+    "5": "C",  # Private Limited Company
+    "6": "C",  # Public Limited Company
+    "7": "A",  # Self Help Group
+    "8": "A",  # Others
+    "9": "F",  # Limited Liability Partnership
+    "10": "A",  # Society
+    "11": "T",  # Trust
+}
+ORG_TYPES = tuple(PAN_HOLDER_TYPES)
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+FIELDS = (
+    "adharno", "ownername", "aadhaarDeclaration", "organizationType", "hasPan", "pan", "panName",
+    "dob", "dobType", "panDeclaration", "hasGstin", "totalTurnoverA", "totalTurnoverB",
+)
+
+
+class RegistrationGenerator:
+    """Yields valid, mutually unique registrations; the same seed gives the same data."""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.verhoeff = Verhoeff()
+        self._aadhaar_seen = set()
+        self._pan_seen = set()
+
+    def aadhaar(self) -> str:
+        while True:
+            base = str(self.rng.randint(2, 9)) + "".join(self.rng.choices("0123456789", k=10))
+            if base not in self._aadhaar_seen:
+                self._aadhaar_seen.add(base)
+                return base + str(self.verhoeff.generate(base))
+
+    def pan(self, org_type: str = "1") -> str:
+        while True:
+            pan = (
+                "".join(self.rng.choices(LETTERS, k=3))
+                + PAN_HOLDER_TYPES[org_type]
+                + self.rng.choice(LETTERS)
+                + f"{self.rng.randrange(10000):04d}"
+                + self.rng.choice(LETTERS)
+            )
+            if pan not in self._pan_seen:
+                self._pan_seen.add(pan)
+                return pan
+
+    def date(self) -> str:
+        day = datetime.date(1950, 1, 1) + datetime.timedelta(days=self.rng.randrange(365 * 70))
+        return day.strftime("%d/%m/%Y")
+
+    def registration(self, org_type: Optional[str] = None) -> dict:
+        org_type = org_type or self.rng.choice(ORG_TYPES)
+        # Proprietors may register without a PAN; every other organisation needs one
+        has_pan = org_type in NON_PROPRIETARY_ORG_TYPES or self.rng.random() < 0.5
+        turnover = round(self.rng.uniform(0, 2 * GSTIN_TURNOVER_LIMIT), 2)
+        name = f"Entrepreneur {self.rng.randrange(10 ** 6):06d}"
+        record = {
+            "adharno": self.aadhaar(),
+            "ownername": name,
+            "aadhaarDeclaration": True,
+            "organizationType": org_type,
+            "hasPan": "yes" if has_pan else "no",
+            "pan": None,
+            "panName": None,
+            "dob": None,
+            "dobType": None,
+            "panDeclaration": None,
+            "hasGstin": "yes" if turnover > GSTIN_TURNOVER_LIMIT or self.rng.random() < 0.3 else "no",
+            "totalTurnoverA": turnover,
+            "totalTurnoverB": round(turnover * self.rng.uniform(0, 0.2), 2),
+        }
+        if has_pan:
+            record.update(
+                pan=self.pan(org_type),
+                panName=name.upper(),
+                dob=self.date(),
+                dobType="DOB" if org_type == "1" else "DOI",
+                panDeclaration=True,
+            )
+        return record
+
+    def registrations(self, count: int) -> list:
+        """`count` registrations cycling through every organisation type."""
+        return [self.registration(ORG_TYPES[i % len(ORG_TYPES)]) for i in range(count)]
+
+    def pan_request(self) -> dict:
+        """A /validate-pan body."""
+        return {"pan": self.pan(self.rng.choice(ORG_TYPES)), "panName": "HOLDER NAME", "dob": self.date(), "dobType": "DOB"}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic valid Udyam registrations.")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    args = parser.parse_args(argv)
+
+    records = RegistrationGenerator(args.seed).registrations(args.count)
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows({k: "" if v is None else v for k, v in record.items()} for record in records)
+    else:
+        for record in records:
+            sys.stdout.write(json.dumps(record) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
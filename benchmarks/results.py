@@ -0,0 +1,104 @@
+# results.py (Benchmark Results, Percentiles and Stored Baselines)
+#
+# Benchmarks report a flat {metric: {"value", "unit", "better"}} dict. A run
+# can be stored as the baseline (benchmarks/baselines/<suite>.json) and later
+# runs compared against it; a metric regresses when it is worse than the
+# baseline by more than the tolerance.
+import json
+import os
+import platform
+import statistics
+from typing import Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def metric(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix: str, latencies: list, elapsed: float, count: int) -> dict:
+    """Throughput and p50/p90/p99/max latency (ms) of one load scenario."""
+    return {
+        f"{prefix}.throughput": metric(count / elapsed, "req/s", "higher"),
+        f"{prefix}.p50": metric(statistics.median(latencies) * 1000, "ms"),
+        f"{prefix}.p90": metric(percentile(latencies, 90) * 1000, "ms"),
+        f"{prefix}.p99": metric(percentile(latencies, 99) * 1000, "ms"),
+        f"{prefix}.max": metric(max(latencies) * 1000, "ms"),
+    }
+
+
+def print_metrics(metrics: dict) -> None:
+    for name, entry in metrics.items():
+        print(f"{name:>40}: {entry['value']:12.2f} {entry['unit']}")
+
+
+def baseline_path(suite: str, directory: str = BASELINE_DIR) -> str:
+    return os.path.join(directory, f"{suite}.json")
+
+
+def save_baseline(suite: str, metrics: dict, context: dict, directory: str = BASELINE_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = baseline_path(suite, directory)
+    payload = {"suite": suite, "machine": platform.platform(), "python": platform.python_version(),
+               "context": context, "metrics": metrics}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def load_baseline(suite: str, directory: str = BASELINE_DIR) -> Optional[dict]:
+    try:
+        with open(baseline_path(suite, directory), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare(baseline: dict, metrics: dict, tolerance: float) -> list:
+    """(metric, baseline value, current value, relative change) for every regression beyond `tolerance`."""
+    regressions = []
+    for name, entry in metrics.items():
+        before = baseline["metrics"].get(name)
+        if before is None:
+            continue
+        if not before["value"]:
+            # e.g. an error count that used to be zero
+            change = float("inf") if entry["value"] else 0.0
+        else:
+            change = (entry["value"] - before["value"]) / before["value"]
+        worse = change > tolerance if entry["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append((name, before["value"], entry["value"], change))
+    return regressions
+
+
+def add_baseline_arguments(parser) -> None:
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--check-baseline", action="store_true",
+                        help="Compare with the stored baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+
+
+def handle_baseline(args, suite: str, metrics: dict, context: dict) -> int:
+    """Saves and/or checks the baseline as requested on the command line; returns the exit code."""
+    if args.save_baseline:
+        print(f"baseline saved to {save_baseline(suite, metrics, context)}")
+    if not args.check_baseline:
+        return 0
+    baseline = load_baseline(suite)
+    if baseline is None:
+        print(f"no baseline stored for {suite}; run with --save-baseline first")
+        return 1
+    regressions = compare(baseline, metrics, args.tolerance)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before} -> {after} ({change:+.0%})")
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%} against the {suite} baseline")
+    return 1 if regressions else 0
@@ -0,0 +1,155 @@
+# startup.py (Startup Profile: Import Time per Module and Time to First Request)
+#
+# Imports backend.main in a fresh interpreter under `python -X importtime`
+# and lists the modules that cost the most, then starts fresh workers that
+# import the app, run its lifespan and serve one GET /form-schema, timing
+# each phase and the whole spawn-to-first-response. Runs against a temporary
+# SQLite file unless DATABASE_URL is set. --check exits 1 when the median
+# import or time-to-first-request is over its budget
+# (STARTUP_IMPORT_BUDGET / STARTUP_FIRST_REQUEST_BUDGET, ms).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.startup
+#   python -m benchmarks.startup --top 30 --repeat 7
+#   python -m benchmarks.startup --check
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.results import add_baseline_arguments, handle_baseline, metric, print_metrics
+
+SUITE = "startup"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets (ms) for `import backend.main` and for spawn-to-first-response of a fresh worker
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "2500"))
+STARTUP_FIRST_REQUEST_BUDGET = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET", "4000"))
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Run in the fresh worker: phase timings as one JSON line on stdout
+WORKER = """
+import asyncio, json, os, time
+spawned_at = float(os.environ["STARTUP_SPAWNED_AT"])
+started = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/form-schema", "raw_path": b"/form-schema", "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"localhost")],
+             "client": ("127.0.0.1", 0), "server": ("localhost", 80)}
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        await app(scope, receive, send)
+        answered = time.perf_counter()
+        answered_at = time.time()
+    return ready, answered, answered_at, messages[0]["status"]
+
+ready, answered, answered_at, status = asyncio.run(first_request())
+print(json.dumps({"import": imported - started, "lifespan": ready - imported, "first_request": answered - ready,
+                  "time_to_first_request": answered_at - spawned_at, "status": status}))
+"""
+
+
+def parse_importtime(output: str) -> list:
+    """(module, self µs, cumulative µs, nesting depth) for each line of `-X importtime` output."""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def worker_env(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def import_profile(database_url: str) -> list:
+    """parse_importtime() of a fresh interpreter importing backend.main."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend.main"],
+                            cwd=ROOT, env=worker_env(database_url), capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def first_request(database_url: str) -> dict:
+    """Phase timings (seconds) of one fresh worker up to its first response."""
+    env = worker_env(database_url)
+    env["STARTUP_SPAWNED_AT"] = repr(time.time())
+    result = subprocess.run([sys.executable, "-c", WORKER],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if timings.pop("status") != 200:
+        raise RuntimeError(f"first request failed: {result.stderr}")
+    return timings
+
+
+def run(database_url: str, repeat: int) -> dict:
+    """Median phase timings over `repeat` fresh workers, in ms."""
+    runs = [first_request(database_url) for _ in range(repeat)]
+    return {
+        f"startup.{phase}": metric(statistics.median(timings[phase] for timings in runs) * 1000, "ms")
+        for phase in ("import", "lifespan", "first_request", "time_to_first_request")
+    }
+
+
+def over_budget(metrics: dict, import_budget: float = STARTUP_IMPORT_BUDGET,
+                first_request_budget: float = STARTUP_FIRST_REQUEST_BUDGET) -> list:
+    """(metric, value, budget) for each budgeted phase that took longer than allowed."""
+    budgets = {"startup.import": import_budget, "startup.time_to_first_request": first_request_budget}
+    return [(name, metrics[name]["value"], budget) for name, budget in budgets.items()
+            if metrics[name]["value"] > budget]
+
+
+def print_profile(modules: list, top: int) -> None:
+    print(f"{'self ms':>10} {'cumulative ms':>14}  module (slowest {top} by cumulative time)")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"{self_us / 1000:10.1f} {cumulative_us / 1000:14.1f}  {'  ' * depth}{name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile backend imports and time to first request.")
+    parser.add_argument("--top", type=int, default=20, help="Modules listed in the import profile")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh workers timed; the median is reported")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a phase is over its budget")
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        print_profile(import_profile(database_url), args.top)
+        metrics = run(database_url, args.repeat)
+    print_metrics(metrics)
+
+    status = handle_baseline(args, SUITE, metrics, {"repeat": args.repeat})
+    if args.check:
+        exceeded = over_budget(metrics)
+        for name, value, budget in exceeded:
+            print(f"OVER BUDGET {name}: {value:.0f} ms > {budget:.0f} ms")
+        if not exceeded:
+            print("startup within budget")
+        status = status or (1 if exceeded else 0)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
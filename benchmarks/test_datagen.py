@@ -0,0 +1,30 @@
+# test_datagen.py (Pytest for the synthetic data used by the benchmarks)
+from backend.schemas import PanValidationRequest, UdyamFormRequest
+from benchmarks.datagen import ORG_TYPES, PAN_HOLDER_TYPES, RegistrationGenerator
+from benchmarks.results import compare, metric
+
+def test_generated_registrations_are_valid_and_unique():
+    records = RegistrationGenerator(seed=1).registrations(len(ORG_TYPES) * 20)
+    forms = [UdyamFormRequest.model_validate(record) for record in records]
+    assert {form.organizationType for form in forms} == set(ORG_TYPES)
+    assert len({form.adharno for form in forms}) == len(forms)
+    pans = [form.pan for form in forms if form.pan]
+    assert len(set(pans)) == len(pans)
+    for form in forms:
+        if form.pan:
+            assert form.pan[3] == PAN_HOLDER_TYPES[form.organizationType]
+
+def test_generated_pan_requests_are_valid():
+    generator = RegistrationGenerator(seed=2)
+    for _ in range(50):
+        PanValidationRequest.model_validate(generator.pan_request())
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"metrics": {
+        "a.p50": metric(10, "ms"), "a.throughput": metric(100, "req/s", "higher"), "a.errors": metric(0, "requests"),
+    }}
+    assert compare(baseline, {"a.p50": metric(12, "ms"), "a.throughput": metric(80, "req/s", "higher")}, 0.25) == []
+    regressions = compare(baseline, {
+        "a.p50": metric(13, "ms"), "a.throughput": metric(70, "req/s", "higher"), "a.errors": metric(3, "requests"),
+    }, 0.25)
+    assert [name for name, *_ in regressions] == ["a.p50", "a.throughput", "a.errors"]
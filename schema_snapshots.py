@@ -0,0 +1,120 @@
+# schema_snapshots.py (Versioned Form Schema Snapshots and Diffs)
+#
+# An incremental scrape (python webScrapping.py --incremental) produces, for
+# every page and step, the content hash of the step and its scraped fields. A
+# new snapshot is written only when some hash differs from the latest one:
+#
+#   <dir>/v0003.json       full snapshot (version, created, steps)
+#   <dir>/v0003.diff.json  fields added/removed/changed since v0002
+#   <dir>/latest.json      copy of the newest snapshot
+#
+# so consumers only need to reload when latest.json's version changes.
+import datetime
+import json
+import os
+from typing import Optional
+
+LATEST = "latest.json"
+# Field lists of a scraped step and the attributes identifying one field
+FIELD_KEYS = {
+    "inputs": ("name", "id"),
+    "dropdowns": ("name", "id"),
+    "buttons": ("id", "text"),
+    "labels": ("for", "text"),
+}
+
+
+def load_latest(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, LATEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def step_hashes(snapshot: Optional[dict]) -> dict:
+    """{(page, step): hash} for every step of a snapshot."""
+    if not snapshot:
+        return {}
+    return {
+        (page, step): entry["hash"]
+        for page, steps in snapshot["steps"].items()
+        for step, entry in steps.items()
+    }
+
+
+def _keyed(kind: str, fields: list) -> dict:
+    """Keys each field by its identifying attributes; repeated keys get a #n suffix."""
+    keyed = {}
+    for field in fields:
+        if kind == "labels":
+            key = f"{field.get('for') or ''}|{field.get('text') or ''}"
+        else:
+            key = next((field[attr] for attr in FIELD_KEYS[kind] if field.get(attr)), "")
+        candidate, n = key, 1
+        while candidate in keyed:
+            n += 1
+            candidate = f"{key}#{n}"
+        keyed[candidate] = field
+    return keyed
+
+
+def diff_step(old: dict, new: dict) -> dict:
+    """Fields added, removed and changed between two scrapes of one step."""
+    diff = {"added": [], "removed": [], "changed": []}
+    for kind in FIELD_KEYS:
+        before, after = _keyed(kind, old.get(kind, [])), _keyed(kind, new.get(kind, []))
+        diff["added"] += [{"kind": kind, "key": key, "field": after[key]} for key in after if key not in before]
+        diff["removed"] += [{"kind": kind, "key": key, "field": before[key]} for key in before if key not in after]
+        diff["changed"] += [
+            {"kind": kind, "key": key, "before": before[key], "after": after[key]}
+            for key in after if key in before and before[key] != after[key]
+        ]
+    return diff
+
+
+def diff_snapshots(old: Optional[dict], new: dict) -> dict:
+    """Per-step diffs of every step whose hash changed (or is new/gone)."""
+    old_steps = old["steps"] if old else {}
+    steps = {}
+    for page in sorted(set(old_steps) | set(new["steps"])):
+        before, after = old_steps.get(page, {}), new["steps"].get(page, {})
+        for step in sorted(set(before) | set(after)):
+            if step in before and step in after and before[step]["hash"] == after[step]["hash"]:
+                continue
+            empty = {"hash": None, "data": {}}
+            steps.setdefault(page, {})[step] = diff_step(before.get(step, empty)["data"], after.get(step, empty)["data"])
+    return {"from": old["version"] if old else None, "to": new["version"], "steps": steps}
+
+
+def _write_json(path: str, payload) -> None:
+    # Written next to the target and renamed, so readers never see a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(directory: str, steps: dict) -> Optional[tuple[dict, dict]]:
+    """
+    Stores {page: {step: {"hash", "data"}}} as the next snapshot version.
+    Returns (snapshot, diff), or None when every hash matches the latest
+    snapshot and nothing was written.
+    """
+    latest = load_latest(directory)
+    new_hashes = {(page, step): entry["hash"] for page, entries in steps.items() for step, entry in entries.items()}
+    if latest is not None and step_hashes(latest) == new_hashes:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    version = latest["version"] + 1 if latest else 1
+    snapshot = {
+        "version": version,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "steps": steps,
+    }
+    diff = diff_snapshots(latest, snapshot)
+    _write_json(os.path.join(directory, f"v{version:04d}.json"), snapshot)
+    _write_json(os.path.join(directory, f"v{version:04d}.diff.json"), diff)
+    _write_json(os.path.join(directory, LATEST), snapshot)
+    return snapshot, diff
@@ -0,0 +1,47 @@
+# test_schema_snapshots.py (Pytest for versioned form schema snapshots)
+import json
+
+from schema_snapshots import diff_step, load_latest, write_snapshot
+
+STEP1 = {
+    "inputs": [
+        {"name": "__VIEWSTATE", "id": "__VIEWSTATE", "type": "hidden", "maxlength": None},
+        {"name": "txtadharno", "id": "txtadharno", "type": "text", "maxlength": "12"},
+    ],
+    "labels": [{"for": "ownernamee", "text": "1. Aadhaar Number"}, {"for": "ownernamee", "text": "2. Name"}],
+    "dropdowns": [],
+    "buttons": [],
+}
+
+def test_diff_step_reports_added_removed_and_changed_fields():
+    new = json.loads(json.dumps(STEP1))
+    new["inputs"][1]["maxlength"] = "14"
+    new["inputs"].append({"name": "txtownername", "id": "txtownername", "type": "text", "maxlength": "100"})
+    del new["labels"][1]
+
+    diff = diff_step(STEP1, new)
+
+    assert [(c["kind"], c["key"]) for c in diff["added"]] == [("inputs", "txtownername")]
+    assert [(c["kind"], c["key"]) for c in diff["removed"]] == [("labels", "ownernamee|2. Name")]
+    assert diff["changed"] == [{
+        "kind": "inputs", "key": "txtadharno",
+        "before": STEP1["inputs"][1], "after": new["inputs"][1],
+    }]
+
+def test_snapshot_only_written_when_a_hash_changes(tmp_path):
+    steps = {"udyam": {"step1": {"hash": "aaa", "data": STEP1}, "step2": {"hash": "bbb", "data": {}}}}
+    snapshot, diff = write_snapshot(str(tmp_path), steps)
+    assert snapshot["version"] == 1
+    assert diff["from"] is None and set(diff["steps"]["udyam"]) == {"step1", "step2"}
+
+    assert write_snapshot(str(tmp_path), steps) is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["latest.json", "v0001.diff.json", "v0001.json"]
+
+    changed = json.loads(json.dumps(steps))
+    changed["udyam"]["step2"] = {"hash": "ccc", "data": {"inputs": [{"name": "txtPan", "id": "txtPan"}]}}
+    snapshot, diff = write_snapshot(str(tmp_path), changed)
+    assert snapshot["version"] == 2
+    assert list(diff["steps"]["udyam"]) == ["step2"]  # step1's hash did not change
+    assert diff["steps"]["udyam"]["step2"]["added"][0]["key"] == "txtPan"
+    assert load_latest(str(tmp_path))["version"] == 2
+    assert json.loads((tmp_path / "v0002.diff.json").read_text())["from"] == 1
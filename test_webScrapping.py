@@ -0,0 +1,151 @@
+# test_webScrapping.py (Pytest for the form scraper, run against local copies of the form)
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import TimeoutException
+
+from webScrapping import (
+    UDYAM_STEPS,
+    BrowserPool,
+    Page,
+    Step,
+    StepNavigationError,
+    create_driver,
+    open_step,
+    scrape_pages,
+    scrape_step,
+    scrape_step_batched,
+    snapshot_pages,
+)
+
+STEP1_HTML = """<!DOCTYPE html>
+<html><body><form>
+  <input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="abc">
+  <label for="ctl00_ContentPlaceHolder1_txtadharno">1. Aadhaar Number</label>
+  <input type="text" name="ctl00$ContentPlaceHolder1$txtadharno" id="ctl00_ContentPlaceHolder1_txtadharno"
+         placeholder="Your Aadhaar No" maxlength="12">
+  <select name="lang" id="lang"><option>English</option><option>Hindi</option></select>
+  <button type="button" id="ctl00_ContentPlaceHolder1_btnValidateAadhaar"
+          onclick="setTimeout(function () { location.href = 'step2.html'; }, 300)">Validate &amp; Generate OTP</button>
+</form></body></html>
+"""
+
+STEP2_HTML = """<!DOCTYPE html>
+<html><body><form>
+  <label for="ctl00_ContentPlaceHolder1_txtPan">PAN</label>
+  <input type="text" name="ctl00$ContentPlaceHolder1$txtPan" id="ctl00_ContentPlaceHolder1_txtPan" maxlength="10">
+  <button type="submit" id="btnValidatePan">PAN Validate</button>
+</form></body></html>
+"""
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_browser_pool_reuses_and_caps_browsers():
+    started = []
+
+    def factory():
+        started.append(FakeDriver())
+        return started[-1]
+
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def job():
+        with pool.browser() as driver:
+            barrier.wait(timeout=5)
+            seen.append(driver)
+
+    with BrowserPool(2, factory) as pool:
+        threads = [threading.Thread(target=job) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with pool.browser() as driver:
+            assert driver in started  # Reused, not started anew
+    assert len(started) == 2
+    assert set(seen) == set(started)
+    assert all(driver.quit_called for driver in started)
+
+
+@pytest.fixture(scope="module")
+def browser_factory():
+    try:
+        create_driver().quit()
+    except Exception as e:
+        pytest.skip(f"Chrome is not available: {e}")
+    return create_driver
+
+
+def test_scrape_pages_against_local_form(tmp_path, browser_factory):
+    (tmp_path / "step1.html").write_text(STEP1_HTML, encoding="utf-8")
+    (tmp_path / "step2.html").write_text(STEP2_HTML, encoding="utf-8")
+    page = Page("local", (tmp_path / "step1.html").as_uri(), UDYAM_STEPS)
+
+    results = scrape_pages([page], workers=2, timeout=10, driver_factory=browser_factory)
+
+    step1, step2 = results["local"]["step1"], results["local"]["step2"]
+    assert [inp["id"] for inp in step1["inputs"]] == ["__VIEWSTATE", "ctl00_ContentPlaceHolder1_txtadharno"]
+    assert step1["inputs"][1]["maxlength"] == "12"
+    assert step1["dropdowns"] == [{"name": "lang", "id": "lang", "options": ["English", "Hindi"]}]
+    assert step1["labels"][0]["text"] == "1. Aadhaar Number"
+    assert [inp["id"] for inp in step2["inputs"]] == ["ctl00_ContentPlaceHolder1_txtPan"]
+    assert step2["buttons"] == [{"id": "btnValidatePan", "type": "submit", "text": "PAN Validate"}]
+
+
+def test_batched_extraction_matches_per_element_extraction(tmp_path, browser_factory):
+    (tmp_path / "step1.html").write_text(STEP1_HTML, encoding="utf-8")
+    driver = browser_factory()
+    try:
+        driver.get((tmp_path / "step1.html").as_uri())
+        assert scrape_step_batched(driver) == scrape_step(driver)
+    finally:
+        driver.quit()
+
+
+def test_incremental_scrape_skips_unchanged_steps(tmp_path, browser_factory):
+    (tmp_path / "step1.html").write_text(STEP1_HTML, encoding="utf-8")
+    (tmp_path / "step2.html").write_text(STEP2_HTML, encoding="utf-8")
+    page = Page("local", (tmp_path / "step1.html").as_uri(), UDYAM_STEPS)
+
+    first, reused = snapshot_pages([page], workers=2, timeout=10, driver_factory=browser_factory)
+    assert reused == 0
+    # The __VIEWSTATE value is not part of the fingerprint
+    (tmp_path / "step1.html").write_text(STEP1_HTML.replace('value="abc"', 'value="xyz"'), encoding="utf-8")
+    (tmp_path / "step2.html").write_text(STEP2_HTML.replace('maxlength="10"', 'maxlength="11"'), encoding="utf-8")
+    second, reused = snapshot_pages([page], {"steps": first}, workers=2, timeout=10, driver_factory=browser_factory)
+
+    assert reused == 1
+    assert second["local"]["step1"] == first["local"]["step1"]
+    assert second["local"]["step2"]["hash"] != first["local"]["step2"]["hash"]
+    assert second["local"]["step2"]["data"]["inputs"][0]["maxlength"] == "11"
+
+
+def test_unreachable_step_fails_instead_of_scraping_the_previous_one():
+    class LoadedDriver(FakeDriver):
+        def get(self, url):
+            pass
+
+        def execute_script(self, script):
+            return "complete"
+
+    def advance(driver, timeout):
+        raise TimeoutException("no postback")
+
+    page = Page("local", "about:blank", (Step("step1"), Step("step2", advance=advance)))
+    open_step(LoadedDriver(), page, 0, timeout=1)
+    with pytest.raises(StepNavigationError, match="step2 of local"):
+        open_step(LoadedDriver(), page, 1, timeout=1)
@@ -137,22 +137,50 @@ const formFields = {
   ]
 };
 
-// Mock API endpoint for PostPin (replace with actual API call)
+const API_BASE_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
+
+// Field rules compiled by the backend from the scraped form (GET /form-schema)
+type FieldRules = { maxLength: number | null; minLength: number | null; pattern: string | null; options: string[] | null };
+
+// Mirrors FieldRule.check in backend/form_schema.py
+const checkFieldRules = (field: string, value: string, rules: FieldRules): string | null => {
+  if (rules.maxLength !== null && value.length > rules.maxLength) return `${field} must be at most ${rules.maxLength} characters.`;
+  if (rules.minLength !== null && value.length < rules.minLength) return `${field} must be at least ${rules.minLength} characters.`;
+  if (rules.pattern !== null && !new RegExp(`^(?:${rules.pattern})$`).test(value)) return `${field} does not match the required format.`;
+  if (rules.options !== null && !rules.options.includes(value)) return `${field} must be one of the listed options.`;
+  return null;
+};
+
+// Extracts a readable message from a FastAPI error response
+const errorMessage = (errorData: any, fallback: string): string => {
+  if (typeof errorData?.detail === 'string') return errorData.detail;
+  return errorData?.detail?.[0]?.msg || fallback;
+};
+
+// Used when the backend's index has no entry (it may only hold the bundled sample) or is unreachable
+const FALLBACK_PINCODES: { [key: string]: { city: string; state: string } } = {
+  '110001': { city: 'New Delhi', state: 'Delhi' },
+  '400001': { city: 'Mumbai', state: 'Maharashtra' },
+  '700001': { city: 'Kolkata', state: 'West Bengal' },
+};
+
+// Looks up city/state in the backend's pincode index; responses carry ETag/Cache-Control,
+// so repeated lookups are served from the browser cache
 const fetchCityStateFromPincode = async (pincode: string) => {
-  const mockData: { [key: string]: { city: string; state: string } } = {
-    '110001': { city: 'New Delhi', state: 'Delhi' },
-    '400001': { city: 'Mumbai', state: 'Maharashtra' },
-    '700001': { city: 'Kolkata', state: 'West Bengal' },
-  };
-  return new Promise<{ city: string; state: string } | null>((resolve) => {
-    setTimeout(() => {
-      resolve(mockData[pincode] || null);
-    }, 500);
-  });
+  try {
+    const response = await fetch(`${API_BASE_URL}/pincodes/${pincode}`);
+    if (response.ok) {
+      const data = await response.json();
+      return { city: data.city as string, state: data.state as string };
+    }
+  } catch {
+    // Falls through to the built-in table
+  }
+  return FALLBACK_PINCODES[pincode] || null;
 };
 
 const App: React.FC = () => {
-  const { register, handleSubmit, watch, formState: { errors, isSubmitting }, setValue, trigger } = useForm<UdyamFormData>({
+  const { register, handleSubmit, watch, formState: { errors, isSubmitting }, setValue, trigger, getValues, setError } = useForm<UdyamFormData>({
     resolver: zodResolver(UdyamSchema),
     defaultValues: {
       aadhaarDeclaration: true,
@@ -173,6 +201,54 @@ const App: React.FC = () => {
   const [state, setState] = useState<string>('');
   const [isPincodeLoading, setIsPincodeLoading] = useState(false);
   const [isPanValidated, setIsPanValidated] = useState(false);
+  const [draftId, setDraftId] = useState<string | null>(null);
+  const [formRules, setFormRules] = useState<Record<string, FieldRules>>({});
+
+  useEffect(() => {
+    // The browser revalidates with the ETag, so an unchanged rule set costs a 304
+    fetch(`${API_BASE_URL}/form-schema`)
+      .then((response) => (response.ok ? response.json() : null))
+      .then((schema) => schema && setFormRules(schema.fields))
+      .catch(() => undefined);
+  }, []);
+
+  // Runs the zod rules, then the scraped-form rules the backend will apply
+  const validateFields = async (fields: (keyof UdyamFormData)[]): Promise<boolean> => {
+    if (!(await trigger(fields))) return false;
+    let isValid = true;
+    for (const field of fields) {
+      const value = getValues(field);
+      const rules = formRules[field];
+      const error = rules && typeof value === 'string' ? checkFieldRules(field, value, rules) : null;
+      if (error) {
+        setError(field, { type: 'formSchema', message: error });
+        isValid = false;
+      }
+    }
+    return isValid;
+  };
+
+  // Saves one step of the form into the server-side draft, creating the draft on first use.
+  // Each step is validated by the backend once, when it is saved.
+  const saveDraftStep = async (step: 'aadhaar' | 'pan' | 'business', body: Partial<UdyamFormData>): Promise<string> => {
+    let id = draftId;
+    if (!id) {
+      const created = await fetch(`${API_BASE_URL}/drafts`, { method: 'POST' });
+      if (!created.ok) throw new Error('Could not start the registration. Please try again.');
+      id = (await created.json()).draftId as string;
+      setDraftId(id);
+    }
+    const response = await fetch(`${API_BASE_URL}/drafts/${id}/${step}`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(body),
+    });
+    if (!response.ok) {
+      if (response.status === 404) setDraftId(null);
+      throw new Error(errorMessage(await response.json(), 'Could not save this step.'));
+    }
+    return id;
+  };
 
   useEffect(() => {
     const delayDebounceFn = setTimeout(async () => {
@@ -199,18 +275,24 @@ const App: React.FC = () => {
     console.log("Final Form Data:", data);
     setSubmissionMessage(null);
     try {
-      const response = await fetch('http://localhost:8000/submit', {
+      // Steps 1 and 2 are already stored in the draft; only the last step is sent now
+      const id = await saveDraftStep('business', {
+        hasGstin: data.hasGstin,
+        totalTurnoverA: data.totalTurnoverA,
+        totalTurnoverB: data.totalTurnoverB,
+      });
+      // The draft id doubles as the idempotency key: a retry after a lost response gets the stored result
+      const response = await fetch(`${API_BASE_URL}/drafts/${id}/submit`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(data),
+        headers: { 'Idempotency-Key': id },
       });
 
       if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail[0]?.msg || 'Submission failed.');
+        throw new Error(errorMessage(await response.json(), 'Submission failed.'));
       }
 
       const result = await response.json();
+      setDraftId(null);
       setSubmissionMessage({ type: 'success', message: result.message });
     } catch (error: any) {
       console.error("Submission error:", error);
@@ -218,29 +300,53 @@ const App: React.FC = () => {
     }
   };
 
+  const savePanStep = async () => {
+    const [organizationType, hasPan, pan, panName, dob, dobType, panDeclaration] = getValues(
+      ['organizationType', 'hasPan', 'pan', 'panName', 'dob', 'dobType', 'panDeclaration']
+    );
+    await saveDraftStep('pan', { organizationType, hasPan, pan, panName, dob, dobType, panDeclaration });
+  };
+
   const handleNextStep = async () => {
     if (currentStep === 1) {
-      const isValid = await trigger(['adharno', 'ownername', 'aadhaarDeclaration']);
+      const isValid = await validateFields(['adharno', 'ownername', 'aadhaarDeclaration']);
       if (isValid) {
         // Here, you would make an API call to validate Aadhaar with OTP
-        // For this example, we'll just move to the next step
-        setCurrentStep(2);
+        // For this example, we'll just save the step and move on
+        try {
+          const [adharno, ownername, aadhaarDeclaration] = getValues(['adharno', 'ownername', 'aadhaarDeclaration']);
+          await saveDraftStep('aadhaar', { adharno, ownername, aadhaarDeclaration });
+          setCurrentStep(2);
+        } catch (error: any) {
+          setSubmissionMessage({ type: 'error', message: error.message });
+        }
       }
     } else if (currentStep === 2) {
-      const isValid = await trigger(['organizationType', 'hasPan']);
+      const isValid = await validateFields(['organizationType', 'hasPan']);
       if (isValid && hasPan === 'yes') {
-        const panIsValid = await trigger(['pan', 'panName', 'dob', 'panDeclaration']);
+        const panIsValid = await validateFields(['pan', 'panName', 'dob', 'panDeclaration']);
         if (panIsValid) {
-          setIsPanValidated(true);
-          // Now you can proceed to the final step.
-          setCurrentStep(3);
+          try {
+            await savePanStep();
+            setIsPanValidated(true);
+            // Now you can proceed to the final step.
+            setCurrentStep(3);
+          } catch (error: any) {
+            setSubmissionMessage({ type: 'error', message: error.message });
+            setIsPanValidated(false);
+          }
         } else {
           setSubmissionMessage({ type: 'error', message: 'Please correct the PAN details.' });
           setIsPanValidated(false);
         }
       } else if (isValid && hasPan === 'no') {
         // If PAN is not required, move to the next step directly
-        setCurrentStep(3);
+        try {
+          await savePanStep();
+          setCurrentStep(3);
+        } catch (error: any) {
+          setSubmissionMessage({ type: 'error', message: error.message });
+        }
       }
     }
   };
@@ -315,7 +421,7 @@ const App: React.FC = () => {
                   type="text"
                   id="ctl00_ContentPlaceHolder1_txtadharno"
                   placeholder="Your Aadhaar No"
-                  maxLength={12}
+                  maxLength={formRules.adharno?.maxLength ?? 12}
                   className="shadow appearance-none border rounded-lg w-full py-2 px-3 text-gray-700 leading-tight focus:outline-none focus:ring-2 focus:ring-blue-500"
                   {...register('adharno')}
                   onKeyPress={handleAadhaarKeyPress}
@@ -331,7 +437,7 @@ const App: React.FC = () => {
                   type="text"
                   id="ctl00_ContentPlaceHolder1_txtownername"
                   placeholder="Name as per Aadhaar"
-                  maxLength={100}
+                  maxLength={formRules.ownername?.maxLength ?? 100}
                   className="shadow appearance-none border rounded-lg w-full py-2 px-3 text-gray-700 leading-tight focus:outline-none focus:ring-2 focus:ring-blue-500"
                   {...register('ownername')}
                 />
@@ -430,7 +536,7 @@ const App: React.FC = () => {
                       type="text"
                       id="ctl00_ContentPlaceHolder1_txtPan"
                       placeholder="Enter Pan Number"
-                      maxLength={10}
+                      maxLength={formRules.pan?.maxLength ?? 10}
                       className="shadow appearance-none border rounded-lg w-full py-2 px-3 text-gray-700 leading-tight focus:outline-none focus:ring-2 focus:ring-blue-500 uppercase"
                       {...register('pan')}
                       onChange={() => setIsPanValidated(false)}
@@ -446,7 +552,7 @@ const App: React.FC = () => {
                       type="text"
                       id="ctl00_ContentPlaceHolder1_txtPanName"
                       placeholder="Name as per PAN"
-                      maxLength={100}
+                      maxLength={formRules.panName?.maxLength ?? 100}
                       className="shadow appearance-none border rounded-lg w-full py-2 px-3 text-gray-700 leading-tight focus:outline-none focus:ring-2 focus:ring-blue-500"
                       {...register('panName')}
                       onChange={() => setIsPanValidated(false)}
@@ -1,14 +1,61 @@
+# webScrapping.py (Udyam Form Schema Scraper)
+#
+# Scrapes the inputs, labels, dropdowns and buttons of each step of the Udyam
+# registration form. Every step is an independent job: a worker takes a browser
+# from a shared pool, opens the page, replays the actions that lead to the step,
+# waits for it to be ready and scrapes it, so steps and pages run concurrently.
+#
+# Usage:
+#   python webScrapping.py --workers 4 --output udyam_form_step1_2.json
+#   python webScrapping.py --incremental --snapshot-dir form_schema
+#
+# In incremental mode each step is first fingerprinted in the browser; steps
+# whose hash matches the latest snapshot are not extracted again, and a new
+# versioned snapshot plus diff is written only when something changed (see
+# schema_snapshots.py). A step that cannot be reached fails the whole run
+# (exit status 1) before anything is written.
+#
+# Requires selenium (4.6+ resolves chromedriver itself; webdriver-manager is
+# used when installed).
+import argparse
 import json
+import logging
+import os
+import queue
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from schema_snapshots import load_latest, write_snapshot
+
+UDYAM_URL = "https://udyamregistration.gov.in/UdyamRegistration.aspx"
+# The file the backend reads its validation rules from (FORM_SCHEMA_FILE)
+DEFAULT_OUTPUT = "udyam_form_step1_2.json"
+DEFAULT_TIMEOUT = 15
+DUMMY_AADHAAR = "123412341234"
+DEFAULT_SNAPSHOT_DIR = "form_schema"
+
+logger = logging.getLogger("webScrapping")
 
-def scrape_step(driver):
-    """Extracts input fields, labels, dropdowns, and buttons from current page."""
+
+class StepNavigationError(RuntimeError):
+    """A step of the form could not be reached, so it cannot be scraped."""
+
+
+def scrape_step(driver, section: Optional[str] = None):
+    """Extracts input fields, labels, dropdowns, and buttons from current page (or its `section`)."""
+    root = driver.find_element(By.CSS_SELECTOR, section) if section else driver
     page_data = {
         "inputs": [],
         "labels": [],
@@ -17,7 +64,7 @@ def scrape_step(driver):
     }
 
     # Inputs
-    inputs = driver.find_elements(By.TAG_NAME, "input")
+    inputs = root.find_elements(By.TAG_NAME, "input")
     for inp in inputs:
         field_data = {
             "name": inp.get_attribute("name"),
@@ -32,7 +79,7 @@ def scrape_step(driver):
         page_data["inputs"].append(field_data)
 
     # Labels
-    labels = driver.find_elements(By.TAG_NAME, "label")
+    labels = root.find_elements(By.TAG_NAME, "label")
     for label in labels:
         label_data = {
             "for": label.get_attribute("for"),
@@ -41,7 +88,7 @@ def scrape_step(driver):
         page_data["labels"].append(label_data)
 
     # Dropdowns
-    dropdowns = driver.find_elements(By.TAG_NAME, "select")
+    dropdowns = root.find_elements(By.TAG_NAME, "select")
     for dd in dropdowns:
         options_list = [opt.text.strip() for opt in dd.find_elements(By.TAG_NAME, "option")]
         dropdown_data = {
@@ -52,7 +99,7 @@ def scrape_step(driver):
         page_data["dropdowns"].append(dropdown_data)
 
     # Buttons
-    buttons = driver.find_elements(By.TAG_NAME, "button")
+    buttons = root.find_elements(By.TAG_NAME, "button")
     for btn in buttons:
         button_data = {
             "id": btn.get_attribute("id"),
@@ -64,40 +111,339 @@ def scrape_step(driver):
     return page_data
 
 
-# Configure Chrome
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
+# Collects the same fields as scrape_step in one round-trip. Attributes that
+# scrape_step reads through properties (type, placeholder...) come from the
+# DOM properties here too, so absent ones are "" rather than null; element text
+# is the rendered text, which is empty for elements that are not displayed.
+# arguments[0] is an optional CSS selector of the step's section.
+EXTRACT_FUNCTION = """
+const root = arguments[0] ? document.querySelector(arguments[0]) : document;
+if (!root) throw new Error('Section not found: ' + arguments[0]);
+const text = (el) => (el.getClientRects().length ? el.innerText.trim() : '');
+const all = (tag) => Array.from(root.getElementsByTagName(tag));
+const extract = () => ({
+  inputs: all('input').map((inp) => ({
+    name: inp.name, id: inp.id, type: inp.type, placeholder: inp.placeholder, pattern: inp.pattern,
+    maxlength: inp.getAttribute('maxlength'), minlength: inp.getAttribute('minlength'), title: inp.title,
+  })),
+  labels: all('label').map((label) => ({for: label.getAttribute('for'), text: text(label)})),
+  dropdowns: all('select').map((dd) => ({
+    name: dd.name, id: dd.id, options: Array.from(dd.getElementsByTagName('option'), (opt) => opt.text.trim()),
+  })),
+  buttons: all('button').map((btn) => ({id: btn.id, type: btn.type, text: text(btn)})),
+});
+"""
+EXTRACT_SCRIPT = EXTRACT_FUNCTION + "return extract();"
+
+# 64-bit cyrb53 hash of the extracted fields, computed in the page so an
+# unchanged step costs one short response. Field values (e.g. __VIEWSTATE
+# contents) are never extracted, so they do not affect the hash.
+FINGERPRINT_SCRIPT = EXTRACT_FUNCTION + """
+const str = JSON.stringify(extract());
+let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+for (let i = 0; i < str.length; i++) {
+  const ch = str.charCodeAt(i);
+  h1 = Math.imul(h1 ^ ch, 2654435761);
+  h2 = Math.imul(h2 ^ ch, 1597334677);
+}
+h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+return (h2 >>> 0).toString(16).padStart(8, '0') + (h1 >>> 0).toString(16).padStart(8, '0');
+"""
+
+
+def scrape_step_batched(driver, section: Optional[str] = None):
+    """Same result as scrape_step, extracted by a single injected script instead of one RPC per attribute."""
+    return driver.execute_script(EXTRACT_SCRIPT, section)
+
+
+def fingerprint_step(driver, section: Optional[str] = None) -> str:
+    """Content hash of the fields scrape_step would extract."""
+    return driver.execute_script(FINGERPRINT_SCRIPT, section)
+
+
+# Extraction modes selectable from the CLI
+EXTRACTORS = {
+    "script": scrape_step_batched,
+    "elements": scrape_step,
+}
+
+
+# --- Browsers ---
+def create_driver(headless: bool = True):
+    """Starts a Chrome session (headless by default)."""
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    try:
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+    except ImportError:
+        return webdriver.Chrome(options=options)
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+
+class BrowserPool:
+    """
+    Up to `size` browsers shared by worker threads. Browsers are started on
+    first demand and reused between jobs (cookies are cleared in between), so
+    a run pays Chrome's start-up cost once per worker instead of once per job.
+    """
+
+    def __init__(self, size: int, factory: Callable = create_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def browser(self):
+        driver = self._checkout()
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self._checkin(driver, healthy)
 
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            start_new = len(self._all) < self.size
+            if start_new:
+                self._all.append(None)  # Reserve the slot while the browser starts
+        if not start_new:
+            return self._idle.get()
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._all.remove(None)
+            raise
+        with self._lock:
+            self._all[self._all.index(None)] = driver
+        return driver
 
-# Step 1: Aadhaar + OTP Validation
-url = "https://udyamregistration.gov.in/UdyamRegistration.aspx"
-driver.get(url)
-time.sleep(5)
+    def _checkin(self, driver, healthy: bool) -> None:
+        if healthy:
+            try:
+                driver.delete_all_cookies()
+            except WebDriverException:
+                healthy = False
+        if healthy:
+            self._idle.put(driver)
+            return
+        # A crashed browser is replaced on the next checkout
+        with self._lock:
+            self._all.remove(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
 
-data = {"step1": scrape_step(driver)}
+    def close(self) -> None:
+        with self._lock:
+            drivers, self._all = [d for d in self._all if d is not None], []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
 
-# Try moving to Step 2 (PAN Validation)
-try:
-    aadhaar_input = driver.find_element(By.ID, "txtAadhaar")
-    aadhaar_input.send_keys("123412341234")  # Dummy Aadhaar
+    def __enter__(self):
+        return self
 
-    # Click Validate Aadhaar (button id might change)
-    validate_btn = driver.find_element(By.ID, "btnValidateAadhaar")
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --- Steps and Jobs ---
+@dataclass(frozen=True)
+class Step:
+    """
+    One step of a multi-step form. `advance` performs the actions that lead
+    from the previous step to this one; `ready` locates an element whose
+    presence means the step has rendered. `section` is a CSS selector
+    limiting the scrape to part of the page (default: the whole document).
+    """
+    name: str
+    ready: Optional[tuple] = None
+    advance: Optional[Callable] = None
+    section: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Page:
+    name: str
+    url: str
+    steps: tuple
+
+
+def wait_until_ready(driver, locator: Optional[tuple], timeout: float) -> None:
+    """Waits for the document to finish loading and, if given, for `locator` to be present."""
+    wait = WebDriverWait(driver, timeout)
+    wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+    if locator is not None:
+        wait.until(EC.presence_of_element_located(locator))
+
+
+def open_step(driver, page: Page, step_index: int, timeout: float) -> None:
+    """Loads `page` and replays the actions leading to step `step_index`."""
+    driver.get(page.url)
+    wait_until_ready(driver, page.steps[0].ready, timeout)
+    for previous in page.steps[1:step_index + 1]:
+        try:
+            if previous.advance is not None:
+                previous.advance(driver, timeout)
+            wait_until_ready(driver, previous.ready, timeout)
+        except (TimeoutException, WebDriverException) as e:
+            # Scraping on would record the previous step under this step's name
+            raise StepNavigationError(f"Could not proceed to {previous.name} of {page.name}: {e}") from e
+
+
+def scrape_page_step(pool: BrowserPool, page: Page, step_index: int, timeout: float = DEFAULT_TIMEOUT,
+                     extract: Callable = scrape_step_batched) -> dict:
+    """Opens `page` in a pooled browser, replays the steps before `step_index` and scrapes that step."""
+    with pool.browser() as driver:
+        open_step(driver, page, step_index, timeout)
+        return extract(driver, page.steps[step_index].section)
+
+
+def snapshot_page_step(pool: BrowserPool, page: Page, step_index: int, previous: Optional[dict],
+                       timeout: float = DEFAULT_TIMEOUT, extract: Callable = scrape_step_batched) -> tuple[dict, bool]:
+    """
+    Fingerprints one step and extracts it only if the hash differs from the
+    `previous` snapshot entry. Returns ({"hash", "data"}, reused).
+    """
+    section = page.steps[step_index].section
+    with pool.browser() as driver:
+        open_step(driver, page, step_index, timeout)
+        fingerprint = fingerprint_step(driver, section)
+        if previous is not None and previous["hash"] == fingerprint:
+            return previous, True
+        return {"hash": fingerprint, "data": extract(driver, section)}, False
+
+
+def scrape_pages(pages, workers: int = 4, timeout: float = DEFAULT_TIMEOUT, driver_factory: Callable = create_driver,
+                 extract: Callable = scrape_step_batched) -> dict:
+    """
+    Scrapes every step of every page concurrently on a pool of `workers`
+    browsers. Returns {page name: {step name: scraped data}}.
+    """
+    jobs = [(page, index) for page in pages for index in range(len(page.steps))]
+    with BrowserPool(workers, driver_factory) as pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (page, page.steps[index], executor.submit(scrape_page_step, pool, page, index, timeout, extract))
+            for page, index in jobs
+        ]
+        results = {page.name: {} for page in pages}
+        for page, step, future in futures:
+            results[page.name][step.name] = future.result()
+    return results
+
+
+def snapshot_pages(pages, previous_snapshot: Optional[dict] = None, workers: int = 4, timeout: float = DEFAULT_TIMEOUT,
+                   driver_factory: Callable = create_driver, extract: Callable = scrape_step_batched) -> tuple[dict, int]:
+    """
+    Incremental scrape_pages: returns ({page: {step: {"hash", "data"}}}, number
+    of steps reused unchanged from `previous_snapshot`).
+    """
+    previous_steps = previous_snapshot["steps"] if previous_snapshot else {}
+    jobs = [(page, index) for page in pages for index in range(len(page.steps))]
+    with BrowserPool(workers, driver_factory) as pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (page, page.steps[index], executor.submit(
+                snapshot_page_step, pool, page, index,
+                previous_steps.get(page.name, {}).get(page.steps[index].name), timeout, extract,
+            ))
+            for page, index in jobs
+        ]
+        steps, reused = {page.name: {} for page in pages}, 0
+        for page, step, future in futures:
+            steps[page.name][step.name], step_reused = future.result()
+            reused += step_reused
+    return steps, reused
+
+
+# --- Udyam Registration Form ---
+def submit_aadhaar(driver, timeout: float) -> None:
+    """Fills in a dummy Aadhaar number and validates it, which posts back to step 2."""
+    driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtadharno").send_keys(DUMMY_AADHAAR)
+    validate_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_btnValidateAadhaar")
     validate_btn.click()
+    WebDriverWait(driver, timeout).until(EC.staleness_of(validate_btn))
+
+
+UDYAM_STEPS = (
+    Step("step1", ready=(By.ID, "ctl00_ContentPlaceHolder1_txtadharno")),
+    Step("step2", ready=(By.TAG_NAME, "form"), advance=submit_aadhaar),
+)
+
 
-    time.sleep(5)  # Wait for step change
-except Exception as e:
-    print("⚠ Could not proceed to Step 2 automatically:", e)
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scrape the fields of each Udyam registration form step.")
+    parser.add_argument("--url", action="append", help=f"Page to scrape, repeatable (default: {UDYAM_URL})")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"JSON output file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--workers", type=int, default=4, help="Browsers scraping in parallel")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each step")
+    parser.add_argument("--extract", choices=tuple(EXTRACTORS), default="script",
+                        help="script: one injected script per step (default); elements: one RPC per attribute")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-extract changed steps; write a versioned snapshot and diff when something changed")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR,
+                        help=f"Snapshot directory for --incremental (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--no-headless", action="store_true", help="Show the browser windows")
+    args = parser.parse_args(argv)
 
-# Step 2: PAN Validation
-data["step2"] = scrape_step(driver)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    urls = args.url or [UDYAM_URL]
+    pages = [Page(url, url, UDYAM_STEPS) for url in urls]
+    started = time.perf_counter()
+    options = dict(
+        workers=args.workers, timeout=args.timeout,
+        driver_factory=lambda: create_driver(headless=not args.no_headless),
+        extract=EXTRACTORS[args.extract],
+    )
+    try:
+        if args.incremental:
+            steps, reused = snapshot_pages(pages, load_latest(args.snapshot_dir), **options)
+        else:
+            results = scrape_pages(pages, **options)
+    except StepNavigationError as e:
+        logger.error("✗ %s", e)
+        return 1
+    if args.incremental:
+        written = write_snapshot(args.snapshot_dir, steps)
+        if written is None:
+            logger.info("✅ Form unchanged (%d steps matched the latest snapshot) in %.1fs",
+                        reused, time.perf_counter() - started)
+            return 0
+        snapshot, diff = written
+        changed = sum(len(page_steps) for page_steps in diff["steps"].values())
+        logger.info("📝 %d step(s) changed; wrote snapshot v%s to %s", changed, snapshot["version"], args.snapshot_dir)
+        results = {page: {step: entry["data"] for step, entry in page_steps.items()} for page, page_steps in steps.items()}
+    # A single page keeps the {"step1": ..., "step2": ...} layout
+    data = results[pages[0].name] if len(pages) == 1 else results
 
-# Save to JSON
-with open("udyam_form_steps1_2.json", "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=4)
+    # Renamed into place, so the backend's reloader never reads a partial file
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, args.output)
+    steps = sum(len(page.steps) for page in pages)
+    logger.info("✅ Scraped %d steps from %d page(s) in %.1fs, saved to %s",
+                steps, len(pages), time.perf_counter() - started, args.output)
+    return 0
 
-driver.quit()
 
-print("✅ Data from Step 1 & Step 2 saved to udyam_form_steps1_2.json")
+if __name__ == "__main__":
+    sys.exit(main())